@@ -7,9 +7,14 @@ import sys
 sys.path.append(os.path.join(sys.path[0], 'src'))
 from database import Base
 from alembic import context
-from src.category.models import Category
+# Models are imported by the same module paths as in the application: a model module imported
+# a second time under another name would declare its table twice on Base.metadata.
+from category.models import Category
+from jobs.models import Job
+from quota.models import UserUsage
+from user_text_files.models import File
 from src.config import DB_HOST, DB_PASS, DB_NAME, DB_USER, DB_PORT
-from src.user.models import User, Status
+from user.models import User, Status
 
 
 
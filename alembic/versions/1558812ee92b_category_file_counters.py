@@ -0,0 +1,28 @@
+"""category file counters
+
+Revision ID: 1558812ee92b
+Revises:
+Create Date: 2026-10-18 02:33:35.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '1558812ee92b'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('category', sa.Column('files_count', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('category', sa.Column('files_size', sa.BigInteger(), server_default='0', nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('category', 'files_size')
+    op.drop_column('category', 'files_count')
@@ -0,0 +1,44 @@
+"""job table
+
+Revision ID: 7c3e5a1f9b20
+Revises: 1558812ee92b
+Create Date: 2026-10-18 09:12:40.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3e5a1f9b20'
+down_revision: Union[str, None] = '1558812ee92b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('job',
+                    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+                    sa.Column('kind', sa.String(length=50), nullable=False),
+                    sa.Column('params', sa.JSON(), nullable=False),
+                    sa.Column('status', sa.String(length=20), server_default='queued', nullable=False),
+                    sa.Column('progress_done', sa.BigInteger(), server_default='0', nullable=False),
+                    sa.Column('progress_total', sa.BigInteger(), nullable=True),
+                    sa.Column('error', sa.Text(), nullable=True),
+                    sa.Column('cancel_requested', sa.Boolean(), server_default='false', nullable=False),
+                    sa.Column('creator', sa.Integer(), nullable=True),
+                    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+                    sa.Column('started_at', sa.TIMESTAMP(), nullable=True),
+                    sa.Column('finished_at', sa.TIMESTAMP(), nullable=True),
+                    sa.Column('updated_at', sa.TIMESTAMP(), nullable=True),
+                    sa.ForeignKeyConstraint(['creator'], ['user.id'], onupdate='CASCADE', ondelete='SET NULL'),
+                    sa.PrimaryKeyConstraint('id')
+                    )
+    op.create_index('ix_job_status', 'job', ['status'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_job_status', table_name='job')
+    op.drop_table('job')
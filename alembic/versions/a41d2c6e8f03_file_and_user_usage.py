@@ -0,0 +1,47 @@
+"""file and user usage
+
+Revision ID: a41d2c6e8f03
+Revises: 7c3e5a1f9b20
+Create Date: 2026-10-18 11:47:05.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41d2c6e8f03'
+down_revision: Union[str, None] = '7c3e5a1f9b20'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('file',
+                    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+                    sa.Column('name', sa.String(length=255), nullable=False),
+                    sa.Column('category_id', sa.Integer(), nullable=False),
+                    sa.Column('owner', sa.Integer(), nullable=False),
+                    sa.Column('size', sa.BigInteger(), nullable=False),
+                    sa.Column('date_joined', sa.TIMESTAMP(), nullable=True),
+                    sa.ForeignKeyConstraint(['category_id'], ['category.id'], onupdate='CASCADE', ondelete='CASCADE'),
+                    sa.ForeignKeyConstraint(['owner'], ['user.id'], onupdate='CASCADE', ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('id'),
+                    sa.UniqueConstraint('category_id', 'name')
+                    )
+    op.create_index(op.f('ix_file_owner'), 'file', ['owner'], unique=False)
+    op.create_table('user_usage',
+                    sa.Column('user_id', sa.Integer(), nullable=False),
+                    sa.Column('files_count', sa.BigInteger(), server_default='0', nullable=False),
+                    sa.Column('files_size', sa.BigInteger(), server_default='0', nullable=False),
+                    sa.ForeignKeyConstraint(['user_id'], ['user.id'], onupdate='CASCADE', ondelete='CASCADE'),
+                    sa.PrimaryKeyConstraint('user_id')
+                    )
+
+
+def downgrade() -> None:
+    op.drop_table('user_usage')
+    op.drop_index(op.f('ix_file_owner'), table_name='file')
+    op.drop_table('file')
@@ -0,0 +1,37 @@
+"""file catalog
+
+Revision ID: c9b7e04d5a12
+Revises: a41d2c6e8f03
+Create Date: 2026-10-18 13:05:21.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9b7e04d5a12'
+down_revision: Union[str, None] = 'a41d2c6e8f03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('file', sa.Column('extension', sa.String(length=20), server_default='', nullable=False))
+    op.add_column('file', sa.Column('checksum', sa.String(length=64), nullable=True))
+    op.add_column('file', sa.Column('date_modified', sa.TIMESTAMP(), nullable=True))
+    op.execute("UPDATE file SET extension = substring(name from '(\\.[^.]*)$') WHERE name LIKE '%.%'")
+    op.create_index('ix_file_category_size', 'file', ['category_id', 'size', 'id'], unique=False)
+    op.create_index('ix_file_category_date_joined', 'file', ['category_id', 'date_joined', 'id'], unique=False)
+    op.create_index('ix_file_category_extension_name', 'file', ['category_id', 'extension', 'name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_file_category_extension_name', table_name='file')
+    op.drop_index('ix_file_category_date_joined', table_name='file')
+    op.drop_index('ix_file_category_size', table_name='file')
+    op.drop_column('file', 'date_modified')
+    op.drop_column('file', 'checksum')
+    op.drop_column('file', 'extension')
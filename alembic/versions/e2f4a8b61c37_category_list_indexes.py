@@ -0,0 +1,30 @@
+"""category list indexes
+
+Revision ID: e2f4a8b61c37
+Revises: c9b7e04d5a12
+Create Date: 2026-10-18 15:22:48.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2f4a8b61c37'
+down_revision: Union[str, None] = 'c9b7e04d5a12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_category_name_prefix', 'category', [sa.text('lower(name) text_pattern_ops')], unique=False)
+    op.create_index('ix_category_data_joined_id', 'category', ['data_joined', 'id'], unique=False)
+    op.create_index('ix_category_files_count_id', 'category', ['files_count', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_category_files_count_id', table_name='category')
+    op.drop_index('ix_category_data_joined_id', table_name='category')
+    op.drop_index('ix_category_name_prefix', table_name='category')
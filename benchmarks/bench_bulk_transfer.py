@@ -0,0 +1,55 @@
+# Compares the bulk transfer engine with the previous one-rename-at-a-time transfer.
+# Usage: python benchmarks/bench_bulk_transfer.py [count_files] [concurrency] [batch_size]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import aiofiles.os as a_os
+
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer
+
+
+async def serial_transfer(src_dir: str, dst_dir: str) -> None:
+    """The previous behaviour: every replace is awaited before the next one starts."""
+    async with asyncio.TaskGroup() as tg:
+        for name in await a_os.listdir(src_dir):
+            await tg.create_task(a_os.replace(os.path.join(src_dir, name), os.path.join(dst_dir, name)))
+
+
+def fill(directory: str, count_files: int) -> None:
+    for i in range(count_files):
+        open(os.path.join(directory, f'book_{i}.txt'), 'wb').close()
+
+
+async def main(count_files: int, concurrency: int, batch_size: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir, dst_dir = os.path.join(tmp, 'src'), os.path.join(tmp, 'dst')
+        os.mkdir(src_dir)
+        os.mkdir(dst_dir)
+
+        fill(src_dir, count_files)
+        start = time.perf_counter()
+        await serial_transfer(src_dir, dst_dir)
+        serial = time.perf_counter() - start
+
+        for name in os.listdir(dst_dir):
+            os.remove(os.path.join(dst_dir, name))
+        fill(src_dir, count_files)
+        transfer = BulkTransfer(concurrency=concurrency, batch_size=batch_size)
+        start = time.perf_counter()
+        progress = await transfer.run(src_dir, dst_dir)
+        bulk = time.perf_counter() - start
+
+        print(f"files: {count_files}, concurrency: {concurrency}, batch size: {batch_size}")
+        print(f"serial replace: {serial:.4f}s")
+        print(f"bulk transfer:  {bulk:.4f}s ({progress})")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    asyncio.run(main(*(args + [100_000, 4, 500][len(args):])))
@@ -0,0 +1,92 @@
+# Throughput of category reads with and without the read cache under a read-heavy load.
+# Reads and writes go to a fake database with a fixed round-trip latency; every write invalidates
+# the changed category and the list pages, as CategoryManager does.
+# Usage: python benchmarks/bench_category_cache.py [requests] [write_percent]
+
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils.cache import TTLCache
+
+CATEGORIES = 200
+LATENCY = 0.002  # seconds of one database round-trip.
+CONCURRENCY = 50
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.rows = {category_id: {'id': category_id, 'count_files': 0} for category_id in range(CATEGORIES)}
+        self.queries = 0
+
+    async def get(self, category_id: int) -> dict:
+        self.queries += 1
+        await asyncio.sleep(LATENCY)
+        return dict(self.rows[category_id])
+
+    async def list(self, page: int) -> list[dict]:
+        self.queries += 1
+        await asyncio.sleep(LATENCY)
+        return [dict(self.rows[i]) for i in range(page * 20, page * 20 + 20)]
+
+    async def add_file(self, category_id: int) -> None:
+        self.queries += 1
+        await asyncio.sleep(LATENCY)
+        self.rows[category_id]['count_files'] += 1
+
+
+async def run(requests: int, write_percent: float, cache: TTLCache) -> tuple[float, int]:
+    database = FakeDatabase()
+    rnd = random.Random(1)
+    # Skewed access: a few popular categories take most of the reads.
+    operations = [(rnd.random() * 100 < write_percent, rnd.random() < 0.2,
+                   min(int(rnd.paretovariate(1.2)) - 1, CATEGORIES - 1)) for _ in range(requests)]
+    queue = iter(operations)
+
+    async def get(category_id: int) -> dict:
+        cached = cache.get(('info', category_id))
+        if cached is not None:
+            return cached
+        version = cache.version
+        result = await database.get(category_id)
+        cache.set(('info', category_id), result, tags=[('category', category_id)], version=version)
+        return result
+
+    async def list_page(page: int) -> list[dict]:
+        cached = cache.get(('list', page))
+        if cached is not None:
+            return cached
+        version = cache.version
+        result = await database.list(page)
+        cache.set(('list', page), result, tags=['list'], version=version)
+        return result
+
+    async def worker():
+        for is_write, is_list, category_id in queue:
+            if is_write:
+                await database.add_file(category_id)
+                cache.invalidate('list', ('category', category_id))
+            elif is_list:
+                await list_page(category_id % (CATEGORIES // 20))
+            else:
+                await get(category_id)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    return requests / (time.perf_counter() - start), database.queries
+
+
+def main(requests: int, write_percent: float):
+    print(f"{requests} requests, {write_percent}% writes, {CONCURRENCY} concurrent clients, "
+          f"{LATENCY * 1000:.0f} ms per database round-trip")
+    for name, cache in (('no cache', TTLCache(0)), ('TTLCache(1024, 5 s)', TTLCache(1024, 5))):
+        throughput, queries = asyncio.run(run(requests, write_percent, cache))
+        print(f"{name:>20}: {throughput:8.0f} requests/s, {queries} database queries, {cache.stats()}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000, float(sys.argv[2]) if len(sys.argv) > 2 else 5)
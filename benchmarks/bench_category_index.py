@@ -0,0 +1,53 @@
+# Compares category lookups through the in-memory index against a root listing per call.
+# Usage: python benchmarks/bench_category_index.py [count_categories] [count_lookups]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import aiofiles.os as a_os
+
+from NEW_FileStorage.storage.storage import Storage
+
+
+async def lookup_by_listing(root: str, category: str) -> str:
+    """The previous behaviour: list the storage root and build a dictionary on every call."""
+    cats = {name: os.path.join(root, name) for name in await a_os.listdir(root)}
+    if category not in cats:
+        raise NotADirectoryError(category)
+    return cats[category]
+
+
+async def main(count_categories: int, count_lookups: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(tmp, 'STORAGE_bench')
+        for i in range(count_categories):
+            os.mkdir(os.path.join(storage.path, f'cat_{i}'))
+        names = [f'cat_{i % count_categories}' for i in range(0, count_lookups * 7919, 7919)]
+
+        start = time.perf_counter()
+        for name in names:
+            await lookup_by_listing(storage.path, name)
+        listing = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await storage.get_category_path(names[0])  # builds the index
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        for name in names:
+            await storage.get_category_path(name)
+        indexed = time.perf_counter() - start
+
+        print(f"categories: {count_categories}, lookups: {count_lookups}")
+        print(f"root listing per lookup: {listing:.4f}s ({listing / count_lookups * 1e6:.1f} us/lookup)")
+        print(f"index build:             {build:.4f}s")
+        print(f"index lookups:           {indexed:.4f}s ({indexed / count_lookups * 1e6:.2f} us/lookup)")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    asyncio.run(main(*(args + [10_000, 200][len(args):])))
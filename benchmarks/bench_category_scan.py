@@ -0,0 +1,63 @@
+# Compares the single-pass scandir listing with per-file aiofiles calls.
+# Usage: python benchmarks/bench_category_scan.py [count_files]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import aiofiles.os as a_os
+
+from NEW_FileStorage.storage.storage import Storage
+
+
+async def list_per_file(category_path: str, category: str) -> list[dict]:
+    """The previous behaviour: listdir, then isfile and getsize for every name."""
+    files = []
+    for name in await a_os.listdir(category_path):
+        file_path = os.path.join(category_path, name)
+        if await a_os.path.isfile(file_path):
+            files.append({'name': name, 'type': os.path.splitext(name)[1], 'category': category,
+                          'path': file_path, 'size': await a_os.path.getsize(file_path)})
+    return files
+
+
+async def main(count_files: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        storage = Storage(tmp, 'STORAGE_bench')
+        category_path = (await storage.create_category('books'))['books']
+        for i in range(count_files):
+            with open(os.path.join(category_path, f'book_{i}.txt'), 'wb') as f:
+                f.write(b'x' * (i % 512))
+
+        start = time.perf_counter()
+        await list_per_file(category_path, 'books')
+        per_file = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await storage.get_all_files('books')
+        scandir = time.perf_counter() - start
+
+        start = time.perf_counter()
+        await storage.size('books')
+        size = time.perf_counter() - start
+
+        start = time.perf_counter()
+        first_batch = None
+        async for _ in storage.iter_files('books', batch_size=1000):
+            if first_batch is None:
+                first_batch = time.perf_counter() - start
+        streamed = time.perf_counter() - start
+
+        print(f"files: {count_files}")
+        print(f"listdir + isfile + getsize: {per_file:.4f}s")
+        print(f"scandir get_all_files:      {scandir:.4f}s")
+        print(f"scandir size:               {size:.4f}s")
+        print(f"iter_files first batch:     {first_batch:.4f}s, total {streamed:.4f}s")
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000))
@@ -0,0 +1,50 @@
+# Latency of counting files of many categories: one category after another with two thread hops each
+# (listdir of the storage root, then listdir of the category) against the batched scan_totals_many.
+# Usage: python benchmarks/bench_category_stats.py [count_categories] [files_per_category]
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from NEW_FileStorage.storage.category_scanner import scan_totals_many
+
+
+async def count_sequential(root: str, names: list[str]) -> dict[str, int]:
+    """The previous behaviour of all_categories: count_files awaited for each category in turn."""
+    result = {}
+    for name in names:
+        categories = await asyncio.to_thread(os.listdir, root)
+        if name in categories:
+            result[name] = len(await asyncio.to_thread(os.listdir, os.path.join(root, name)))
+    return result
+
+
+async def main(count_categories: int, files_per_category: int):
+    with tempfile.TemporaryDirectory() as root:
+        names = [f'category_{i}' for i in range(count_categories)]
+        for name in names:
+            os.mkdir(os.path.join(root, name))
+            for j in range(files_per_category):
+                open(os.path.join(root, name, f'book_{j}.txt'), 'wb').close()
+
+        for _ in range(3):
+            start = time.perf_counter()
+            await count_sequential(root, names)
+            sequential = time.perf_counter() - start
+
+            timings = []
+            for concurrency in (1, 4, 8, 16):
+                start = time.perf_counter()
+                await scan_totals_many(root, names, concurrency)
+                timings.append(f"concurrency {concurrency}: {(time.perf_counter() - start) * 1000:.0f} ms")
+
+            print(f"{count_categories} categories: sequential {sequential * 1000:.0f} ms, batched " + ", ".join(timings))
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000,
+                     int(sys.argv[2]) if len(sys.argv) > 2 else 20))
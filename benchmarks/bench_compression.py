@@ -0,0 +1,63 @@
+# Disk savings against CPU cost of the compressed storage mode.
+# Usage: python benchmarks/bench_compression.py [corpus_dir]
+# corpus_dir - a directory with .txt books. Without it, a synthetic corpus with a natural word frequency
+# distribution (Russian and English words) is generated.
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from NEW_FileStorage.storage import compression
+
+WORDS = ("the of and to in a is that for it as was with be by on not he i this are or his from at which but "
+         "и в не на я быть он с что а по это она этот к но они мы как из у который то за свой весь год от так "
+         "книга глава время человек жизнь рука день дело раз слово место лицо друг глаз вопрос дом сторона").split()
+
+
+def generate_corpus(directory: str, count_books: int = 20, words_per_book: int = 200_000) -> None:
+    rnd = random.Random(1)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]  # Zipf's law
+    for i in range(count_books):
+        words = rnd.choices(WORDS, weights, k=words_per_book)
+        lines = (' '.join(words[j:j + 12]) for j in range(0, len(words), 12))
+        with open(os.path.join(directory, f'book_{i}.txt'), 'w', encoding='utf-8') as book:
+            book.write('\n'.join(lines))
+
+
+def main(corpus_dir: str | None):
+    with tempfile.TemporaryDirectory() as tmp:
+        if corpus_dir is None:
+            corpus_dir = os.path.join(tmp, 'corpus')
+            os.mkdir(corpus_dir)
+            generate_corpus(corpus_dir)
+        books = [os.path.join(corpus_dir, name) for name in os.listdir(corpus_dir) if name.endswith('.txt')]
+
+        for level in (1, compression.COMPRESSION_LEVEL, 9):
+            logical = physical = 0
+            start_cpu = time.process_time()
+            for book in books:
+                dst = os.path.join(tmp, os.path.basename(book) + compression.GZIP_SUFFIX)
+                compression.compress_file(book, dst, level)
+                logical += os.path.getsize(book)
+                physical += os.path.getsize(dst)
+            compress_cpu = time.process_time() - start_cpu
+
+            start_cpu = time.process_time()
+            for book in books:
+                with compression.open_reader(os.path.join(tmp, os.path.basename(book) + compression.GZIP_SUFFIX)) as f:
+                    while f.read(64 * 1024):
+                        pass
+            decompress_cpu = time.process_time() - start_cpu
+
+            mib = logical / 2 ** 20
+            print(f"level {level}: {mib:.1f} MiB -> {physical / 2 ** 20:.1f} MiB "
+                  f"(ratio {logical / physical:.2f}x, saved {100 - physical * 100 / logical:.0f}%), "
+                  f"compress {mib / compress_cpu:.0f} MiB/s CPU, decompress {mib / decompress_cpu:.0f} MiB/s CPU")
+
+
+if __name__ == '__main__':
+    main(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -0,0 +1,62 @@
+# Measures download throughput and server memory with many concurrent downloads.
+# Start the application first, upload a large file, then run:
+# python benchmarks/bench_download.py <url> <token> [concurrency] [server_pid]
+# Example url: http://127.0.0.1:8000/file/download/Books/big_book.txt
+
+import asyncio
+import sys
+import time
+from urllib.parse import urlsplit
+
+
+def rss_kb(pid: int) -> int:
+    """Returns the resident set size of the process in KiB (Linux only)."""
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1])
+    return 0
+
+
+async def download(url: str, token: str) -> int:
+    """Downloads the url over a fresh HTTP/1.1 connection and returns the number of body bytes."""
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    writer.write((f"GET {parts.path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+                  f"Authorization: Bearer {token}\r\nConnection: close\r\n\r\n").encode())
+    await writer.drain()
+    await reader.readuntil(b'\r\n\r\n')
+    received = 0
+    while chunk := await reader.read(256 * 1024):
+        received += len(chunk)
+    writer.close()
+    return received
+
+
+async def main(url: str, token: str, concurrency: int, pid: int | None):
+    peak_rss = 0
+
+    async def sample_rss():
+        nonlocal peak_rss
+        while True:
+            peak_rss = max(peak_rss, rss_kb(pid))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample_rss()) if pid else None
+    start = time.perf_counter()
+    sizes = await asyncio.gather(*(download(url, token) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    if sampler:
+        sampler.cancel()
+
+    total = sum(sizes)
+    print(f"downloads: {concurrency}, bytes: {total}, time: {elapsed:.3f}s")
+    print(f"throughput: {total / elapsed / 2 ** 20:.1f} MiB/s")
+    if pid:
+        print(f"server peak RSS: {peak_rss / 1024:.1f} MiB")
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1], sys.argv[2],
+                     int(sys.argv[3]) if len(sys.argv) > 3 else 100,
+                     int(sys.argv[4]) if len(sys.argv) > 4 else None))
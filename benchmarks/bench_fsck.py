@@ -0,0 +1,45 @@
+# Time of the fsck storage scan on a synthetic tree, sequential against concurrent workers.
+# Usage: python benchmarks/bench_fsck.py [count_categories] [files_per_category]
+# The database part of the check is not measured: it is one indexed query per category.
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from fsck.scanner import list_storage_dirs, scan_categories
+
+
+def make_tree(root: str, count_categories: int, files_per_category: int) -> None:
+    for i in range(count_categories):
+        category = os.path.join(root, f'category_{i}')
+        os.mkdir(category)
+        for j in range(files_per_category):
+            with open(os.path.join(category, f'book_{j}.txt'), 'wb') as file:
+                file.write(b'x' * (j % 100))
+
+
+async def scan(root: str, workers: int) -> tuple[int, float]:
+    start = time.perf_counter()
+    paths = [os.path.join(root, name) for name in list_storage_dirs(root)]
+    files = 0
+    async for _, result in scan_categories(paths, workers):
+        files += len(result)
+    return files, time.perf_counter() - start
+
+
+def main(count_categories: int, files_per_category: int):
+    with tempfile.TemporaryDirectory() as root:
+        make_tree(root, count_categories, files_per_category)
+        # Cold cache numbers need 'echo 3 > /proc/sys/vm/drop_caches' before each run.
+        for workers in (1, 4, 8, 16, 32):
+            files, elapsed = asyncio.run(scan(root, workers))
+            print(f"workers {workers:>2}: {files} files in {elapsed:.2f} s ({files / elapsed:,.0f} files/s)")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
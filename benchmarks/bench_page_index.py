@@ -0,0 +1,55 @@
+# Time to read one page of a book with the line offset index against reading the file up to the page.
+# Usage: python benchmarks/bench_page_index.py [size_mib]
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from NEW_FileStorage.storage import page_index
+
+LINES_PER_PAGE = 40
+
+
+def read_page_naive(path: str, page: int) -> bytes:
+    """Reads the file line by line up to the page, as a reader without an index has to."""
+    first = (page - 1) * LINES_PER_PAGE
+    result = []
+    with open(path, 'rb') as file:
+        for number, line in enumerate(file):
+            if number >= first + LINES_PER_PAGE:
+                break
+            if number >= first:
+                result.append(line)
+    return b''.join(result)
+
+
+def main(size_mib: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'book.txt')
+        line = 'Съешь же ещё этих мягких французских булок, да выпей чаю. The quick brown fox.\n'.encode()
+        with open(path, 'wb') as book:
+            book.write(line * (size_mib * 2 ** 20 // len(line)))
+
+        start = time.perf_counter()
+        page_index.build_index(path)
+        print(f"{size_mib} MiB book, index built in {(time.perf_counter() - start) * 1000:.0f} ms, "
+              f"index size {os.path.getsize(page_index.index_path(path)) / 2 ** 20:.1f} MiB")
+
+        _, pages = page_index.read_page(path, 1, LINES_PER_PAGE)
+        for page in (1, pages // 2, pages):
+            start = time.perf_counter()
+            for _ in range(100):
+                indexed = page_index.read_page(path, page, LINES_PER_PAGE)[0]
+            indexed_time = (time.perf_counter() - start) / 100
+            start = time.perf_counter()
+            naive = read_page_naive(path, page)
+            naive_time = time.perf_counter() - start
+            assert indexed == naive
+            print(f"page {page}/{pages}: index {indexed_time * 1e6:.0f} us, sequential read {naive_time * 1e3:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100)
@@ -0,0 +1,69 @@
+# Event loop lag under a burst of registrations, with bcrypt on the event loop and in a process pool.
+# A monitor task sleeps 1 ms in a loop and records how late it wakes up: that is how long every other
+# request waits. The pool runs the same calls as user.passwords.PasswordService (the module itself is
+# not imported, it needs the database settings of config).
+# Usage: python benchmarks/bench_password_hashing.py [registrations] [workers]
+
+import asyncio
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi_users.password import PasswordHelper
+
+TICK = 0.001
+password_helper = PasswordHelper()
+
+
+def hash_password(password: str) -> str:
+    return password_helper.hash(password)
+
+
+async def monitor(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def run(registrations: int, executor: ProcessPoolExecutor | None) -> None:
+    loop = asyncio.get_running_loop()
+
+    async def register(number: int) -> str:
+        password = f"password-{number}"
+        if executor is None:
+            return hash_password(password)
+        return await loop.run_in_executor(executor, hash_password, password)
+
+    if executor is not None:  # start the worker processes before measuring.
+        await asyncio.gather(*(register(i) for i in range(executor._max_workers)))
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    monitor_task = asyncio.create_task(monitor(lags, stop))
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await asyncio.gather(*(register(i) for i in range(registrations)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await monitor_task
+
+    lags.sort()
+    name = 'event loop' if executor is None else f"pool of {executor._max_workers}"
+    print(f"{name:>12}: {registrations} hashes in {elapsed * 1000:6.0f} ms, event loop lag "
+          f"median {statistics.median(lags) * 1000:6.1f} ms, p99 {lags[int(len(lags) * 0.99)] * 1000:6.1f} ms, "
+          f"max {lags[-1] * 1000:6.1f} ms")
+
+
+def main(registrations: int, workers: int):
+    asyncio.run(run(registrations, None))
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('forkserver')) as executor:
+        asyncio.run(run(registrations, executor))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50,
+         int(sys.argv[2]) if len(sys.argv) > 2 else max(1, (os.cpu_count() or 2) // 2))
@@ -0,0 +1,96 @@
+# Database round-trips of concurrent identical category lookups with and without request coalescing,
+# with and without the read cache. Lookups go to a fake database with a fixed round-trip latency and
+# follow the read path of CategoryManager.get_category. Checks that the counts are what coalescing promises.
+# Usage: python benchmarks/bench_single_flight.py [concurrent_requests]
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from utils.cache import TTLCache
+from utils.single_flight import SingleFlight
+
+LATENCY = 0.005  # seconds of one database round-trip.
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.queries = 0
+
+    async def get_category(self, category_id: int) -> dict:
+        self.queries += 1
+        await asyncio.sleep(LATENCY)
+        if category_id < 0:
+            raise NotADirectoryError
+        return {'id': category_id, 'count_files': 10}
+
+
+class Reader:
+    """The read path of CategoryManager.get_category with optional cache and coalescing."""
+
+    def __init__(self, cache: TTLCache, flight: SingleFlight | None):
+        self.database = FakeDatabase()
+        self.cache = cache
+        self.flight = flight
+
+    async def get_category(self, category_id: int) -> dict:
+        key = ('info', category_id)
+        result = self.cache.get(key)
+        if result is None:
+            if self.flight is None:
+                result = await self.load(key, category_id)
+            else:
+                result = await self.flight.do(key, lambda: self.load(key, category_id))
+        return dict(result)
+
+    async def load(self, key: tuple, category_id: int) -> dict:
+        version = self.cache.version
+        result = await self.database.get_category(category_id)
+        self.cache.set(key, result, tags=[('category', category_id)], version=version)
+        return result
+
+
+async def burst(reader: Reader, requests: int, category_ids: list[int]) -> float:
+    start = time.perf_counter()
+    results = await asyncio.gather(*(reader.get_category(category_ids[i % len(category_ids)])
+                                     for i in range(requests)), return_exceptions=True)
+    for result in results:
+        assert isinstance(result, (dict, NotADirectoryError)), result
+    return time.perf_counter() - start
+
+
+async def check_cancelled_leader() -> None:
+    """A waiting caller runs the lookup again when the caller that ran it is cancelled."""
+    reader = Reader(TTLCache(0), SingleFlight())
+    leader = asyncio.create_task(reader.get_category(1))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(reader.get_category(1))
+    await asyncio.sleep(0)
+    leader.cancel()
+    assert (await follower)['id'] == 1
+    assert reader.database.queries == 2
+
+
+async def main(requests: int):
+    print(f"{requests} concurrent lookups, {LATENCY * 1000:.0f} ms per database round-trip")
+    cases = [('no cache, no coalescing', TTLCache(0), None, [1], requests),
+             ('no cache, coalescing', TTLCache(0), SingleFlight(), [1], 1),
+             ('cache, no coalescing', TTLCache(1024, 5), None, [1], requests),
+             ('cache, coalescing', TTLCache(1024, 5), SingleFlight(), [1], 1),
+             ('10 categories, coalescing', TTLCache(0), SingleFlight(), list(range(10)), 10),
+             ('missing category, coalescing', TTLCache(0), SingleFlight(), [-1], 1)]
+    for name, cache, flight, category_ids, expected in cases:
+        reader = Reader(cache, flight)
+        elapsed = await burst(reader, requests, category_ids)
+        print(f"{name:>30}: {reader.database.queries:5} round-trips, {elapsed * 1000:6.1f} ms")
+        assert reader.database.queries == expected, (name, reader.database.queries, expected)
+
+    await check_cancelled_leader()
+    print("cancelled caller: the waiting caller ran the lookup again")
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500))
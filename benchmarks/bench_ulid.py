@@ -0,0 +1,63 @@
+# Stress test of the unique name allocator: coroutines, threads and forked processes generate names
+# concurrently, the benchmark checks that all of them are unique and sorted within each producer.
+# Usage: python benchmarks/bench_ulid.py [ids_per_producer] [processes] [threads]
+
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from NEW_FileStorage.storage.ulid import new_ulid
+
+
+def produce(count: int) -> list[str]:
+    ids = [new_ulid() for _ in range(count)]
+    assert ids == sorted(ids), "ids of one producer are not monotonic"
+    return ids
+
+
+async def produce_async(count: int) -> list[str]:
+    ids = []
+    for _ in range(count):
+        ids.append(new_ulid())
+        if len(ids) % 100 == 0:
+            await asyncio.sleep(0)
+    return ids
+
+
+def process_worker(args: tuple[int, int]) -> list[str]:
+    count, threads = args
+    with ThreadPoolExecutor(threads) as pool:
+        thread_ids = [i for ids in pool.map(produce, [count] * threads) for i in ids]
+
+    async def coroutines():
+        return await asyncio.gather(*(produce_async(count) for _ in range(threads)))
+
+    coroutine_ids = [i for ids in asyncio.run(coroutines()) for i in ids]
+    return thread_ids + coroutine_ids
+
+
+def main(count: int, processes: int, threads: int):
+    start = time.perf_counter()
+    produce(count)
+    single = time.perf_counter() - start
+
+    new_ulid()  # the parent state must not leak into the children.
+    start = time.perf_counter()
+    with multiprocessing.get_context('fork').Pool(processes) as pool:
+        all_ids = [i for ids in pool.map(process_worker, [(count, threads)] * processes) for i in ids]
+    elapsed = time.perf_counter() - start
+
+    print(f"single thread: {count / single:,.0f} ids/s")
+    print(f"{processes} processes x ({threads} threads + {threads} coroutines): "
+          f"{len(all_ids):,} ids in {elapsed:.3f}s, {len(all_ids) / elapsed:,.0f} ids/s")
+    print(f"duplicates: {len(all_ids) - len(set(all_ids))}")
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:4]]
+    main(*(args + [20_000, 4, 4][len(args):]))
@@ -0,0 +1,36 @@
+# Shows where read-only sessions go and measures a read on the primary and on the replica.
+# Run with two local PostgreSQL instances, e.g. a primary on 5432 and a streaming replica on 5433:
+#   DB_READ_HOST=localhost DB_READ_PORT=5433 python benchmarks/check_read_routing.py [seconds]
+# Stop the replica, pause its replay (SELECT pg_wal_replay_pause()) or stop the primary while it runs
+# to see the fallback.
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from sqlalchemy import text
+
+from database import get_async_read_session, replica_router, engine, read_engine
+
+
+async def main(seconds: int):
+    if read_engine is None:
+        sys.exit("DB_READ_HOST is not set: all sessions use the primary.")
+    print(f"primary {engine.url.render_as_string()}, replica {read_engine.url.render_as_string()}, "
+          f"maximum lag {replica_router.max_lag} s")
+    for _ in range(seconds):
+        start = time.perf_counter()
+        async for session in get_async_read_session():
+            server = await session.scalar(text("SELECT inet_server_port()"))
+        print(f"lag {replica_router.lag} s, read session on port {server}, "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms")
+        await asyncio.sleep(1)
+    await engine.dispose()
+    await read_engine.dispose()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 30))
@@ -0,0 +1,55 @@
+# Load test of an authenticated route, by default /category/info/{category}, against a running server.
+# Measures requests per second over keep-alive connections. To see the gain of the user cache run the server
+# twice, with USER_CACHE_TTL=0 and e.g. USER_CACHE_TTL=10, and compare the results.
+# Usage: python benchmarks/load_category_info.py URL TOKEN [requests] [connections]
+#   e.g. python benchmarks/load_category_info.py http://127.0.0.1:8000/category/info/1 eyJhbGciOi... 20000 50
+
+import asyncio
+import sys
+import time
+from urllib.parse import urlsplit
+
+
+async def client(host: str, port: int, request: bytes, counter: list[int], statuses: dict[int, int]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while counter[0] > 0:
+            counter[0] -= 1
+            writer.write(request)
+            status_line = await reader.readline()
+            status = int(status_line.split()[1])
+            length = 0
+            while (line := await reader.readline()) not in (b'\r\n', b''):
+                name, _, value = line.partition(b':')
+                if name.strip().lower() == b'content-length':
+                    length = int(value)
+            await reader.readexactly(length)
+            statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def main(url: str, token: str, requests: int, connections: int) -> None:
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else '')
+    request = (f"GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\nAuthorization: Bearer {token}\r\n"
+               f"Connection: keep-alive\r\n\r\n").encode()
+    statuses: dict[int, int] = {}
+
+    # Warm up the connection pools of the server.
+    await client(parts.hostname, parts.port or 80, request, [connections], {})
+
+    counter = [requests]
+    start = time.perf_counter()
+    await asyncio.gather(*(client(parts.hostname, parts.port or 80, request, counter, statuses)
+                           for _ in range(connections)))
+    elapsed = time.perf_counter() - start
+    print(f"{requests} requests over {connections} connections in {elapsed:.2f} s: "
+          f"{requests / elapsed:.0f} requests/s, statuses {statuses}")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3:
+        sys.exit("Usage: python benchmarks/load_category_info.py URL TOKEN [requests] [connections]")
+    asyncio.run(main(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else 20000,
+                     int(sys.argv[4]) if len(sys.argv) > 4 else 50))
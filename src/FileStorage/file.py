@@ -1,10 +1,21 @@
+import asyncio
+import hashlib
 import os.path
-from datetime import datetime
+import stat
+import uuid
+from typing import AsyncIterator
+
+import aiofiles
 import aiofiles.os as a_os
 import aioshutil as a_shutil
 
 from FileStorage.storage import Storage
 from FileStorage.сategory import CategoryManager
+from NEW_FileStorage.storage import page_index
+from NEW_FileStorage.storage.ulid import new_ulid
+
+# Name of a stored file whose original name consists only of dots.
+DEFAULT_FILE_NAME = 'file'
 
 
 class FileManager(CategoryManager):
@@ -48,10 +59,9 @@ class FileManager(CategoryManager):
         await self.__validate_ext(file_info.get('ext'))  # Is it permissible to add a file of this type.
 
         # Adding unique literals from the current date and time to the file name.
+        name = self.__visible_name(file_info.get('name'))
         if add_unique_name:
-            name = await self.__get_unique_name(file_info.get('name'))
-        else:
-            name = file_info.get('name')
+            name = await self.__get_unique_name(name)
 
         src = file_path  # The starting point of the file.
         dst = os.path.join(category_path, name + file_info.get('ext'))  # File Endpoint.
@@ -64,11 +74,115 @@ class FileManager(CategoryManager):
 
         return await self.__parse_file_info(dst)
 
-    async def get_file(self):
-        pass
+    async def add_stream(self, chunks: AsyncIterator[bytes], filename: str, category: str,
+                         max_size: int | None = None) -> dict:
+        """
+        Writes a stream of bytes to a new file in the category. Only one chunk is kept in memory.
+        The data is written to a hidden temporary file in the category directory, which is renamed
+        to a unique name when the stream ends.
+        :param chunks: Asynchronous iterator over the file content.
+        :param filename: Original file name. Only the base name is used.
+        :param category: The name of the category to which you want to add the file.
+        :param max_size: Maximum file size in bytes. None - no limit.
+        :return: Dictionary with data about the added file. The 'checksum' key holds the SHA-256 of the content,
+                 computed while the stream is written.
+        :raises NotADirectoryError: If category not found.
+        :raises TypeError: If working with a file of this type is not allowed.
+        :raises ValueError: If the file is larger than max_size. Nothing is left on disk.
+        """
+        category_path = await self.get_category_path(category)
+        name, ext = os.path.splitext(os.path.basename(filename))
+        await self.__validate_ext(ext)
+        name = self.__visible_name(name)
+
+        tmp_path = os.path.join(category_path, f'.{uuid.uuid4().hex}.part')
+        size = 0
+        digest = hashlib.sha256()
+        try:
+            async with aiofiles.open(tmp_path, 'wb') as file:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if max_size is not None and size > max_size:
+                        raise ValueError(f"File {filename} is larger than {max_size} bytes.")
+                    digest.update(chunk)
+                    await file.write(chunk)
+
+            dst = os.path.join(category_path, await self.__get_unique_name(name) + ext)
+            await a_os.rename(tmp_path, dst)
+        except BaseException:
+            try:
+                await a_os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        file_info = await self.__parse_file_info(dst)
+        file_info['checksum'] = digest.hexdigest()
+        return file_info
+
+    async def get_file(self, category: str, file: str) -> dict:
+        """
+        Returns information about a file stored in the category, including its stat data.
+        :param category: Category name.
+        :param file: File name with extension.
+        :return: A dictionary with data about the file. The 'stat' key holds os.stat_result.
+        :raises NotADirectoryError: If category not found.
+        :raises FileNotFoundError: If the file is not found.
+        """
+        category_path = await self.get_category_path(category)
+        if os.path.basename(file) != file or file.startswith('.'):
+            raise FileNotFoundError(f"File {file} not found")
 
-    async def delete_file(self):
-        pass
+        file_path = os.path.join(category_path, file)
+        stat_result = await a_os.stat(file_path)
+        if not stat.S_ISREG(stat_result.st_mode):
+            raise FileNotFoundError(f"File {file} not found")
+
+        name, ext = os.path.splitext(file)
+        return {
+            'full_path': file_path,
+            'path_folder': category_path,
+            'file': file,
+            'name': name,
+            'ext': ext,
+            'size': stat_result.st_size,
+            'stat': stat_result,
+        }
+
+    async def read_page(self, category: str, file: str, page: int, lines_per_page: int) -> tuple[bytes, int]:
+        """
+        Reads one page of a text file. The line offset index of the file is built on first read
+        and rebuilt when the file changes, then any page is read with one mmap slice.
+        :param category: Category name.
+        :param file: File name with extension.
+        :param page: Page number, starting from 1.
+        :param lines_per_page: Number of lines on a page.
+        :return: Page content and the total number of pages.
+        :raises NotADirectoryError: If category not found.
+        :raises FileNotFoundError: If the file is not found.
+        :raises TypeError: If the file is not a text file.
+        :raises IndexError: If the page does not exist.
+        """
+        file_info = await self.get_file(category, file)
+        if file_info['ext'] != '.txt':
+            raise TypeError(f"{file} is not a text file.")
+        return await asyncio.to_thread(page_index.read_page, file_info['full_path'], page, lines_per_page)
+
+    async def delete_file(self, category: str, file: str) -> None:
+        """
+        Deletes a file of the category together with its page index.
+        :param category: Category name.
+        :param file: File name with extension.
+        :return: None.
+        :raises NotADirectoryError: If category not found.
+        :raises FileNotFoundError: If the file is not found.
+        """
+        file_info = await self.get_file(category, file)
+        await a_os.remove(file_info['full_path'])
+        try:
+            await a_os.remove(page_index.index_path(file_info['full_path']))
+        except FileNotFoundError:
+            pass
 
     async def __parse_file_info(self, file_path: str) -> dict:
         """
@@ -118,15 +232,18 @@ class FileManager(CategoryManager):
         if not await self.__check_ext(ext):
             raise TypeError(f"File with the extension '{ext}' is not allowed")
 
-    @classmethod
-    async def __get_unique_name(cls, name: str) -> str:
+    @staticmethod
+    def __visible_name(name: str) -> str:
         """
-        Generates a unique string based on the submitted string with the addition of the current date and time
-        string without delimiters.
+        Removes leading dots from the file name: names starting with a dot are hidden service files
+        of the storage, skipped by listings and scans.
         """
-        return name + '_' + await cls.__get_datetime_now()
+        return name.lstrip('.') or DEFAULT_FILE_NAME
 
     @classmethod
-    async def __get_datetime_now(cls) -> str:
-        """Returns the current date and time as a string of numbers with no delimiters."""
-        return datetime.now().strftime('%d%m%Y%H%M%S')
+    async def __get_unique_name(cls, name: str) -> str:
+        """
+        Generates a unique string based on the submitted string with the addition of a ULID:
+        unique across coroutines and processes and sortable by creation time.
+        """
+        return name + '_' + new_ulid()
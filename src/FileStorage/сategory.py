@@ -6,6 +6,8 @@ import aioshutil as a_shutil
 from asyncstdlib import any_iter
 
 from FileStorage.storage import Storage
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer
+from NEW_FileStorage.storage.category_scanner import scan_totals, scan_totals_many
 
 
 class CategoryManager:
@@ -19,6 +21,7 @@ class CategoryManager:
             self.storage = storage
         else:
             raise TypeError(f"{storage} invalid type.")
+        self.bulk_transfer = BulkTransfer()
 
     @property
     async def categories(self):
@@ -116,14 +119,16 @@ class CategoryManager:
             case _:
                 raise ValueError(f"Incorrect {mode}")
 
-    async def move_all_files(self, old_category: str, new_category: str) -> str:
+    async def move_all_files(self, old_category: str, new_category: str, transfer: BulkTransfer | None = None) -> str:
         """
-        Moves all files from the old category to the new category.
+        Moves all stored files from the old category to the new category. Hidden service files stay.
         :param old_category: A category with files to move.
         :param new_category: The category to which you want to move files.
+        :param transfer: Transfer engine. By default, the manager engine 'bulk_transfer'.
         :return: Absolute path to the category to which the files were moved.
         :raises NotADirectoryError: If category does not exist.
         :raises IsADirectoryError: If old_category is empty.
+        :raises TransferError: If some files were not moved. Calling the method again moves the rest.
         """
 
         cats = await self.all_categories()
@@ -132,22 +137,35 @@ class CategoryManager:
         if new_category not in cats:
             raise NotADirectoryError(f"Category {new_category} is not empty.")
 
-        files_list = await a_os.listdir(cats[old_category])
+        # Hidden entries are service files: temporary files of uploads in progress and page index sidecars.
+        files_list = [name for name in await a_os.listdir(cats[old_category]) if not name.startswith('.')]
         if len(files_list) == 0:
             raise IsADirectoryError(f"Category {old_category} is empty")
-        files_list = any_iter(files_list)
-
-        async with asyncio.TaskGroup() as tg:
-
-            async for file in files_list:
-                src_file = os.path.join(cats[old_category], file)
-                dst_file = os.path.join(cats[new_category], file)
-                await tg.create_task(a_os.replace(src_file, dst_file))
 
+        await (transfer or self.bulk_transfer).run(cats[old_category], cats[new_category], files_list)
         return cats[new_category]
 
     async def count_files(self, category: str) -> int:
-        """Returns the number of files in the category. """
+        """Returns the number of files in the category. Hidden service files are not counted."""
         cat_path = await self.get_category_path(category)
-        files = await a_os.listdir(cat_path)
+        files = [name for name in await a_os.listdir(cat_path) if not name.startswith('.')]
         return len(files)
+
+    async def category_stats(self, category: str) -> tuple[int, int]:
+        """
+        Returns the number of files in the category and their total size in bytes.
+        The directory is read with a single scandir pass in a worker thread.
+        :raise NotADirectoryError: If category not found.
+        """
+        cat_path = await self.get_category_path(category)
+        return await asyncio.to_thread(scan_totals, cat_path)
+
+    async def categories_stats(self, categories: list[str], concurrency: int = 8) -> dict[str, tuple[int, int] | None]:
+        """
+        Returns the number of files and their total size for many categories at once.
+        The storage directory is listed once and the categories are read in 'concurrency' worker threads.
+        :param categories: Category names.
+        :param concurrency: Maximum number of worker threads.
+        :return: Dictionary {category: (count, size)}. None for categories that are not found.
+        """
+        return await scan_totals_many(self.storage.path, categories, concurrency)
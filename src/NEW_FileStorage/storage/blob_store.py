@@ -0,0 +1,134 @@
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+from typing import Iterator
+
+
+# Хранилище содержимого файлов, адресуемое хешем (content-addressed).
+# Каждое уникальное содержимое хранится один раз: .blobs/ab/cd/<sha256>.
+# Файлы в категориях - жесткие ссылки на блоб, поэтому счетчик ссылок - это st_nlink самого блоба:
+# блоб без ссылок из категорий имеет st_nlink == 1 и может быть удален.
+# Связывание, удаление ссылок и сборка мусора выполняются под файловой блокировкой .blobs/.lock,
+# общей для потоков и процессов: иначе блоб может быть удален между проверкой st_nlink и созданием ссылки.
+# Копирование и хеширование содержимого выполняются вне блокировки.
+# Все функции блокирующие и вызываются в рабочем потоке.
+
+BLOBS_DIR_NAME = '.blobs'
+LOCK_FILE_NAME = '.lock'
+CHUNK_SIZE = 1024 * 1024
+
+
+def blob_path(blobs_dir: str, digest: str) -> str:
+    """Returns the path of the blob with the given sha256 hex digest."""
+    return os.path.join(blobs_dir, digest[:2], digest[2:4], digest)
+
+
+def file_digest(path: str) -> str:
+    """Returns the sha256 hex digest of the file content."""
+    with open(path, 'rb') as file:
+        return hashlib.file_digest(file, 'sha256').hexdigest()
+
+
+@contextmanager
+def locked(blobs_dir: str) -> Iterator[None]:
+    """Holds the exclusive lock of the blob store. The lock is released when the lock file is closed."""
+    os.makedirs(blobs_dir, exist_ok=True)
+    with open(os.path.join(blobs_dir, LOCK_FILE_NAME), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def copy_to_temp(blobs_dir: str, src_path: str) -> tuple[str, str]:
+    """
+    Copies the file into a temporary file of the blob store, hashing it in the same pass.
+    :param blobs_dir: Blob store directory.
+    :param src_path: Path to the source file.
+    :return: (path to the temporary file, sha256 hex digest of the content).
+    """
+    os.makedirs(blobs_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp_path = tempfile.mkstemp(dir=blobs_dir, prefix='.', suffix='.part')
+    try:
+        with open(src_path, 'rb') as src, os.fdopen(fd, 'wb') as dst:
+            while chunk := src.read(CHUNK_SIZE):
+                digest.update(chunk)
+                dst.write(chunk)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path, digest.hexdigest()
+
+
+def add_entry(blobs_dir: str, src_path: str, dst_path: str) -> str:
+    """
+    Stores the file content in the blob store and creates a category entry for it.
+    If a blob with the same content already exists, the copy is discarded.
+    Falls back to a copy if the blob has reached the file system limit of hard links.
+    :param blobs_dir: Blob store directory.
+    :param src_path: Path to the source file.
+    :param dst_path: Path of the new category entry.
+    :return: Path to the blob.
+    """
+    tmp_path, digest = copy_to_temp(blobs_dir, src_path)
+    try:
+        path = blob_path(blobs_dir, digest)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # The blob found or created here cannot be collected before the entry links it.
+        with locked(blobs_dir):
+            try:
+                os.link(tmp_path, path)
+            except FileExistsError:
+                pass
+            try:
+                os.link(path, dst_path)
+                linked = True
+            except FileExistsError:
+                raise
+            except OSError:
+                linked = False
+        if not linked:
+            shutil.copy2(tmp_path, dst_path)
+        return path
+    finally:
+        os.remove(tmp_path)
+
+
+def unlink_entry(blobs_dir: str, entry_path: str) -> None:
+    """
+    Deletes a category entry and its blob if it was the last reference to it.
+    Only an entry that may be the last reference is hashed to find the blob.
+    """
+    # Hashed before taking the lock, so other entries are not blocked while the file is read.
+    digest = file_digest(entry_path) if os.stat(entry_path).st_nlink == 2 else None
+    with locked(blobs_dir):
+        last_reference = os.stat(entry_path).st_nlink == 2
+        if last_reference and digest is None:  # other references were deleted since the first check.
+            digest = file_digest(entry_path)
+        os.remove(entry_path)
+        if last_reference:
+            path = blob_path(blobs_dir, digest)
+            try:
+                if os.stat(path).st_nlink == 1:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def collect_garbage(blobs_dir: str) -> int:
+    """
+    Deletes blobs that are no longer referenced by any category entry.
+    Used after bulk deletions, such as deleting a whole category.
+    :return: Number of deleted blobs.
+    """
+    deleted = 0
+    with locked(blobs_dir):
+        for root, _, files in os.walk(blobs_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                if not name.startswith('.') and os.stat(path).st_nlink == 1:
+                    os.remove(path)
+                    deleted += 1
+    return deleted
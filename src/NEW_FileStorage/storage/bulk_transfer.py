@@ -0,0 +1,118 @@
+import asyncio
+import os
+from typing import Callable
+
+
+# Движок массового перемещения файлов между директориями.
+# Имена файлов делятся на пакеты, каждый пакет переименовывается одним вызовом в рабочем потоке.
+# Количество одновременно работающих потоков ограничено. Ошибки отдельных файлов не прерывают перенос:
+# они собираются в TransferProgress, а повторный запуск переносит только то, что осталось в источнике.
+
+class TransferProgress:
+    """State of a bulk transfer."""
+
+    def __init__(self, total: int):
+        self.total = total
+        self.moved = 0
+        self.failed: dict[str, OSError] = {}
+
+    def __repr__(self):
+        return f"TransferProgress: moved {self.moved} of {self.total}. Failed: {len(self.failed)}"
+
+    @property
+    def done(self) -> bool:
+        return self.moved == self.total
+
+
+class TransferError(OSError):
+    """Raised when some files could not be moved. The 'progress' attribute keeps the failed names."""
+
+    def __init__(self, progress: TransferProgress):
+        super().__init__(f"{len(progress.failed)} of {progress.total} files were not moved.")
+        self.progress = progress
+
+
+def _move_batch(src_dir: str, dst_dir: str, names: list[str],
+                destination: Callable[[str], str] | None = None) -> dict[str, OSError]:
+    """
+    Renames a batch of files. Blocking, runs in a worker thread. Returns the errors by file name.
+    Missing parent directories of the destination are created when a destination mapping is given.
+    """
+    failed = {}
+    for name in names:
+        src = os.path.join(src_dir, name)
+        dst = os.path.join(dst_dir, destination(name) if destination else name)
+        try:
+            try:
+                os.replace(src, dst)
+            except FileNotFoundError:
+                if destination is None or not os.path.exists(src):
+                    raise
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+                os.replace(src, dst)
+        except OSError as ex:
+            failed[name] = ex
+    return failed
+
+
+class BulkTransfer:
+    """Moves many files between directories with bounded concurrency."""
+
+    def __init__(self, concurrency: int = 4, batch_size: int = 500,
+                 on_progress: Callable[[TransferProgress], None] | None = None):
+        """
+        :param concurrency: Maximum number of batches moved at the same time.
+        :param batch_size: Number of files renamed in one worker thread call.
+        :param on_progress: Called after each batch with the current progress.
+        :raises ValueError: If concurrency or batch_size is less than 1.
+        """
+        if concurrency < 1 or batch_size < 1:
+            raise ValueError("concurrency and batch_size must be greater than 0.")
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+
+    async def run(self, src_dir: str, dst_dir: str, names: list[str] | None = None,
+                  destination: Callable[[str], str] | None = None) -> TransferProgress:
+        """
+        Moves files from src_dir to dst_dir. Files with the same name in dst_dir are replaced.
+        After a partial failure, call it again: moved files are no longer in src_dir, so only the rest is moved.
+        :param src_dir: Source directory.
+        :param dst_dir: Destination directory.
+        :param names: Names of files to move, may be paths relative to src_dir. By default, everything in src_dir.
+        :param destination: Maps a name to the path relative to dst_dir. By default, the name is kept.
+        :return: Transfer progress.
+        :raises TransferError: If some files were not moved.
+        """
+        if names is None:
+            names = await asyncio.to_thread(os.listdir, src_dir)
+        progress = TransferProgress(len(names))
+
+        queue: asyncio.Queue[list[str]] = asyncio.Queue()
+        for i in range(0, len(names), self.batch_size):
+            queue.put_nowait(names[i:i + self.batch_size])
+
+        async def worker():
+            while not queue.empty():
+                batch = queue.get_nowait()
+                failed = await asyncio.to_thread(_move_batch, src_dir, dst_dir, batch, destination)
+                progress.moved += len(batch) - len(failed)
+                progress.failed.update(failed)
+                if self.on_progress is not None:
+                    self.on_progress(progress)
+
+        async with asyncio.TaskGroup() as tg:
+            for _ in range(min(self.concurrency, queue.qsize())):
+                tg.create_task(worker())
+
+        if progress.failed:
+            raise TransferError(progress)
+        return progress
+
+    async def resume(self, src_dir: str, dst_dir: str, progress: TransferProgress,
+                     destination: Callable[[str], str] | None = None) -> TransferProgress:
+        """
+        Retries only the files that failed in a previous run.
+        :raises TransferError: If some files were not moved again.
+        """
+        return await self.run(src_dir, dst_dir, list(progress.failed), destination)
@@ -0,0 +1,98 @@
+import asyncio
+import os
+
+from watchfiles import Change, awatch
+
+
+# Индекс категорий хранилища в памяти. Строится один раз одним проходом os.scandir по корню хранилища,
+# далее поддерживается в актуальном состоянии мутациями самого хранилища и, по желанию, наблюдателем watchfiles
+# за корневой директорией. Поиск категории - обращение к словарю без системных вызовов.
+
+class CategoryIndex:
+    """In-memory index of the storage categories: category name -> absolute path."""
+
+    def __init__(self, root: str):
+        """
+        :param root: Absolute path to the storage directory.
+        """
+        self.__root = root
+        self.__categories: dict[str, str] | None = None
+        self.__lock = asyncio.Lock()
+        self.__watcher: asyncio.Task | None = None
+        self.__stop_event: asyncio.Event | None = None
+
+    @property
+    def watching(self) -> bool:
+        return self.__watcher is not None and not self.__watcher.done()
+
+    async def get(self) -> dict[str, str]:
+        """
+        Returns the index. The first call scans the storage directory, the next ones do not touch the disk.
+        :return: Dictionary {category name: category absolute path}.
+        """
+        if self.__categories is None:
+            async with self.__lock:
+                if self.__categories is None:
+                    self.__categories = await asyncio.to_thread(self.__scan)
+        return self.__categories
+
+    def add(self, name: str, path: str) -> None:
+        """Adds a category to the index if the index is already built."""
+        if self.__categories is not None:
+            self.__categories[name] = path
+
+    def discard(self, name: str) -> None:
+        """Removes a category from the index if it is present."""
+        if self.__categories is not None:
+            self.__categories.pop(name, None)
+
+    def invalidate(self) -> None:
+        """Drops the index. It will be rebuilt on the next call to 'get'."""
+        self.__categories = None
+
+    async def watch(self) -> None:
+        """
+        Starts a background task that applies changes of the storage directory made outside this process.
+        Repeated calls do nothing while the watcher is running.
+        """
+        if self.watching:
+            return
+        await self.get()
+        self.__stop_event = asyncio.Event()
+        self.__watcher = asyncio.create_task(self.__watch(self.__stop_event))
+
+    async def stop(self) -> None:
+        """Stops the background watcher if it is running."""
+        if self.__watcher is None:
+            return
+        self.__stop_event.set()
+        try:
+            await self.__watcher
+        finally:
+            self.__watcher = None
+            self.__stop_event = None
+
+    async def __watch(self, stop_event: asyncio.Event) -> None:
+        try:
+            async for changes in awatch(self.__root, stop_event=stop_event, recursive=False):
+                self.__apply(changes)
+        except Exception:
+            # Changes can no longer be tracked, the index will be rebuilt from disk on the next call.
+            self.invalidate()
+
+    def __apply(self, changes: set[tuple[Change, str]]) -> None:
+        """Applies a batch of file system events to the index."""
+        for change, path in changes:
+            if os.path.dirname(path) != self.__root:
+                continue
+            name = os.path.basename(path)
+            if change == Change.deleted:
+                self.discard(name)
+            elif change == Change.added and not name.startswith('.') and os.path.isdir(path):
+                self.add(name, path)
+
+    def __scan(self) -> dict[str, str]:
+        """Lists the storage directory once. Hidden directories are not categories."""
+        with os.scandir(self.__root) as entries:
+            return {entry.name: entry.path for entry in entries
+                    if not entry.name.startswith('.') and entry.is_dir()}
@@ -0,0 +1,174 @@
+import asyncio
+import os
+from typing import AsyncIterator, Iterable, Iterator
+
+from NEW_FileStorage.storage import compression
+from NEW_FileStorage.storage.sharding import is_shard_dir
+
+
+# Листинг файлов категории одним проходом os.scandir в рабочем потоке.
+# Данные stat берутся из DirEntry, поэтому на категорию приходится один переход в пул потоков,
+# а не по два на каждый файл (isfile + getsize).
+# Скрытые файлы (имя начинается с точки) - служебные: недокачанные загрузки, индексы. В листинги они не попадают.
+# В раскладке 'sharded' обходятся также поддиректории ab/cd категории.
+# Сжатые файлы показываются под логическим именем, 'size' - размер на диске.
+
+def is_stored_file(entry: os.DirEntry) -> bool:
+    """Checks that the directory entry is a stored file and not a hidden service file."""
+    return not entry.name.startswith('.') and entry.is_file()
+
+
+def iter_entries(category_path: str, sharded: bool = False) -> Iterator[os.DirEntry]:
+    """Yields directory entries of all files of the category. Blocking, call it in a worker thread."""
+    with os.scandir(category_path) as entries:
+        for entry in entries:
+            if is_stored_file(entry):
+                yield entry
+            elif sharded and is_shard_dir(entry):
+                with os.scandir(entry.path) as shards:
+                    for shard in shards:
+                        if is_shard_dir(shard):
+                            with os.scandir(shard.path) as files:
+                                yield from filter(is_stored_file, files)
+
+
+def file_record(entry: os.DirEntry, category: str) -> dict[str, str | int]:
+    """Builds the file description returned by the storage listings."""
+    name = compression.logical_name(entry.name)
+    return {
+        'name': name,
+        'type': os.path.splitext(name)[1],
+        'category': category,
+        'path': entry.path,
+        'size': entry.stat().st_size,
+        'compressed': compression.is_compressed(entry.name),
+    }
+
+
+def scan_files(category_path: str, category: str, sharded: bool = False) -> list[dict[str, str | int]]:
+    """
+    Returns descriptions of all files in the category directory. Blocking, call it in a worker thread.
+    :param category_path: Absolute path to the category.
+    :param category: Category name.
+    :param sharded: Whether the category uses the sharded layout.
+    :return: List of file descriptions.
+    """
+    return [file_record(entry, category) for entry in iter_entries(category_path, sharded)]
+
+
+def scan_totals(category_path: str, sharded: bool = False) -> tuple[int, int]:
+    """
+    Returns the number of files in the category directory and their total size in bytes.
+    Blocking, call it in a worker thread.
+    """
+    count = size = 0
+    for entry in iter_entries(category_path, sharded):
+        count += 1
+        size += entry.stat().st_size
+    return count, size
+
+
+def scan_sizes(category_path: str, sharded: bool = False) -> tuple[int, int]:
+    """
+    Returns the logical size (after decompression) and the physical size on disk of the category files.
+    Blocking, call it in a worker thread.
+    """
+    logical = physical = 0
+    for entry in iter_entries(category_path, sharded):
+        size = entry.stat().st_size
+        physical += size
+        logical += compression.logical_size(entry.path, size)
+    return logical, physical
+
+
+def scan_count(category_path: str, sharded: bool = False) -> int:
+    """Returns the number of files in the category without reading their stat data. Blocking."""
+    return sum(1 for _ in iter_entries(category_path, sharded))
+
+
+def scan_relpaths(category_path: str, sharded: bool = False) -> list[str]:
+    """Returns paths of all files of the category relative to the category directory. Blocking."""
+    return [os.path.relpath(entry.path, category_path) for entry in iter_entries(category_path, sharded)]
+
+
+def _scan_totals_many(root_path: str, names: list[str],
+                      sharded: bool) -> list[tuple[str, tuple[int, int] | None]]:
+    """
+    Returns totals of several categories in one worker thread call, see scan_totals.
+    None for a category whose directory has been removed meanwhile.
+    """
+    result = []
+    for name in names:
+        try:
+            result.append((name, scan_totals(os.path.join(root_path, name), sharded)))
+        except (FileNotFoundError, NotADirectoryError):
+            result.append((name, None))
+    return result
+
+
+async def scan_totals_many(root_path: str, categories: Iterable[str], concurrency: int = 8,
+                           sharded: bool = False) -> dict[str, tuple[int, int] | None]:
+    """
+    Returns the number of files and their total size for many categories.
+    The storage root is listed once, then the categories are split between 'concurrency'
+    worker thread calls, so the whole batch costs 1 + concurrency thread hops instead of two per category.
+    :param root_path: Absolute path to the storage root.
+    :param categories: Category names.
+    :param concurrency: Maximum number of worker threads reading directories at the same time.
+    :param sharded: Whether the categories use the sharded layout.
+    :return: Dictionary {category: (count, size)}. None for categories without a directory.
+    :raises ValueError: If concurrency is less than 1.
+    """
+    if concurrency < 1:
+        raise ValueError("concurrency must be greater than 0.")
+
+    def list_dirs() -> set[str]:
+        with os.scandir(root_path) as entries:
+            return {entry.name for entry in entries if entry.is_dir()}
+
+    categories = list(dict.fromkeys(categories))
+    existing = await asyncio.to_thread(list_dirs)
+    names = [name for name in categories if name in existing]
+    chunks = [names[i::concurrency] for i in range(min(concurrency, len(names)))]
+    scanned = await asyncio.gather(*(asyncio.to_thread(_scan_totals_many, root_path, chunk, sharded)
+                                     for chunk in chunks))
+
+    result: dict[str, tuple[int, int] | None] = dict.fromkeys(categories)
+    for chunk in scanned:
+        result.update(chunk)
+    return result
+
+
+def _read_batch(entries: Iterator[os.DirEntry], category: str, batch_size: int) -> list[dict[str, str | int]]:
+    """Reads up to batch_size files from an open iterator of entries."""
+    batch = []
+    for entry in entries:
+        batch.append(file_record(entry, category))
+        if len(batch) == batch_size:
+            break
+    return batch
+
+
+async def iter_files(category_path: str, category: str, batch_size: int = 1000,
+                     sharded: bool = False) -> AsyncIterator[list[dict[str, str | int]]]:
+    """
+    Streams descriptions of the category files in batches while the directory is still being read.
+    Each batch costs one worker thread call.
+    :param category_path: Absolute path to the category.
+    :param category: Category name.
+    :param batch_size: Maximum number of files in a batch.
+    :param sharded: Whether the category uses the sharded layout.
+    :raises ValueError: If batch_size is less than 1.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be greater than 0.")
+
+    entries = iter_entries(category_path, sharded)
+    try:
+        while batch := await asyncio.to_thread(_read_batch, entries, category, batch_size):
+            yield batch
+    finally:
+        try:
+            entries.close()
+        except ValueError:  # the worker thread of a cancelled batch is still reading.
+            pass
@@ -0,0 +1,53 @@
+import gzip
+import os
+import shutil
+
+# Сжатие хранимых файлов. Сжатый файл хранится рядом с логическим именем с суффиксом .gz: book.txt -> book.txt.gz.
+# Используется gzip из стандартной библиотеки (zstd появится в ней только в Python 3.14).
+# Все функции блокирующие и вызываются в рабочем потоке.
+
+GZIP_SUFFIX = '.gz'
+COMPRESSION_LEVEL = 6
+CHUNK_SIZE = 1024 * 1024
+
+
+def is_compressed(path: str) -> bool:
+    return path.endswith(GZIP_SUFFIX)
+
+
+def logical_name(name: str) -> str:
+    """Returns the file name as the user sees it, without the compression suffix."""
+    return name.removesuffix(GZIP_SUFFIX)
+
+
+def compress_file(src_path: str, dst_path: str, level: int = COMPRESSION_LEVEL) -> None:
+    """
+    Compresses the file to dst_path. The data is written to a hidden temporary file
+    which is renamed when compression is finished.
+    """
+    tmp_path = os.path.join(os.path.dirname(dst_path), f'.{os.path.basename(dst_path)}.part')
+    try:
+        with open(src_path, 'rb') as src, gzip.open(tmp_path, 'wb', compresslevel=level) as dst:
+            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+        os.replace(tmp_path, dst_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def open_reader(path: str):
+    """Opens a stored file for reading, decompressing it if needed."""
+    return gzip.open(path, 'rb') if is_compressed(path) else open(path, 'rb')
+
+
+def logical_size(path: str, physical_size: int) -> int:
+    """
+    Returns the size of the file content after decompression. For gzip files it is read from the
+    last 4 bytes of the file (ISIZE), which keeps the size modulo 4 GiB.
+    """
+    if not is_compressed(path):
+        return physical_size
+    with open(path, 'rb') as file:
+        file.seek(-4, os.SEEK_END)
+        return int.from_bytes(file.read(4), 'little')
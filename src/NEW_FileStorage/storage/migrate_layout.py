@@ -0,0 +1,74 @@
+# Перенос плоских категорий в шардированную раскладку.
+# Миграция выполняется "на лету": файлы переименовываются атомарно внутри категории, а хранилище с
+# layout='sharded' видит файлы и в корне категории, и в поддиректориях, поэтому приложение продолжает работать.
+# Сначала переключите приложение на layout='sharded', затем запустите:
+# python -m NEW_FileStorage.storage.migrate_layout <storage_path> <storage_name> [category ...]
+
+import argparse
+import asyncio
+import os
+
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer, TransferProgress
+from NEW_FileStorage.storage.category_scanner import scan_relpaths
+from NEW_FileStorage.storage.sharding import shard_relpath
+from NEW_FileStorage.storage.storage_categories import StorageCategories
+
+
+async def migrate_category(category_path: str, transfer: BulkTransfer | None = None) -> TransferProgress:
+    """
+    Moves the files from the root of the category into the shard directories.
+    Can be run again after a failure, only files left in the root are moved.
+    :param category_path: Absolute path to the category.
+    :param transfer: Transfer engine. By default, BulkTransfer with default settings.
+    :return: Transfer progress.
+    :raises TransferError: If some files were not moved.
+    """
+    names = await asyncio.to_thread(scan_relpaths, category_path, False)
+    if not names:
+        return TransferProgress(0)
+    return await (transfer or BulkTransfer()).run(category_path, category_path, names, shard_relpath)
+
+
+async def migrate_storage(storage: StorageCategories, categories: list[str] | None = None,
+                          transfer: BulkTransfer | None = None) -> dict[str, TransferProgress]:
+    """
+    Migrates categories of the storage to the sharded layout, one category after another.
+    :param storage: Storage opened with layout='sharded'.
+    :param categories: Names of categories to migrate. By default, all categories.
+    :param transfer: Transfer engine. By default, the storage engine 'bulk_transfer'.
+    :return: Transfer progress by category name.
+    :raises ValueError: If the storage is not opened with layout='sharded'.
+    :raises NotADirectoryError: If a category is not found.
+    """
+    if not storage.sharded:
+        raise ValueError("The storage must be opened with layout='sharded'.")
+    if categories is None:
+        categories = list(await storage.categories)
+
+    result = {}
+    for category in categories:
+        category_path = await storage.get_category_path(category)
+        result[category] = await migrate_category(category_path, transfer or storage.bulk_transfer)
+    return result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Migrate flat storage categories to the sharded layout.")
+    parser.add_argument('storage_path', help="Directory that contains the storage.")
+    parser.add_argument('storage_name', help="Storage directory name.")
+    parser.add_argument('categories', nargs='*', help="Categories to migrate. By default, all of them.")
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    def report(progress: TransferProgress):
+        print(f"\r{progress}", end='', flush=True)
+
+    async def main():
+        storage = StorageCategories(os.path.abspath(args.storage_path), args.storage_name, layout='sharded')
+        transfer = BulkTransfer(args.concurrency, args.batch_size, on_progress=report)
+        for category in args.categories or list(await storage.categories):
+            await migrate_storage(storage, [category], transfer)
+            print(f"\nCategory {category} migrated.")
+
+    asyncio.run(main())
@@ -0,0 +1,115 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+from array import array
+
+# Индекс смещений строк текстового файла для постраничного чтения.
+# Хранится рядом с файлом в скрытом файле .<file>.lines: заголовок и массив смещений начала строк (uint64).
+# В заголовке записаны mtime и размер исходного файла: если файл изменился, индекс перестраивается при чтении.
+# Страница - это lines_per_page строк, поэтому одна страница читается срезом mmap по двум смещениям из индекса,
+# стоимость чтения не зависит от размера книги.
+# Все функции блокирующие и вызываются в рабочем потоке.
+
+MAGIC = b'LIDX'
+VERSION = 1
+HEADER = struct.Struct('<4sIqQQ')  # magic, version, source mtime_ns, source size, number of lines
+OFFSET = struct.Struct('<Q')
+INDEX_SUFFIX = '.lines'
+CHUNK_SIZE = 1024 * 1024
+
+
+def index_path(path: str) -> str:
+    """Returns the path of the offset index of the file."""
+    directory, name = os.path.split(path)
+    return os.path.join(directory, f'.{name}{INDEX_SUFFIX}')
+
+
+def build_index(path: str) -> str:
+    """
+    Builds the offset index of the file. The index is written to a hidden temporary file
+    which is renamed when it is complete, so readers never see a partial index.
+    :param path: Path to the text file.
+    :return: Path to the index.
+    """
+    stat_result = os.stat(path)
+    offsets = array('Q')
+    if stat_result.st_size:
+        offsets.append(0)
+    position = 0
+    with open(path, 'rb') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            start = chunk.find(b'\n')
+            while start != -1:
+                offsets.append(position + start + 1)
+                start = chunk.find(b'\n', start + 1)
+            position += len(chunk)
+    if offsets and offsets[-1] == position:  # the file ends with a line break, there is no line after it.
+        offsets.pop()
+
+    dst = index_path(path)
+    # Every build writes its own temporary file: concurrent first reads of a book build the index at the same time.
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(dst), prefix='.', suffix='.part')
+    try:
+        with os.fdopen(fd, 'wb') as index:
+            index.write(HEADER.pack(MAGIC, VERSION, stat_result.st_mtime_ns, stat_result.st_size, len(offsets)))
+            if sys.byteorder == 'big':
+                offsets.byteswap()
+            offsets.tofile(index)
+        os.replace(tmp, dst)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return dst
+
+
+def is_fresh(path: str, stat_result: os.stat_result) -> bool:
+    """Checks that the index exists and was built for the current version of the file."""
+    try:
+        with open(index_path(path), 'rb') as index:
+            header = index.read(HEADER.size)
+    except FileNotFoundError:
+        return False
+    if len(header) != HEADER.size:
+        return False
+    magic, version, mtime_ns, size, _ = HEADER.unpack(header)
+    return (magic, version, mtime_ns, size) == (MAGIC, VERSION, stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def read_page(path: str, page: int, lines_per_page: int) -> tuple[bytes, int]:
+    """
+    Reads one page of a text file. The offset index is built on first use and rebuilt
+    when the file has changed.
+    :param path: Path to the text file.
+    :param page: Page number, starting from 1.
+    :param lines_per_page: Number of lines on a page.
+    :return: Page content and the total number of pages.
+    :raises ValueError: If lines_per_page or page is less than 1.
+    :raises IndexError: If the page does not exist.
+    """
+    if lines_per_page < 1 or page < 1:
+        raise ValueError("page and lines_per_page must be greater than 0.")
+
+    stat_result = os.stat(path)
+    if not is_fresh(path, stat_result):
+        build_index(path)
+
+    with open(index_path(path), 'rb') as index_file, \
+            mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:
+        _, _, _, size, count_lines = HEADER.unpack_from(index)
+        count_pages = max(1, -(-count_lines // lines_per_page))
+        if page > count_pages:
+            raise IndexError(f"Page {page} not found")
+
+        first = (page - 1) * lines_per_page
+        last = first + lines_per_page
+        if count_lines == 0:
+            return b'', count_pages
+        start = OFFSET.unpack_from(index, HEADER.size + first * OFFSET.size)[0]
+        end = (OFFSET.unpack_from(index, HEADER.size + last * OFFSET.size)[0]
+               if last < count_lines else size)
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as content:
+        return content[start:end], count_pages
@@ -0,0 +1,48 @@
+import hashlib
+import os
+import string
+
+from NEW_FileStorage.storage.compression import GZIP_SUFFIX, logical_name
+
+
+# Раскладка файлов категории по двухуровневым поддиректориям по хешу имени: category/ab/cd/file.
+# В режиме 'sharded' файлы в корне категории тоже считаются файлами категории: так хранилище продолжает
+# работать, пока плоская категория переносится в новую раскладку (см. migrate_layout).
+# Поддиректория выбирается по логическому имени файла, поэтому сжатый book.txt.gz лежит там же, где лежал бы book.txt.
+
+HEX_DIGITS = frozenset(string.hexdigits.lower())
+
+
+def shard_relpath(filename: str) -> str:
+    """Returns the path of the file relative to the category in the sharded layout."""
+    digest = hashlib.md5(logical_name(filename).encode(), usedforsecurity=False).hexdigest()
+    return os.path.join(digest[:2], digest[2:4], filename)
+
+
+def file_path(category_path: str, filename: str, sharded: bool) -> str:
+    """Returns the path where a new file with this name is stored."""
+    if sharded:
+        return os.path.join(category_path, shard_relpath(filename))
+    return os.path.join(category_path, filename)
+
+
+def find_file(category_path: str, filename: str, sharded: bool) -> str:
+    """
+    Returns the path of an existing file by its logical name, the file may be stored compressed.
+    In the sharded layout a file that has not been migrated yet is looked up in the category root.
+    Blocking, call it in a worker thread.
+    :raises FileNotFoundError: If the file is not found.
+    """
+    for name in (filename, filename + GZIP_SUFFIX):
+        path = file_path(category_path, name, sharded)
+        if os.path.isfile(path):
+            return path
+        flat_path = os.path.join(category_path, name)
+        if sharded and os.path.isfile(flat_path):
+            return flat_path
+    raise FileNotFoundError(f"File {filename} not found")
+
+
+def is_shard_dir(entry: os.DirEntry) -> bool:
+    """Checks that the directory entry is a shard directory of the sharded layout."""
+    return len(entry.name) == 2 and set(entry.name) <= HEX_DIGITS and entry.is_dir()
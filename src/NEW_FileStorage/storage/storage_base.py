@@ -1,5 +1,6 @@
 import os
 import shutil
+from typing import Literal
 
 
 # Базовый класс хранилища. Поставляет инициализатор и служебные, вспомогательные методы для создания хранилища
@@ -10,14 +11,24 @@ import shutil
 class BaseStorage:
     """Basic storage for storing files."""
 
-    def __init__(self, storage_path: str, storage_name: str, temporary: bool = False):
+    def __init__(self, storage_path: str, storage_name: str, temporary: bool = False,
+                 layout: Literal['flat', 'sharded'] = 'flat'):
         """
         Storage initialization.
         :param storage_path: Path to the directory where the repository should be created.
         :param storage_name: Storage directory name .
+        :param layout: Layout of files in categories.
+                       'flat' - files are stored directly in the category directory.
+                       'sharded' - files are spread over two levels of subdirectories by the hash of the name
+                       (category/ab/cd/file), for categories with hundreds of thousands of files.
+                       Default 'flat'.
+        :raises ValueError: Incorrect literal layout.
         """
+        if layout not in ('flat', 'sharded'):
+            raise ValueError(f"Incorrect layout {layout}")
         self.__path, self.__name = self.__get_or_create(storage_path, storage_name)
         self.__temporary = temporary
+        self.__layout = layout
 
     def __del__(self):
         if self.__temporary:
@@ -25,7 +36,7 @@ class BaseStorage:
         del self
 
     def __repr__(self):
-        return f"Storage:\nName: {self.name}\nPath: {self.path}Temporary: {self.temporary}"
+        return f"Storage:\nName: {self.name}\nPath: {self.path}Temporary: {self.temporary}\nLayout: {self.layout}"
 
     @property
     def path(self):
@@ -69,6 +80,14 @@ class BaseStorage:
     def temporary(self, value):
         raise ValueError("The storage type cannot be changed after it has been created.")
 
+    @property
+    def layout(self):
+        return self.__layout
+
+    @property
+    def sharded(self) -> bool:
+        return self.__layout == 'sharded'
+
     def __get_or_create(self, storage_path: str, storage_name: str) -> tuple[str, str]:
         """
         If the storage already exists on disk - it returns the absolute path to it and its name.
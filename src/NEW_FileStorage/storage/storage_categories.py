@@ -1,21 +1,44 @@
 import asyncio
 import os
-from typing import Literal
+from typing import Literal, AsyncIterator
 
 import aiofiles.os as a_os
 import aioshutil as a_shutil
-from asyncstdlib import any_iter
 
+from NEW_FileStorage.storage import category_scanner, sharding
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer
+from NEW_FileStorage.storage.category_index import CategoryIndex
 from NEW_FileStorage.storage.storage_base import BaseStorage
 
 
+def _remove_empty_tree(path: str) -> None:
+    """
+    Removes the directory and its subdirectories from the bottom up with rmdir, so a directory that
+    contains a file, even one added during the removal, is never deleted. Blocking, call it in a worker thread.
+    :raises OSError: If a directory is not empty. Empty subdirectories removed before it stay removed.
+    """
+    for directory, _, _ in os.walk(path, topdown=False):
+        try:
+            os.rmdir(directory)
+        except FileNotFoundError:  # removed at the same time by another call.
+            pass
+
+
 # Расширяет базовое хранилище. Добавляет функционал создания, удаления, получения категорий
-# Получения размера категории и количества файлов в ней, получения всех файлов в категории
+# Получения размера категории и количества файлов в ней, получения всех файлов в категории.
+# Категории ищутся в индексе в памяти (CategoryIndex), а не листингом корня хранилища на каждый вызов.
+# Все методы работают как с плоской, так и с шардированной раскладкой файлов (см. sharding).
 class StorageCategories(BaseStorage):
 
+    def __init__(self, storage_path: str, storage_name: str, temporary: bool = False,
+                 layout: Literal['flat', 'sharded'] = 'flat'):
+        super().__init__(storage_path, storage_name, temporary, layout)
+        self.__index = CategoryIndex(self.path)
+        self.bulk_transfer = BulkTransfer()
+
     @property
     async def categories(self):
-        return tuple(sorted(os.listdir(self.path)))
+        return tuple(sorted(await self.__index.get()))
 
     @categories.setter
     def categories(self, value):
@@ -26,21 +49,29 @@ class StorageCategories(BaseStorage):
         Returns all available categories.
         :return: All categories.
         """
-        categories = await a_os.listdir(self.path)
-        if len(categories) == 0:
-            return dict()
-        categories = any_iter(categories)
-        categories_dict = {}
-
-        async for cat_name in categories:
-            categories_dict[cat_name] = os.path.join(self.path, cat_name)
-        return categories_dict
+        return dict(await self.__index.get())
 
     async def check_category(self, category: str) -> bool:
         """Checks if the category exists."""
-        cats = await self.all_categories()
+        cats = await self.__index.get()
         return category in cats
 
+    async def watch_categories(self) -> None:
+        """
+        Starts tracking categories created or deleted in the storage directory by other processes.
+        Without it, the index only sees changes made through this storage object.
+        """
+        await self.__index.watch()
+
+    async def stop_watching_categories(self) -> None:
+        """Stops tracking external changes of the storage directory."""
+        await self.__index.stop()
+
+    async def refresh_categories(self) -> None:
+        """Rebuilds the category index from disk."""
+        self.__index.invalidate()
+        await self.__index.get()
+
     async def get_category_path(self, category: str) -> str:
         """
         Returns the absolute path to the category.
@@ -52,7 +83,7 @@ class StorageCategories(BaseStorage):
         if not isinstance(category, str):
             raise TypeError("A string was expected as an argument.")
 
-        cats: dict = await self.all_categories()
+        cats: dict = await self.__index.get()
         if category not in cats:
             raise NotADirectoryError(f"Category {category} is not found.")
         return cats[category]
@@ -72,18 +103,22 @@ class StorageCategories(BaseStorage):
 
         cat_path = os.path.join(self.path, name)
         await a_os.mkdir(cat_path)
+        self.__index.add(name, cat_path)
         return {name: cat_path}
 
-    async def files_transfer(self, old_category: str, new_category: str) -> dict:
+    async def files_transfer(self, old_category: str, new_category: str,
+                             transfer: BulkTransfer | None = None) -> dict:
         """
         Moves all files from the old category to the new category.
         :param old_category: The name of the category from which you want to move all files.
         :param new_category: The category name to which you want to move files.
+        :param transfer: Transfer engine with its own concurrency, batch size and progress callback.
+                         By default, the storage engine 'bulk_transfer' is used.
         :return: Name and absolute path to the category to which the files were moved.
         :raises NotADirectoryError: If categories not found.
         :raises IsADirectoryError: If old_category is empty.
         :raises TypeError: If the arguments are not strings.
-
+        :raises TransferError: If some files were not moved. Calling the method again moves the rest.
         """
         if not isinstance(old_category, str) or not isinstance(new_category, str):
             raise TypeError('Incorrect arguments type. Expected str.')
@@ -91,22 +126,21 @@ class StorageCategories(BaseStorage):
         old_category_path = await self.get_category_path(old_category)
         new_category_path = await self.get_category_path(new_category)
 
-        files_list_old_category = await a_os.listdir(old_category_path)  # содержит только имена файлов
+        # Пути файлов относительно категории. В плоской раскладке это просто имена файлов.
+        files_list_old_category = await asyncio.to_thread(category_scanner.scan_relpaths, old_category_path,
+                                                          self.sharded)
         if len(files_list_old_category) == 0:
             raise IsADirectoryError(f"Category {old_category} is empty")
-        files_list_old_category = any_iter(files_list_old_category)  # Асинхронный итератор.
-
-        async with asyncio.TaskGroup() as tg:
-            async for file in files_list_old_category:
-                src_file = os.path.join(old_category_path, file)
-                dst_file = os.path.join(new_category_path, file)
-                await tg.create_task(a_os.replace(src_file, dst_file))
 
+        transfer = transfer or self.bulk_transfer
+        destination = (lambda relpath: sharding.shard_relpath(os.path.basename(relpath))) if self.sharded else None
+        await transfer.run(old_category_path, new_category_path, files_list_old_category, destination)
         return {new_category: new_category_path}
 
     async def delete_category(self, category: str,
                               mode: Literal['empty', 'all', 'moveFiles'] = 'empty',
-                              new_category: str = None) -> None:
+                              new_category: str = None,
+                              transfer: BulkTransfer | None = None) -> None:
         """
         Removes a category by name.
         :param category: Name of the category to be deleted.
@@ -117,26 +151,33 @@ class StorageCategories(BaseStorage):
                      Mode 'moveFiles'- move all files to a new category and delete the old category.
         :param new_category: Name new category to which files from the deleted category should be moved.
                              The parameter is considered only in mode='moveFiles'.
+        :param transfer: Transfer engine for mode='moveFiles'. By default, the storage engine 'bulk_transfer'.
         :return: None
         :raises NotADirectoryError: If category does not exist.
         :raises ValueError: Incorrect literal mode.
         :raises IsADirectoryError: If category is not empty and mode is 'empty'.
         :raises TypeError: Incorrect type of category names. A string is waiting.
+        :raises TransferError: If not all files were moved in mode='moveFiles'. The category is not deleted.
         """
 
         deleted_category_path: str = await self.get_category_path(category)
 
         match mode:
             case str('empty'):
-                try:
-                    await a_os.rmdir(deleted_category_path)
-                except FileNotFoundError:
+                if not await a_os.path.isdir(deleted_category_path):
+                    self.__index.discard(category)
                     raise NotADirectoryError(f"Category {category} is not exist.")
+                # In the sharded layout an empty category still contains shard directories: they are removed
+                # one by one, a file (or a hidden temporary file of an upload) anywhere stops the removal.
+                try:
+                    await asyncio.to_thread(_remove_empty_tree, deleted_category_path)
                 except OSError:
                     raise IsADirectoryError(f"Category {category} is not empty.")
+                self.__index.discard(category)
 
             case str('all'):
                 await a_shutil.rmtree(deleted_category_path)
+                self.__index.discard(category)
 
             case str('moveFiles'):
                 if new_category is None:
@@ -144,17 +185,18 @@ class StorageCategories(BaseStorage):
                 if not isinstance(new_category, str):
                     raise TypeError("Expected argument type 'new_category' - str.")
 
-                await self.files_transfer(category, new_category)
+                await self.files_transfer(category, new_category, transfer)
                 await self.delete_category(category, mode='all')
             case _:
                 raise ValueError(f"Incorrect {mode}")
 
     async def count_files(self, category: str) -> int:
-        """Returns the number of files in the category. If the category is not created it will return -1"""
-
+        """
+        Returns the number of files in the category.
+        :raises NotADirectoryError: If category not found.
+        """
         category_path = await self.get_category_path(category)
-        files = await a_os.listdir(category_path)
-        return len(files)
+        return await asyncio.to_thread(category_scanner.scan_count, category_path, self.sharded)
 
     async def get_all_files(self, category: str) -> dict[str: str | int] | None:
         """
@@ -166,39 +208,31 @@ class StorageCategories(BaseStorage):
         """
         category_path = await self.get_category_path(category)
 
-        all_names_files = await a_os.listdir(category_path)
-        if len(all_names_files) == 0:
+        all_files = await asyncio.to_thread(category_scanner.scan_files, category_path, category,
+                                            self.sharded)
+        if len(all_files) == 0:
             return None
-        all_names_files = any_iter(all_names_files)
-
-        all_files = []
-        async for name in all_names_files:
-            file_path = os.path.join(category_path, name)
-            if await a_os.path.isfile(file_path):
-                size = await a_os.path.getsize(file_path)
-                file_info = {
-                    'name': name,
-                    'type': os.path.splitext(file_path)[1],
-                    'category': category,
-                    'path': file_path,
-                    'size': size
-                }
-                all_files.append(file_info)
-
         return tuple(all_files)
 
+    async def iter_files(self, category: str, batch_size: int = 1000) -> AsyncIterator[list[dict[str, str | int]]]:
+        """
+        Streams the files of the category in batches, so the caller can start working before the directory
+        is fully read. File descriptions have the same format as in get_all_files.
+        :param category: Category name.
+        :param batch_size: Maximum number of files in a batch.
+        :raises NotADirectoryError: If category not found.
+        :raises TypeError: If argument type not string.
+        """
+        category_path = await self.get_category_path(category)
+        async for batch in category_scanner.iter_files(category_path, category, batch_size, self.sharded):
+            yield batch
+
     async def size(self, category: str) -> int:
         """
         Returns the total size of the category in bytes.
         The category size is the total size of all files in the category.
-        :return: If the category is not created it will return -1
+        :raises NotADirectoryError: If category not found.
         """
-        files = await self.get_all_files(category)
-
-        if not files:
-            return 0
-        size = 0
-        files = any_iter(files)
-        async for file_dict in files:
-            size += file_dict.get('size')
+        category_path = await self.get_category_path(category)
+        _, size = await asyncio.to_thread(category_scanner.scan_totals, category_path, self.sharded)
         return size
@@ -1,11 +1,14 @@
+from typing import Literal
+
 from NEW_FileStorage.storage.storage_categories import StorageCategories
 
 
 # Добавляет к хранилищу функционал проверки расширений файлов разрешенных для хранения.
 class StorageAllowedExtensions(StorageCategories):
 
-    def __init__(self, storage_path: str, storage_name: str, allowed_extensions: list, temporary: bool = False, ):
-        super().__init__(storage_path, storage_name, temporary)
+    def __init__(self, storage_path: str, storage_name: str, allowed_extensions: list, temporary: bool = False,
+                 layout: Literal['flat', 'sharded'] = 'flat'):
+        super().__init__(storage_path, storage_name, temporary, layout)
 
         if len(allowed_extensions) == 0:
             raise ValueError("Empty list 'allowed_extensions'.")
@@ -1,18 +1,254 @@
-from datetime import datetime
+import asyncio
+import os
+from typing import Literal, AsyncIterator
 
+import aiofiles
+import aiofiles.os as a_os
+import aioshutil as a_shutil
+
+from NEW_FileStorage.storage import blob_store, category_scanner, compression, sharding
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer
 from NEW_FileStorage.storage.storage_ext import StorageAllowedExtensions
+from NEW_FileStorage.storage.ulid import new_ulid
 
 
+# Добавляет к хранилищу функционал добавления и удаления файлов.
+# В режиме content_addressed содержимое файлов хранится один раз в .blobs, а файлы категорий -
+# жесткие ссылки на блобы. Хеширование и копирование выполняются в рабочем потоке.
+# Текстовые файлы могут храниться сжатыми (gzip) - для всего хранилища или для отдельных категорий.
+# Режим категории хранится в скрытом файле .compression в директории категории. Прочитанный режим кешируется
+# вместе с stat маркера и перечитывается, когда stat меняется: режим, заданный другим процессом,
+# или категория, удаленная и созданная заново, видны при следующем обращении.
 class StorageFiles(StorageAllowedExtensions):
-    @classmethod
-    async def __get_unique_name(cls, name: str) -> str:
+    compressed_extensions = ('txt',)
+    compression_marker = '.compression'
+
+    def __init__(self, storage_path: str, storage_name: str, allowed_extensions: list, temporary: bool = False,
+                 layout: Literal['flat', 'sharded'] = 'flat', content_addressed: bool = False,
+                 compression: Literal['gzip'] | None = None):
+        """
+        :param content_addressed: If True, identical files are stored once and category files are hard links
+                                  to the stored content. Category files must not be modified in place.
+                                  Default False.
+        :param compression: Default compression of text files for categories without their own setting.
+                            'gzip' or None. Default None.
+        :raises ValueError: Incorrect compression or compression combined with content_addressed.
+        """
+        if compression not in ('gzip', None):
+            raise ValueError(f"Incorrect compression {compression}")
+        if compression and content_addressed:
+            raise ValueError("Compression cannot be combined with content-addressed mode.")
+        super().__init__(storage_path, storage_name, allowed_extensions, temporary, layout)
+        self.__content_addressed = content_addressed
+        self.__blobs_dir = os.path.join(self.path, blob_store.BLOBS_DIR_NAME)
+        self.__compression = compression
+        # {category: ((st_ino, st_mtime_ns, st_size) of the marker, mode)}
+        self.__categories_compression: dict[str, tuple[tuple[int, int, int], str | None]] = {}
+
+    @property
+    def content_addressed(self) -> bool:
+        return self.__content_addressed
+
+    @property
+    def compression(self) -> str | None:
+        return self.__compression
+
+    async def get_category_compression(self, category: str) -> str | None:
+        """
+        Returns the compression of new text files in the category: 'gzip' or None.
+        :raises NotADirectoryError: If category not found.
+        """
+        marker = os.path.join(await self.get_category_path(category), self.compression_marker)
+        try:
+            stat_result = await a_os.stat(marker)
+            signature = (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size)
+            cached = self.__categories_compression.get(category)
+            if cached is None or cached[0] != signature:
+                async with aiofiles.open(marker) as file:
+                    mode = (await file.read()).strip()
+                cached = (signature, mode if mode == 'gzip' else None)
+                self.__categories_compression[category] = cached
+            return cached[1]
+        except FileNotFoundError:
+            self.__categories_compression.pop(category, None)
+            return self.__compression
+
+    async def set_category_compression(self, category: str, mode: Literal['gzip'] | None) -> None:
+        """
+        Sets the compression of new text files in the category. Files already stored keep their form,
+        reading works for both. The marker is removed when the mode is the storage default.
+        :param category: Category name.
+        :param mode: 'gzip' or None.
+        :raises NotADirectoryError: If category not found.
+        :raises ValueError: Incorrect mode or the storage is content-addressed.
+        """
+        if mode not in ('gzip', None):
+            raise ValueError(f"Incorrect compression {mode}")
+        if mode and self.__content_addressed:
+            raise ValueError("Compression cannot be combined with content-addressed mode.")
+        if mode == self.__compression:
+            await self.__remove_marker(category)
+        else:
+            await self.__write_marker(category, mode or 'none')
+
+    async def add_file(self, file_path: str, category: str, only_copy: bool = False,
+                       add_unique_name: bool = True) -> dict[str, str | int]:
+        """
+        Adds a file to the category.
+        :param file_path: Path to the file to be added.
+        :param category: The name of the category to which you want to add the file.
+        :param only_copy: If True, the file is copied. If False, the source file is removed. Default False.
+        :param add_unique_name: Whether you need to add unique characters to the file name. Default is True.
+        :return: Description of the added file in the get_all_files format.
+        :raises NotADirectoryError: If category not found.
+        :raises FileNotFoundError: If the file is not found.
+        :raises TypeError: If working with a file of this type is not allowed.
+        :raises FileExistsError: If a file with this name already exists in the category.
+        """
+        category_path = await self.get_category_path(category)
+        if not await a_os.path.isfile(file_path):
+            raise FileNotFoundError(f"File {file_path} not found")
+
+        name, ext = os.path.splitext(os.path.basename(file_path))
+        await self.validate_ext(ext)
+        if add_unique_name:
+            name = await self.__get_unique_name(name)
+        dst = sharding.file_path(category_path, name + ext, self.sharded)
+        if self.sharded:
+            await a_os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+        compress = (ext.removeprefix('.') in self.compressed_extensions
+                    and await self.get_category_compression(category) == 'gzip')
+        if compress:
+            dst += compression.GZIP_SUFFIX
+            await asyncio.to_thread(compression.compress_file, file_path, dst)
+            if not only_copy:
+                await a_os.remove(file_path)
+        elif self.__content_addressed:
+            await asyncio.to_thread(blob_store.add_entry, self.__blobs_dir, file_path, dst)
+            if not only_copy:
+                await a_os.remove(file_path)
+        elif only_copy:
+            await a_shutil.copy2(file_path, dst)
+        else:
+            await a_shutil.move(file_path, dst)
+
+        return {
+            'name': name + ext,
+            'type': ext,
+            'category': category,
+            'path': dst,
+            'size': await a_os.path.getsize(dst),
+            'compressed': compress,
+        }
+
+    async def read_file(self, category: str, file: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
         """
-        Generates a unique string based on the submitted string with the addition of the current date and time
-        string without delimiters.
+        Streams the content of a file. Compressed files are decompressed on the fly in a worker thread,
+        one chunk at a time.
+        :param category: Category name.
+        :param file: File name with extension, as returned by the listings.
+        :param chunk_size: Maximum size of a chunk in bytes.
+        :raises NotADirectoryError: If category not found.
+        :raises FileNotFoundError: If the file is not found.
         """
-        return name + '_' + await cls.__get_datetime_now()
+        category_path = await self.get_category_path(category)
+        if os.path.basename(file) != file:
+            raise FileNotFoundError(f"File {file} not found")
+        file_path = await asyncio.to_thread(sharding.find_file, category_path, file, self.sharded)
+
+        reader = await asyncio.to_thread(compression.open_reader, file_path)
+        try:
+            while chunk := await asyncio.to_thread(reader.read, chunk_size):
+                yield chunk
+        finally:
+            await asyncio.to_thread(reader.close)
+
+    async def size_info(self, category: str) -> dict[str, int]:
+        """
+        Returns the size of the category files: 'logical' - after decompression, 'physical' - on disk.
+        :raises NotADirectoryError: If category not found.
+        """
+        category_path = await self.get_category_path(category)
+        logical, physical = await asyncio.to_thread(category_scanner.scan_sizes, category_path, self.sharded)
+        return {'logical': logical, 'physical': physical}
+
+    async def delete_file(self, category: str, file: str) -> None:
+        """
+        Deletes a file from the category. In content-addressed mode the stored content is deleted
+        together with its last reference.
+        :param category: Category name.
+        :param file: File name with extension.
+        :return: None
+        :raises NotADirectoryError: If category not found.
+        :raises FileNotFoundError: If the file is not found.
+        """
+        category_path = await self.get_category_path(category)
+        if os.path.basename(file) != file:
+            raise FileNotFoundError(f"File {file} not found")
+        file_path = await asyncio.to_thread(sharding.find_file, category_path, file, self.sharded)
+
+        if self.__content_addressed:
+            await asyncio.to_thread(blob_store.unlink_entry, self.__blobs_dir, file_path)
+        else:
+            await a_os.remove(file_path)
+
+    async def delete_category(self, category: str,
+                              mode: Literal['empty', 'all', 'moveFiles'] = 'empty',
+                              new_category: str = None,
+                              transfer: BulkTransfer | None = None) -> None:
+        """
+        Removes a category by name, see StorageCategories.delete_category.
+        In content-addressed mode, content left without references after mode='all' is deleted.
+        """
+        # The compression marker would keep an empty category from being removed: it is removed first
+        # and written back if the category has files.
+        marker_content = await self.__remove_marker(category) if mode == 'empty' else None
+        try:
+            await super().delete_category(category, mode, new_category, transfer)
+        except IsADirectoryError:
+            if marker_content is not None:
+                await self.__write_marker(category, marker_content)
+            raise
+        self.__categories_compression.pop(category, None)
+        if mode == 'all':
+            await self.collect_garbage()
+
+    async def collect_garbage(self) -> int:
+        """
+        Deletes stored content that is no longer referenced by any category file,
+        e.g. after deleting a whole category. Does nothing outside content-addressed mode.
+        :return: Number of deleted blobs.
+        """
+        if not self.__content_addressed or not await a_os.path.isdir(self.__blobs_dir):
+            return 0
+        return await asyncio.to_thread(blob_store.collect_garbage, self.__blobs_dir)
+
+    async def __write_marker(self, category: str, content: str) -> None:
+        """Writes the compression marker of the category."""
+        marker = os.path.join(await self.get_category_path(category), self.compression_marker)
+        async with aiofiles.open(marker, 'w') as file:
+            await file.write(content)
+
+    async def __remove_marker(self, category: str) -> str | None:
+        """
+        Removes the compression marker of the category.
+        :return: Content of the removed marker or None if the category has no marker.
+        :raises NotADirectoryError: If category not found.
+        """
+        marker = os.path.join(await self.get_category_path(category), self.compression_marker)
+        try:
+            async with aiofiles.open(marker) as file:
+                content = await file.read()
+            await a_os.remove(marker)
+        except FileNotFoundError:
+            return None
+        return content
 
     @classmethod
-    async def __get_datetime_now(cls) -> str:
-        """Returns the current date and time as a string of numbers with no delimiters."""
-        return datetime.now().strftime('%d%m%Y%H%M%S')
\ No newline at end of file
+    async def __get_unique_name(cls, name: str) -> str:
+        """
+        Generates a unique string based on the submitted string with the addition of a ULID:
+        unique across coroutines and processes and sortable by creation time.
+        """
+        return name + '_' + new_ulid()
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+
+
+# Генератор уникальных идентификаторов в формате ULID: 48 бит времени в миллисекундах + 80 случайных бит,
+# 26 символов Crockford base32. Идентификаторы сортируются по времени создания.
+# В пределах процесса генератор монотонный: в одну миллисекунду случайная часть увеличивается на 1.
+# Между процессами (воркеры uvicorn) уникальность обеспечивают 80 случайных бит,
+# после fork состояние генератора сбрасывается, чтобы дочерний процесс не продолжал последовательность родителя.
+
+ENCODING = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+RANDOM_BITS = 80
+ULID_LENGTH = 26
+
+
+def encode(value: int) -> str:
+    """Encodes a 128-bit integer as 26 characters of Crockford base32."""
+    chars = []
+    for _ in range(ULID_LENGTH):
+        value, index = divmod(value, 32)
+        chars.append(ENCODING[index])
+    return ''.join(reversed(chars))
+
+
+class ULIDGenerator:
+    """Thread-safe monotonic ULID generator."""
+
+    def __init__(self):
+        self.__lock = threading.Lock()
+        self.__last_ms = 0
+        self.__last_random = 0
+        os.register_at_fork(after_in_child=self.__reset)
+
+    def __reset(self) -> None:
+        self.__lock = threading.Lock()
+        self.__last_ms = 0
+        self.__last_random = 0
+
+    def new(self) -> str:
+        """Returns a new ULID string."""
+        with self.__lock:
+            ms = time.time_ns() // 1_000_000
+            if ms <= self.__last_ms:
+                # The same millisecond (or the clock went back): continue the sequence.
+                ms = self.__last_ms
+                random = self.__last_random + 1
+                if random >> RANDOM_BITS:
+                    ms += 1
+                    random = int.from_bytes(os.urandom(RANDOM_BITS // 8))
+            else:
+                random = int.from_bytes(os.urandom(RANDOM_BITS // 8))
+            self.__last_ms, self.__last_random = ms, random
+        return encode(ms << RANDOM_BITS | random)
+
+
+ulid_generator = ULIDGenerator()
+
+
+def new_ulid() -> str:
+    """Returns a new ULID string from the process-wide generator."""
+    return ulid_generator.new()
@@ -1,6 +1,6 @@
-from typing import Literal, Type, Any, Coroutine
+from typing import Literal, Type, Any, Coroutine, Sequence
 
-from sqlalchemy import update, select
+from sqlalchemy import update, select, func, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from category.models import Category
@@ -138,6 +138,35 @@ class CategoryCRUD:
         await session.delete(category_obj)
         await session.commit()
 
+    @staticmethod
+    async def list_categories(session: AsyncSession, sort: Literal['id', 'name', 'date', 'files'] = 'id',
+                              descending: bool = False, limit: int = 50, after: tuple[Any, ...] | None = None,
+                              name_prefix: str | None = None) -> Sequence[Category]:
+        """
+        Returns a page of categories with keyset pagination: the page starts after the sort key
+        of the last category of the previous page, so every page is one index range scan.
+        :param session: AsyncSession instance.
+        :param sort: Sort key: 'id', 'name', 'date' (date joined) or 'files' (number of files).
+        :param descending: Sort in descending order.
+        :param limit: Maximum number of categories.
+        :param after: Sort key of the last category of the previous page. None - the first page.
+        :param name_prefix: Return only categories whose name starts with this prefix, case-insensitive.
+        :return: List of categories.
+        """
+        columns = {'id': (Category.id,),
+                   'name': (Category.name,),
+                   'date': (Category.data_joined, Category.id),
+                   'files': (Category.files_count, Category.id)}[sort]
+        stmt = select(Category)
+        if name_prefix:
+            pattern = name_prefix.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            stmt = stmt.where(func.lower(Category.name).like(pattern, escape='\\'))
+        if after is not None:
+            key = tuple_(*columns)
+            stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+        stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column in columns)).limit(limit)
+        return (await session.scalars(stmt)).all()
+
     @staticmethod
     async def all_category(session: AsyncSession):
         """
@@ -149,3 +178,73 @@ class CategoryCRUD:
         categories = await session.scalars(stmt)
         return categories.all()
 
+    @staticmethod
+    async def change_counters(session: AsyncSession, category_id: int, count_delta: int = 0, size_delta: int = 0,
+                              commit: bool = True) -> Category | None:
+        """
+        Changes the file counters of the category in place with a single UPDATE.
+        :param session: AsyncSession instance.
+        :param category_id: Category id.
+        :param count_delta: Change in the number of files.
+        :param size_delta: Change in the total size of files in bytes.
+        :param commit: Whether to commit the transaction. Default True.
+        :return: Updated category or None if the category is not found.
+        """
+        stmt = (update(Category).where(Category.id == category_id)
+                .values(files_count=Category.files_count + count_delta,
+                        files_size=Category.files_size + size_delta)
+                .returning(Category))
+        category = await session.scalar(stmt)
+        if commit:
+            await session.commit()
+        return category
+
+    @staticmethod
+    async def transfer_counters(session: AsyncSession, old_category_id: int, new_category_id: int,
+                                commit: bool = True) -> None:
+        """
+        Adds the counters of the old category to the new category and resets the old ones.
+        Used when all files of a category are moved to another one.
+        :param session: AsyncSession instance.
+        :param old_category_id: Id of the category from which the files were moved.
+        :param new_category_id: Id of the category to which the files were moved.
+        :param commit: Whether to commit the transaction. Default True.
+        :return: None.
+        """
+        counters = await CategoryCRUD.lock_counters(session, old_category_id)
+        if counters is not None:
+            await CategoryCRUD.change_counters(session, new_category_id, *counters, commit=False)
+            await CategoryCRUD.set_counters(session, old_category_id, 0, 0, commit=False)
+        if commit:
+            await session.commit()
+
+    @staticmethod
+    async def lock_counters(session: AsyncSession, category_id: int) -> tuple[int, int] | None:
+        """
+        Reads the file counters of the category and locks its row until the end of the transaction,
+        so the counters cannot change until the caller commits.
+        :param session: AsyncSession instance.
+        :param category_id: Category id.
+        :return: (files_count, files_size) or None if the category is not found.
+        """
+        stmt = (select(Category.files_count, Category.files_size)
+                .where(Category.id == category_id).with_for_update())
+        counters = (await session.execute(stmt)).one_or_none()
+        return None if counters is None else (counters.files_count, counters.files_size)
+
+    @staticmethod
+    async def set_counters(session: AsyncSession, category_id: int, files_count: int, files_size: int,
+                           commit: bool = True) -> None:
+        """
+        Overwrites the file counters of the category. Used by the reconcile scan.
+        :param session: AsyncSession instance.
+        :param category_id: Category id.
+        :param files_count: Number of files.
+        :param files_size: Total size of files in bytes.
+        :param commit: Whether to commit the transaction. Default True.
+        :return: None.
+        """
+        await session.execute(update(Category).where(Category.id == category_id)
+                              .values(files_count=files_count, files_size=files_size))
+        if commit:
+            await session.commit()
@@ -0,0 +1,31 @@
+# Background jobs of the category manager.
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer, TransferProgress
+from category.manager import category_manager
+from jobs.manager import job_manager, JobContext
+
+DELETE_CATEGORY_JOB = 'category.delete'
+
+
+@job_manager.register(DELETE_CATEGORY_JOB)
+async def delete_category_job(context: JobContext, session: AsyncSession, category_id: int, mode: str,
+                              new_category_id: int | None = None) -> None:
+    """
+    Deletes a category with mode 'all' or 'moveFiles', see CategoryManager.delete.
+    Progress is the number of moved files for 'moveFiles' and 0 or 1 for 'all'.
+    """
+    def on_progress(progress: TransferProgress) -> None:
+        context.set_progress(progress.moved, progress.total)
+
+    context.set_progress(0, 1)
+    try:
+        await category_manager.delete(session, category_id, mode, new_category_id,
+                                      transfer=BulkTransfer(on_progress=on_progress))
+    except NotADirectoryError:
+        # The category is already deleted: the job was interrupted after deletion and has been taken again.
+        if await category_manager.category_crud.get_category(session, category_id) is not None:
+            raise
+    if mode == 'all':
+        context.set_progress(1, 1)
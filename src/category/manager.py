@@ -1,28 +1,49 @@
 # Manage categories in the file system and database.
 
-from typing import Any, List
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, List, Literal
 
 from asyncstdlib import any_iter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from FileStorage import StorageManager
+from NEW_FileStorage.storage.bulk_transfer import BulkTransfer
 from category.crud import CategoryCRUD
 from category.models import Category
-from config import STORAGE
+from config import STORAGE, CATEGORY_CACHE_SIZE, CATEGORY_CACHE_TTL
+from database import async_session_maker, is_replica_session
+from quota.manager import quota_manager
+from search.manager import search_manager
+from utils.cache import TTLCache
+from utils.cursor import encode_cursor, decode_cursor
+from utils.single_flight import SingleFlight
 from utils.text_formatter import TextFormatter
 
+# Types of the key values in the cursor of each sort of the category list, see __load_page.
+CURSOR_KEY_TYPES = {'id': (int,), 'name': (str,), 'date': (datetime, int), 'files': (int, int)}
+
 
 class BaseCategoryManager:
     """The base class of the category manager."""
 
-    def __init__(self, storage: StorageManager):
-        """Initialization of storage object, text formatting object, CRUD operations object."""
+    def __init__(self, storage: StorageManager, cache_size: int = 0, cache_ttl: float = 0):
+        """
+        Initialization of storage object, text formatting object, CRUD operations object, the cache of reads
+        and the coalescing of concurrent identical reads.
+        :param storage: Storage manager.
+        :param cache_size: Maximum number of cached reads. 0 - reads are not cached.
+        :param cache_ttl: Time to live of a cached read in seconds.
+        """
         if not isinstance(storage, StorageManager):
             raise TypeError
 
         self.storage = storage
         self.text_frmt = TextFormatter()
         self.category_crud = CategoryCRUD()
+        self.cache = TTLCache(cache_size, cache_ttl)
+        self.flight = SingleFlight()
 
     def __repr__(self):
         return (f"Object of management category."
@@ -33,27 +54,33 @@ class CategoryManager(BaseCategoryManager):
     """
     Manages categories at the database and file system level.
     Combines category management in the file system and in the database.
+    Reads of one category and of the category list are cached. Every change of a category
+    removes the cached reads of this category and all cached list pages.
+    Concurrent identical reads that miss the cache share one database query.
     """
 
-    async def get_category(self, session: AsyncSession, name_or_id: str | int) -> dict[str, Any]:
+    async def get_category(self, session: AsyncSession, name_or_id: str | int, exact: bool = False) -> dict[str, Any]:
         """
         Returns information about the category.
         :param session: Instance AsyncSession.
         :param name_or_id: Category name or id.
+        :param exact: Count the files in the storage instead of reading the category counters.
         :return: A dictionary with category data.
         :raises: NotADirectoryError
         """
-        category_obj = await self.category_crud.get_category(session, name_or_id)
-        if not category_obj:
-            raise NotADirectoryError
-
-        count_files = await self.storage.count_files(category_obj.system_name)
-        result = await self.__to_dict(category_obj)
-        result['count_files'] = count_files
-        return result
+        key = ('info', name_or_id, exact)
+        result = self.cache.get(key)
+        if result is None:
+            result = await self.flight.do(key, lambda: self.__load_category(session, key, name_or_id, exact))
+        return dict(result)
 
-    async def all_categories(self, session: AsyncSession) -> List[dict]:
-        """Returns objects of all categories."""
+    async def all_categories(self, session: AsyncSession, exact: bool = False) -> List[dict]:
+        """
+        Returns objects of all categories.
+        :param session: Instance AsyncSession.
+        :param exact: Count the files in the storage instead of reading the category counters.
+                      All categories are counted in one batch, see StorageManager.categories_stats.
+        """
 
         categories_objects = await self.category_crud.all_category(session)
         if len(categories_objects) == 0:
@@ -62,12 +89,37 @@ class CategoryManager(BaseCategoryManager):
         categories_objects = any_iter(categories_objects)  # Get async iterator
 
         result: List[dict] = []
+        objects: List[Category] = []
         async for obj in categories_objects:
-            cat: dict = await self.__to_dict(obj)
-            cat['count_files'] = await self.storage.count_files(obj.system_name)
-            result.append(cat)
+            result.append(await self.__to_dict(obj))
+            objects.append(obj)
+        if exact:
+            await self.__count_files(result, objects)
         return result
 
+    async def list_categories(self, session: AsyncSession, sort: Literal['id', 'name', 'date', 'files'] = 'id',
+                              descending: bool = False, limit: int = 50, cursor: str | None = None,
+                              name_prefix: str | None = None, exact: bool = False) -> dict[str, Any]:
+        """
+        Returns a page of categories. Filtering, sorting and paging run in SQL against indexes.
+        :param session: Instance AsyncSession.
+        :param sort: Sort key: 'id', 'name', 'date' (date joined) or 'files' (number of files).
+        :param descending: Sort in descending order.
+        :param limit: Maximum number of categories on the page.
+        :param cursor: Cursor of the next page returned with the previous page. None - the first page.
+        :param name_prefix: Return only categories whose name starts with this prefix, case-insensitive.
+        :param exact: Count the files of the page categories in the storage instead of reading the counters.
+        :return: A dictionary {'categories': list of category dictionaries, 'next': cursor of the next page or None}.
+        :raises ValueError: If the cursor is invalid or was made for another sort key.
+        """
+        after = decode_cursor(cursor, sort, CURSOR_KEY_TYPES[sort]) if cursor is not None else None
+        key = ('list', sort, descending, limit, cursor, name_prefix, exact)
+        page = self.cache.get(key)
+        if page is None:
+            page = await self.flight.do(key, lambda: self.__load_page(session, key, sort, descending, limit, after,
+                                                                      name_prefix, exact))
+        return {'categories': [dict(category) for category in page['categories']], 'next': page['next']}
+
     async def create(self, session: AsyncSession, name: str, description: str, creator: int) -> dict[str, Any]:
         """
         :param session: Instance AsyncSession.
@@ -86,6 +138,7 @@ class CategoryManager(BaseCategoryManager):
         category_path = await self.storage.add_category(category_system_name)
         category_obj = await self.category_crud.create_category(session, frmt_name, category_system_name, description,
                                                                 category_path, creator)
+        self.__invalidate()
 
         return await self.__to_dict(category_obj)
 
@@ -108,25 +161,198 @@ class CategoryManager(BaseCategoryManager):
                                                                     new_name=new_name, new_description=new_description)
         except ValueError:
             raise IsADirectoryError
+        self.__invalidate(category_obj.id)
         return await self.__to_dict(category_obj)
 
-    async def delete(self, session: AsyncSession, category_name_or_id: str | int):
+    async def delete(self, session: AsyncSession, category_name_or_id: str | int,
+                     mode: Literal['empty', 'all', 'moveFiles'] = 'empty',
+                     new_category_name_or_id: str | int | None = None, transfer: BulkTransfer | None = None):
         """
-        Deletes a category from storage and from the database. If the category does not contain any files.
+        Deletes a category from storage and from the database.
+        Modes 'all' and 'moveFiles' can take a long time for big categories, routes run them as background jobs.
+        Every step of these modes can be run again after an interruption: the records and usage of the files
+        are released only when nothing on disk or in the catalog refers to the category.
         :param session: AsyncSession instance.
         :param category_name_or_id: Category name or id.
+        :param mode: Deletion mode. 'empty' - delete only an empty category. 'all' - delete with all files.
+                     'moveFiles' - move all files to the new category and delete the category.
+        :param new_category_name_or_id: Name or id of the category to which files are moved in mode 'moveFiles'.
+        :param transfer: Transfer engine for mode 'moveFiles'. By default, the storage engine.
         :return: None.
         :raises TypeError: Incorrect type argument category_name_or_id.
+        :raises NotADirectoryError: If category or the new category is not exist or not found.
+        :raises IsADirectoryError: If category is not empty and mode is 'empty'.
+        :raises ValueError: Incorrect mode or the new category is the deleted category.
+        """
+
+        category_obj = await self.__get_or_raise(session, category_name_or_id)
+
+        match mode:
+            case 'empty':
+                await self.storage.delete_category(category_obj.system_name, mode='empty')
+            case 'all':
+                await self.__remove_directory(category_obj)
+            case 'moveFiles':
+                if new_category_name_or_id is None:
+                    raise NotADirectoryError
+                new_obj = await self.__get_or_raise(session, new_category_name_or_id)
+                if new_obj.id == category_obj.id:
+                    raise ValueError("Files cannot be moved to the deleted category.")
+                if await self.storage.check_category(category_obj.system_name):
+                    await self.transfer_files(session, category_obj.id, new_obj.id, transfer)
+                else:
+                    # A rerun after the directory was removed: the files are in the new category already,
+                    # their records and counters may not be.
+                    await self.__transfer_records(session, category_obj, new_obj)
+                await self.__remove_directory(category_obj)
+            case _:
+                raise ValueError(f"Incorrect {mode}")
+
+        await quota_manager.release_category(session, category_obj.id)
+        await CategoryCRUD.delete_category(session, category_obj)
+        self.__invalidate(category_obj.id)
+        await search_manager.delete_category(category_obj.id)
+
+    async def register_file_added(self, session: AsyncSession, category_name_or_id: str | int, size: int) -> None:
+        """
+        Updates the category counters after a file has been added to the category.
+        :param session: AsyncSession instance.
+        :param category_name_or_id: Category name or id.
+        :param size: File size in bytes.
+        :return: None.
         :raises NotADirectoryError: If category is not exist or not found.
-        :raises IsADirectoryError: If category is not empty.
         """
+        category_obj = await self.__get_or_raise(session, category_name_or_id)
+        await self.category_crud.change_counters(session, category_obj.id, 1, size)
+        self.__invalidate(category_obj.id)
+
+    async def transfer_files(self, session: AsyncSession, old_category_name_or_id: str | int,
+                             new_category_name_or_id: str | int,
+                             transfer: BulkTransfer | None = None) -> dict[str, Any]:
+        """
+        Moves all files from one category to another in the storage and moves their records, usage and counters.
+        The records are moved even if no files are left on disk: a rerun after the files were moved.
+        :param session: AsyncSession instance.
+        :param old_category_name_or_id: Name or id of the category from which the files are moved.
+        :param new_category_name_or_id: Name or id of the category to which the files are moved.
+        :param transfer: Transfer engine. By default, the storage engine.
+        :return: A dictionary with data of the category to which the files were moved.
+        :raises NotADirectoryError: If one of the categories is not exist or not found.
+        """
+        old_obj = await self.__get_or_raise(session, old_category_name_or_id)
+        new_obj = await self.__get_or_raise(session, new_category_name_or_id)
+
+        try:
+            await self.storage.move_all_files(old_obj.system_name, new_obj.system_name, transfer)
+        except IsADirectoryError:  # no files left on disk.
+            pass
+        await self.__transfer_records(session, old_obj, new_obj)
+        await session.refresh(new_obj)
+        return await self.__to_dict(new_obj)
+
+    async def reconcile_counters(self, session: AsyncSession) -> List[str]:
+        """
+        Recounts files of every category in the storage and fixes the counters that have drifted.
+        Each category is checked in its own transaction that locks the category row from reading the counters
+        to writing them, so an upload or a deletion committed during the scan is not overwritten.
+        Categories whose directory is missing are skipped.
+        :param session: AsyncSession instance.
+        :return: Names of the categories whose counters were corrected.
+        """
+        corrected: List[str] = []
+        categories = [(obj.id, obj.name, obj.system_name) for obj in await self.category_crud.all_category(session)]
+        await session.commit()
+        for category_id, name, system_name in categories:
+            counters = await self.category_crud.lock_counters(session, category_id)
+            if counters is None:  # deleted after it was listed.
+                await session.commit()
+                continue
+            stats = (await self.storage.categories_stats([system_name]))[system_name]
+            drifted = stats is not None and stats != counters
+            if drifted:
+                await self.category_crud.set_counters(session, category_id, *stats, commit=False)
+            await session.commit()
+            if drifted:
+                corrected.append(name)
+                self.__invalidate(category_id)
+        return corrected
 
-        category_obj = await CategoryCRUD.get_category(session, category_name_or_id)
+    async def __load_category(self, session: AsyncSession, key: tuple, name_or_id: str | int,
+                              exact: bool) -> dict[str, Any]:
+        """
+        Reads the category for get_category and saves it in the cache. Reads of the replica are not cached:
+        they may be older than the last invalidation and would be served until the TTL expires.
+        """
+        version = self.cache.version
+        category_obj = await self.category_crud.get_category(session, name_or_id)
         if not category_obj:
             raise NotADirectoryError
 
-        await self.storage.delete_category(category_obj.system_name, mode='empty')
-        await CategoryCRUD.delete_category(session, category_obj)
+        result = await self.__to_dict(category_obj)
+        if exact:
+            await self.__count_files([result], [category_obj])
+        if not is_replica_session(session):
+            self.cache.set(key, result, tags=[('category', category_obj.id)], version=version)
+        return result
+
+    async def __load_page(self, session: AsyncSession, key: tuple, sort: str, descending: bool, limit: int,
+                          after: tuple | None, name_prefix: str | None, exact: bool) -> dict[str, Any]:
+        """Reads a page of categories for list_categories and saves it in the cache unless it comes from the replica."""
+        version = self.cache.version
+        objects = await self.category_crud.list_categories(session, sort, descending, limit, after, name_prefix)
+
+        result = [await self.__to_dict(obj) for obj in objects]
+        if exact and objects:
+            await self.__count_files(result, list(objects))
+
+        next_cursor = None
+        if len(objects) == limit:
+            last = objects[-1]
+            last_key = {'id': (last.id,),
+                        'name': (last.name,),
+                        'date': (last.data_joined, last.id),
+                        'files': (last.files_count, last.id)}[sort]
+            next_cursor = encode_cursor(sort, *last_key)
+
+        page = {'categories': result, 'next': next_cursor}
+        if not is_replica_session(session):
+            self.cache.set(key, page, tags=['list'], version=version)
+        return page
+
+    async def __transfer_records(self, session: AsyncSession, old_obj: Category, new_obj: Category) -> None:
+        """
+        Moves the file records, usage and counters of the old category to the new one in one transaction.
+        Running it again moves nothing: the old category has no records and zero counters.
+        """
+        await quota_manager.move_category(session, old_obj.id, new_obj.id)
+        await self.category_crud.transfer_counters(session, old_obj.id, new_obj.id)
+        self.__invalidate(old_obj.id, new_obj.id)
+        await search_manager.move_category(old_obj.id, new_obj.id)
+
+    async def __remove_directory(self, category_obj: Category) -> None:
+        """Removes the category directory with all files. A directory removed by an earlier run is skipped."""
+        try:
+            await self.storage.delete_category(category_obj.system_name, mode='all')
+        except NotADirectoryError:
+            pass
+
+    def __invalidate(self, *category_ids: int) -> None:
+        """Removes the cached reads of the categories and all cached pages of the category list."""
+        self.cache.invalidate('list', *(('category', category_id) for category_id in category_ids))
+
+    async def __get_or_raise(self, session: AsyncSession, name_or_id: str | int) -> Category:
+        """Returns the category database object or raises NotADirectoryError."""
+        category_obj = await self.category_crud.get_category(session, name_or_id)
+        if not category_obj:
+            raise NotADirectoryError
+        return category_obj
+
+    async def __count_files(self, categories: List[dict], objects: List[Category]) -> None:
+        """Replaces the counters in the category dictionaries with the numbers counted in the storage."""
+        stats = await self.storage.categories_stats([obj.system_name for obj in objects])
+        for category, obj in zip(categories, objects):
+            if stats[obj.system_name] is not None:
+                category['count_files'], category['size'] = stats[obj.system_name]
 
     async def __to_dict(self, category_obj: Category) -> dict[str, Any]:
         """Converts a database object into a dictionary."""
@@ -136,8 +362,24 @@ class CategoryManager(BaseCategoryManager):
                   'date_joined': category_obj.data_joined,
                   'creator': category_obj.creator,
                   'path': category_obj.path,
+                  'count_files': category_obj.files_count,
+                  'size': category_obj.files_size,
                   }
         return result
 
 
-category_manager = CategoryManager(STORAGE)
+category_manager = CategoryManager(STORAGE, CATEGORY_CACHE_SIZE, CATEGORY_CACHE_TTL)
+
+
+async def reconcile_counters_periodically(interval: int) -> None:
+    """
+    Runs the reconcile scan of the category counters at startup and then every 'interval' seconds.
+    Started as a background task for the lifetime of the application.
+    """
+    while True:
+        try:
+            async with async_session_maker() as session:
+                await category_manager.reconcile_counters(session)
+        except Exception:
+            logging.getLogger(__name__).exception("Reconcile of the category counters failed.")
+        await asyncio.sleep(interval)
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import String, Text, TIMESTAMP, ForeignKey
+from sqlalchemy import String, Text, TIMESTAMP, ForeignKey, BigInteger, Index, func
 from sqlalchemy.orm import mapped_column, Mapped, relationship
 
 from database import Base
@@ -17,7 +17,23 @@ class Category(Base):
     path: Mapped[str] = mapped_column(String(200), unique=True)
     data_joined = mapped_column(TIMESTAMP, default=datetime.utcnow)
     creator: Mapped[int] = mapped_column(ForeignKey(User.id, onupdate='CASCADE'))
+    # Counters of files in the category directory. Updated together with every storage mutation
+    # and corrected by the periodic reconcile scan.
+    files_count: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
+    files_size: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
     user: Mapped['User'] = relationship('User', back_populates='category')
 
+    # Indexes of the keyset-paginated category list, see CategoryCRUD.list_categories.
+    # Sorting by id and name uses the primary key and the unique constraint.
+    __table_args__ = (Index('ix_category_data_joined_id', 'data_joined', 'id'),
+                      Index('ix_category_files_count_id', 'files_count', 'id'),
+                      )
+
     def __repr__(self) -> str:
         return f"Category '{self.name}'. Date joined: {self.data_joined}. Creator: {self.creator}"
+
+
+# Case-insensitive name prefix filter: LIKE 'prefix%' on lower(name) with the text_pattern_ops operator class
+# uses the index whatever the database collation is.
+Index('ix_category_name_prefix', func.lower(Category.name).label('name_lower'),
+      postgresql_ops={'name_lower': 'text_pattern_ops'})
@@ -1,14 +1,19 @@
 # Routes for privileged users.
 
-from typing import Annotated, Type, Optional
+from typing import Annotated, Type, Optional, Literal
 from fastapi import APIRouter, HTTPException, Path, Depends, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
+from category.jobs import DELETE_CATEGORY_JOB
 from category.manager import category_manager
-from category.schema import CategoryCreateScheme, CategoryReadScheme, CategoryUpdateScheme
+from category.schema import CategoryCreateScheme, CategoryReadScheme, CategoryUpdateScheme, CategoryCacheStatsScheme
 from config import STORAGE
 from database import get_async_session
+from jobs.manager import job_manager
+from jobs.schema import JobReadScheme
 from user.user_dependencies import is_superuser_or_admin
 
 p_category_router = APIRouter(tags=['Admin and superuser', 'Category'], prefix='/category')
@@ -54,18 +59,52 @@ async def update_category(category_name_or_id: str | int,
 
 
 
-@p_category_router.delete('/delete/{category_name_or_id}', status_code=status.HTTP_204_NO_CONTENT)
+@p_category_router.delete('/delete/{category_name_or_id}', status_code=status.HTTP_204_NO_CONTENT,
+                          responses={status.HTTP_202_ACCEPTED: {'model': JobReadScheme}})
 async def delete_category(category_name_or_id: str | int,
+                          mode: Literal['empty', 'all', 'moveFiles'] = 'empty',
+                          new_category: Annotated[Optional[str], Query(min_length=1)] = None,
                           auth_user=Depends(is_superuser_or_admin),
                           session: AsyncSession = Depends(get_async_session)
                           ):
-    """Deletes a category if it is not empty."""
+    """
+    Deletes a category. Mode 'empty' deletes the category only if it is empty.
+    Modes 'all' (delete with files) and 'moveFiles' (move files to new_category first) run as a background job:
+    the response is 202 with the job, its progress is available at /jobs/{id}.
+    """
 
     try:
-        await category_manager.delete(session, category_name_or_id)
+        if mode == 'empty':
+            await category_manager.delete(session, category_name_or_id)
+            return
+
+        category_dict = await category_manager.get_category(session, category_name_or_id)
+        new_category_id = None
+        if mode == 'moveFiles':
+            if new_category is None:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                                    detail="new_category is required in mode 'moveFiles'.")
+            new_category_id = (await category_manager.get_category(session, new_category)).get('id')
+            if new_category_id == category_dict.get('id'):
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                    detail="Files cannot be moved to the deleted category.")
     except NotADirectoryError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail=f"Category {category_name_or_id} not found.")
+                            detail=f"Category {category_name_or_id} or {new_category} not found.")
     except IsADirectoryError:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT,
                             detail=f"Category {category_name_or_id} is not empty.")
+
+    job_dict = await job_manager.enqueue(session, DELETE_CATEGORY_JOB,
+                                         {'category_id': category_dict.get('id'), 'mode': mode,
+                                          'new_category_id': new_category_id},
+                                         auth_user.id)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=jsonable_encoder(JobReadScheme(**job_dict)),
+                        headers={'Location': f"/jobs/{job_dict.get('id')}"})
+
+
+@p_category_router.get('/cache')
+async def category_cache_stats(auth_user=Depends(is_superuser_or_admin)) -> CategoryCacheStatsScheme:
+    """Returns hit and miss counters of the category read cache of the process that serves the request."""
+    return CategoryCacheStatsScheme(**category_manager.cache.stats())
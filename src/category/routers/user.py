@@ -1,15 +1,15 @@
 # Routes for registered users.
 
-from typing import Annotated, Type, List
+from typing import Annotated, Type, List, Literal, Optional
 
 from asyncstdlib import any_iter
-from fastapi import APIRouter, HTTPException, Path, Depends
+from fastapi import APIRouter, HTTPException, Path, Depends, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from category.manager import category_manager
-from category.schema import CategoryInfoScheme
-from database import get_async_session
+from category.schema import CategoryInfoScheme, CategoryListScheme
+from database import get_async_read_session
 from user.auth_config import current_user
 
 category_router = APIRouter(tags=['User', 'Category'], prefix='/category')
@@ -18,14 +18,17 @@ category_router = APIRouter(tags=['User', 'Category'], prefix='/category')
 @category_router.get('/info/{category_name_or_id}')
 async def category_info(
         category_name_or_id: Annotated[str, Path(min_length=2)],
+        exact: bool = False,
         auth_user=Depends(current_user),
-        session: AsyncSession = Depends(get_async_session)) -> CategoryInfoScheme:
+        session: AsyncSession = Depends(get_async_read_session)) -> CategoryInfoScheme:
+    """Returns information about the category. With exact=true the files are counted in the storage."""
     try:
-        category_dict = await category_manager.get_category(session, category_name_or_id)
+        category_dict = await category_manager.get_category(session, category_name_or_id, exact)
         return CategoryInfoScheme(name=category_dict.get('name'),
                                   description=category_dict.get('description'),
                                   date_joined=category_dict.get('date_joined'),
-                                  count_files=category_dict.get('count_files')
+                                  count_files=category_dict.get('count_files'),
+                                  size=category_dict.get('size')
                                   )
     except NotADirectoryError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
@@ -33,24 +36,29 @@ async def category_info(
 
 
 @category_router.get('/all')
-async def all_categories(session: AsyncSession = Depends(get_async_session)) -> List[CategoryInfoScheme]:
-    """Returns a list with information about all categories."""
+async def all_categories(sort: Literal['id', 'name', 'date', 'files'] = 'id',
+                         order: Literal['asc', 'desc'] = 'asc',
+                         limit: Annotated[int, Query(ge=1, le=500)] = 50,
+                         cursor: Annotated[Optional[str], Query(min_length=1, max_length=1000)] = None,
+                         prefix: Annotated[Optional[str], Query(min_length=1, max_length=30)] = None,
+                         exact: bool = False,
+                         session: AsyncSession = Depends(get_async_read_session)) -> CategoryListScheme:
+    """
+    Returns a page of the category list. Pass the 'next' cursor of a page to get the next one
+    with the same sort and order. 'prefix' filters categories by the beginning of the name.
+    With exact=true the files of the page categories are counted in the storage in one batch.
+    """
     try:
-        categories = await category_manager.all_categories(session)
-        result: List[CategoryInfoScheme] = []
+        page = await category_manager.list_categories(session, sort, order == 'desc', limit, cursor, prefix, exact)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid cursor.")
 
-        categories = any_iter(categories)  # Get async iterator
-
-        async for cat in categories:
-            obj = CategoryInfoScheme(name=cat.get('name'),
+    categories = [CategoryInfoScheme(name=cat.get('name'),
                                      description=cat.get('description'),
                                      date_joined=cat.get('date_joined'),
-                                     count_files=cat.get('count_files')
+                                     count_files=cat.get('count_files'),
+                                     size=cat.get('size')
                                      )
-            result.append(obj)
-
-        return result
-
-    except NotADirectoryError:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
-                            detail="Categories not found.")
+                  for cat in page['categories']]
+    return CategoryListScheme(categories=categories, next=page['next'])
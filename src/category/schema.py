@@ -15,6 +15,14 @@ class CategoryReadScheme(BaseModel):
 class CategoryInfoScheme(CategoryReadScheme):
     """A schema for reading the category."""
     count_files: int = Field(ge=0, description='Number of files')
+    size: int = Field(ge=0, default=0, description='Total size of files in bytes')
+
+
+class CategoryListScheme(BaseModel):
+    """A schema for a page of the category list."""
+
+    categories: List[CategoryInfoScheme]
+    next: Optional[str] = Field(default=None, description='Cursor of the next page, None on the last page')
 
 
 class CategoryReadFullScheme(CategoryReadScheme):
@@ -40,3 +48,15 @@ class CategoryUpdateScheme(BaseModel):
     name: Optional[str] = Field(max_length=30, example='New name', default=None)
     description: Optional[str] = Field(min_length=3, max_length=500,
                                        example="Category new description. Up to 500 characters.", default=None)
+
+
+class CategoryCacheStatsScheme(BaseModel):
+    """A schema for the counters of the category read cache of one process."""
+
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    hit_ratio: float
+    evictions: int
+    invalidations: int
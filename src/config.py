@@ -12,8 +12,67 @@ DB_NAME = os.environ['DB_NAME']
 DB_USER = os.environ['DB_USER']
 DB_PASS = os.environ['DB_PASS']
 
+# Connection pool of the primary database: number of kept connections, extra connections under load,
+# seconds to wait for a free connection, check a connection before use, seconds after which a connection
+# is reopened (-1 - never). asyncpg caches prepared statements per connection: DB_STATEMENT_CACHE_SIZE
+# statements in asyncpg and DB_PREPARED_STATEMENT_CACHE_SIZE in SQLAlchemy. Set both to 0 behind pgbouncer
+# in transaction mode.
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', 'false').lower() in ('1', 'true', 'yes')
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', -1))
+DB_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_STATEMENT_CACHE_SIZE', 100))
+DB_PREPARED_STATEMENT_CACHE_SIZE = int(os.environ.get('DB_PREPARED_STATEMENT_CACHE_SIZE', 100))
+
+# Read replica for read-only routes. Without DB_READ_HOST they read from the primary database.
+# Name, user and password default to the primary ones. The pool of the replica is separate from the primary pool,
+# timeout, recycle and statement caches are the same, connections are always checked before use.
+# Reads go to the primary while the replica is more than DB_READ_MAX_LAG seconds behind or unavailable,
+# the lag is checked at most once per DB_READ_LAG_CHECK_INTERVAL seconds. DB_READ_USER needs pg_read_all_stats
+# (e.g. the pg_monitor role) to see whether the replica is streaming, otherwise reads stay on the primary.
+DB_READ_HOST = os.environ.get('DB_READ_HOST')
+DB_READ_PORT = os.environ.get('DB_READ_PORT', DB_PORT)
+DB_READ_NAME = os.environ.get('DB_READ_NAME', DB_NAME)
+DB_READ_USER = os.environ.get('DB_READ_USER', DB_USER)
+DB_READ_PASS = os.environ.get('DB_READ_PASS', DB_PASS)
+DB_READ_POOL_SIZE = int(os.environ.get('DB_READ_POOL_SIZE', 5))
+DB_READ_MAX_OVERFLOW = int(os.environ.get('DB_READ_MAX_OVERFLOW', 10))
+DB_READ_MAX_LAG = float(os.environ.get('DB_READ_MAX_LAG', 5))
+DB_READ_LAG_CHECK_INTERVAL = float(os.environ.get('DB_READ_LAG_CHECK_INTERVAL', 1))
+
 SECRET_AUTH = os.environ['SECRET_AUTH']
 LIFETIME_TOKEN = int(os.environ['LIFETIME_TOKEN'])
 
+# Interval in seconds between reconcile scans of the category file counters.
+COUNTERS_RECONCILE_INTERVAL = int(os.environ.get('COUNTERS_RECONCILE_INTERVAL', 3600))
+
+# Cache of category reads: maximum number of entries and time to live in seconds.
+# The cache is per process, other processes see a change after at most CATEGORY_CACHE_TTL seconds.
+CATEGORY_CACHE_SIZE = int(os.environ.get('CATEGORY_CACHE_SIZE', 1024))
+CATEGORY_CACHE_TTL = float(os.environ.get('CATEGORY_CACHE_TTL', 5))
+
+# Cache of authenticated users: maximum number of users and time to live in seconds. 0 - disabled.
+# A change of a user made by another process is seen after at most USER_CACHE_TTL seconds.
+USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 0))
+
+# Number of processes that hash and verify passwords.
+PASSWORD_WORKERS = int(os.environ.get('PASSWORD_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+
+# Background jobs: number of jobs run at the same time by one process, seconds between checks of the job table
+# when idle, seconds without heartbeat after which a running job is taken by another worker.
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))
+JOB_POLL_INTERVAL = float(os.environ.get('JOB_POLL_INTERVAL', 5))
+JOB_STALE_TIMEOUT = int(os.environ.get('JOB_STALE_TIMEOUT', 300))
+
+# Extensions of the text files that users are allowed to store.
+ALLOWED_EXTENSIONS = ['txt', 'pdf']
+
 current_dir = os.path.dirname(os.path.abspath(__file__))
-STORAGE = StorageManager(current_dir, 'STORAGE')
\ No newline at end of file
+
+# Full-text search index of the stored text files and the number of processes that tokenize files.
+SEARCH_INDEX_PATH = os.environ.get('SEARCH_INDEX_PATH', os.path.join(current_dir, 'search_index.sqlite3'))
+SEARCH_WORKERS = int(os.environ.get('SEARCH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+
+STORAGE = StorageManager(current_dir, 'STORAGE', ALLOWED_EXTENSIONS)
\ No newline at end of file
@@ -1,14 +1,101 @@
-from typing import AsyncGenerator
+import logging
+import time
+from typing import AsyncGenerator, Any
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncEngine
 from sqlalchemy.orm import  DeclarativeBase
 
 from config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+from config import DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_PRE_PING, DB_POOL_RECYCLE
+from config import DB_STATEMENT_CACHE_SIZE, DB_PREPARED_STATEMENT_CACHE_SIZE
+from config import (DB_READ_HOST, DB_READ_PORT, DB_READ_NAME, DB_READ_USER, DB_READ_PASS, DB_READ_POOL_SIZE,
+                    DB_READ_MAX_OVERFLOW, DB_READ_MAX_LAG, DB_READ_LAG_CHECK_INTERVAL)
+from utils.pool_metrics import InstrumentedPool, PoolMetrics
+from utils.single_flight import SingleFlight
 
 DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-engine = create_async_engine(DATABASE_URL, max_overflow=10) # echo=True
+# Settings shared by the engines of the primary and the replica.
+ENGINE_OPTIONS = {'poolclass': InstrumentedPool,
+                  'pool_timeout': DB_POOL_TIMEOUT,
+                  'pool_recycle': DB_POOL_RECYCLE,
+                  'connect_args': {'statement_cache_size': DB_STATEMENT_CACHE_SIZE,
+                                   'prepared_statement_cache_size': DB_PREPARED_STATEMENT_CACHE_SIZE},
+                  }
+
+engine = create_async_engine(DATABASE_URL, pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW,
+                             pool_pre_ping=DB_POOL_PRE_PING, **ENGINE_OPTIONS)  # echo=True
 async_session_maker = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+pool_metrics = PoolMetrics()
+pool_metrics.attach(engine)
+
+# Read replica, None if it is not configured.
+read_engine: AsyncEngine | None = None
+async_read_session_maker = async_session_maker
+read_pool_metrics: PoolMetrics | None = None
+if DB_READ_HOST:
+    READ_DATABASE_URL = (f"postgresql+asyncpg://{DB_READ_USER}:{DB_READ_PASS}@{DB_READ_HOST}:{DB_READ_PORT}/"
+                         f"{DB_READ_NAME}")
+    read_engine = create_async_engine(READ_DATABASE_URL, pool_size=DB_READ_POOL_SIZE,
+                                      max_overflow=DB_READ_MAX_OVERFLOW, pool_pre_ping=True, **ENGINE_OPTIONS)
+    async_read_session_maker = async_sessionmaker(read_engine, class_=AsyncSession, expire_on_commit=False)
+    read_pool_metrics = PoolMetrics()
+    read_pool_metrics.attach(read_engine)
+
+# Seconds the replica is behind the primary. 0 if all WAL received from the primary has been replayed
+# (pg_last_xact_replay_timestamp alone grows while the primary is idle) or if the server is not a replica.
+# NULL - the replica is not streaming from the primary: with a disconnected WAL receiver the received and replayed
+# positions stay equal however far the primary has moved on. The status of the WAL receiver is visible only to
+# roles with pg_read_all_stats (e.g. pg_monitor), without it the replica is never used.
+REPLICATION_LAG_QUERY = text("SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+                             "WHEN (SELECT status FROM pg_stat_wal_receiver) IS DISTINCT FROM 'streaming' THEN NULL "
+                             "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                             "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END")
+
+class ReplicaRouter:
+    """Decides whether read-only sessions can use the replica, from its replication lag."""
+
+    def __init__(self, read_engine: AsyncEngine | None, max_lag: float, check_interval: float):
+        """
+        :param read_engine: Engine of the replica. None - all sessions use the primary.
+        :param max_lag: Maximum replication lag in seconds at which the replica is used.
+        :param check_interval: Minimum number of seconds between checks of the lag.
+        """
+        self.read_engine = read_engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.lag: float | None = None  # None - the replica is unavailable or not checked yet.
+        self.__checked_at: float | None = None
+        self.__flight = SingleFlight()
+
+    def __repr__(self):
+        return f"Replica router. Replica: {self.read_engine is not None}. Lag: {self.lag} s, maximum {self.max_lag} s"
+
+    async def use_replica(self) -> bool:
+        """Returns True if the replica is configured and not more than max_lag seconds behind the primary."""
+        if self.read_engine is None:
+            return False
+        if self.__checked_at is None or time.monotonic() - self.__checked_at >= self.check_interval:
+            await self.__flight.do('lag', self.__check_lag)
+        return self.lag is not None and self.lag <= self.max_lag
+
+    async def __check_lag(self) -> None:
+        try:
+            async with self.read_engine.connect() as connection:
+                lag = await connection.scalar(REPLICATION_LAG_QUERY)
+        except Exception:
+            if self.lag is not None:
+                logging.getLogger(__name__).exception("Read replica is unavailable, reading from the primary.")
+            lag = None
+        else:
+            if lag is None and self.lag is not None:
+                logging.getLogger(__name__).warning("Read replica is not streaming, reading from the primary.")
+        self.lag = None if lag is None else float(lag)
+        self.__checked_at = time.monotonic()
+
+
+replica_router = ReplicaRouter(read_engine, DB_READ_MAX_LAG, DB_READ_LAG_CHECK_INTERVAL)
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -16,7 +103,28 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
-class Base(DeclarativeBase):
-    pass
+async def get_async_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only routes. Uses the read replica while it is fresh enough, otherwise the primary.
+    Data written by the request user may not be visible yet: up to DB_READ_MAX_LAG seconds.
+    """
+    maker = async_read_session_maker if await replica_router.use_replica() else async_session_maker
+    async with maker() as session:
+        yield session
+
+
+def is_replica_session(session: AsyncSession) -> bool:
+    """Returns True if the session reads from the replica: its data may be up to DB_READ_MAX_LAG seconds old."""
+    return read_engine is not None and session.bind is read_engine
 
 
+def pools_stats() -> dict[str, Any]:
+    """Returns the metrics of the connection pools of this process: 'primary' and 'read' if a replica is used."""
+    result = {'primary': pool_metrics.stats(engine)}
+    if read_engine is not None:
+        result['read'] = read_pool_metrics.stats(read_engine)
+    return result
+
+
+class Base(DeclarativeBase):
+    pass
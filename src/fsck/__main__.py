@@ -0,0 +1,48 @@
+# Checks the storage tree against the database.
+# Usage (from the src directory): python -m fsck [--repair] [--workers N] [--verbose]
+
+import argparse
+import asyncio
+
+from config import STORAGE
+from database import async_session_maker
+from fsck.checker import check_storage
+
+
+async def main(repair: bool, workers: int, verbose: bool) -> int:
+    async with async_session_maker() as session:
+        report = await check_storage(session, STORAGE.storage.path, repair, workers)
+
+    print(f"Checked {report.categories} categories, {report.files} files.")
+    sections = (('Orphan directories', report.orphan_dirs),
+                ('Categories without directory', report.missing_dirs),
+                ('Wrong category paths', report.path_drift),
+                ('Counter drift', report.counter_drift),
+                ('Catalog records without file', report.missing_files),
+                ('Catalog size drift', report.size_drift))
+    for title, problems in sections:
+        print(f"{title}: {len(problems)}")
+        if verbose:
+            for problem in problems:
+                print(f"    {problem}")
+    untracked = sum(report.untracked_files.values())
+    print(f"Files without catalog record: {untracked} (not repaired)")
+    if verbose:
+        for category, count in report.untracked_files.items():
+            print(f"    {category}: {count}")
+    for action in report.repaired:
+        print(f"Repaired: {action}")
+
+    return 1 if report.count_problems() and not repair else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m fsck',
+                                     description="Check the storage tree against the database. Run with --repair "
+                                                 "when uploads are stopped: files written during the check "
+                                                 "are reported as drift.")
+    parser.add_argument('--repair', action='store_true', help="repair the problems found")
+    parser.add_argument('--workers', type=int, default=8, help="number of directories scanned at the same time")
+    parser.add_argument('--verbose', '-v', action='store_true', help="print every problem")
+    args = parser.parse_args()
+    raise SystemExit(asyncio.run(main(args.repair, args.workers, args.verbose)))
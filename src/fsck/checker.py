@@ -0,0 +1,170 @@
+# Consistency check of the database against the storage tree.
+# Compares the category rows and the file catalog with the directories of STORAGE and finds:
+# directories without a category (e.g. create failed after mkdir), categories without a directory,
+# a wrong Category.path, drifted counters, catalog records without a file and files without a record.
+# With repair=True everything is fixed except files without a record: their owner is unknown.
+
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from NEW_FileStorage.storage.ulid import new_ulid
+from category.crud import CategoryCRUD
+from category.models import Category
+from fsck.scanner import list_storage_dirs, scan_categories
+from quota.crud import QuotaCRUD
+from search.manager import search_manager
+from user_text_files.crud import FileCRUD
+from user_text_files.models import File
+
+# Hidden directory in the storage root where non-empty orphan directories are moved on repair,
+# as <name>.<ULID>: a directory with the same name may be moved there again by a later run.
+ORPHANS_DIR = '.orphans'
+
+
+class FsckReport:
+    """Problems found by the check and the repairs made."""
+
+    def __init__(self):
+        self.categories = 0
+        self.files = 0
+        self.orphan_dirs: list[str] = []
+        self.missing_dirs: list[str] = []
+        self.path_drift: list[tuple[str, str, str]] = []
+        self.counter_drift: list[tuple[str, tuple[int, int], tuple[int, int]]] = []
+        self.missing_files: list[tuple[str, str]] = []
+        self.size_drift: list[tuple[str, str, int, int]] = []
+        self.untracked_files: dict[str, int] = {}
+        self.repaired: list[str] = []
+
+    def __repr__(self):
+        return (f"FsckReport: {self.categories} categories, {self.files} files. "
+                f"Problems: {self.count_problems()}. Repaired: {len(self.repaired)}")
+
+    def count_problems(self) -> int:
+        """Returns the number of problems that can be repaired."""
+        return (len(self.orphan_dirs) + len(self.missing_dirs) + len(self.path_drift) + len(self.counter_drift)
+                + len(self.missing_files) + len(self.size_drift))
+
+    def to_dict(self) -> dict[str, Any]:
+        return {'categories': self.categories,
+                'files': self.files,
+                'orphan_dirs': self.orphan_dirs,
+                'missing_dirs': self.missing_dirs,
+                'path_drift': self.path_drift,
+                'counter_drift': self.counter_drift,
+                'missing_files': self.missing_files,
+                'size_drift': self.size_drift,
+                'untracked_files': self.untracked_files,
+                'repaired': self.repaired,
+                }
+
+
+def _move_orphan(storage_path: str, name: str) -> str:
+    """
+    Removes an empty orphan directory or moves it to the hidden orphans directory under a unique name. Blocking.
+    """
+    path = os.path.join(storage_path, name)
+    try:
+        os.rmdir(path)
+        return f"removed empty directory {path}"
+    except OSError:
+        pass
+    orphans_path = os.path.join(storage_path, ORPHANS_DIR)
+    os.makedirs(orphans_path, exist_ok=True)
+    dst = os.path.join(orphans_path, f'{name}.{new_ulid()}')
+    os.rename(path, dst)
+    return f"moved directory {path} to {dst}"
+
+
+async def check_storage(session: AsyncSession, storage_path: str, repair: bool = False,
+                        workers: int = 8) -> FsckReport:
+    """
+    Checks the storage tree against the database.
+    :param session: AsyncSession instance.
+    :param storage_path: Absolute path to the storage root.
+    :param repair: Repair the problems found. Default False - only report them.
+    :param workers: Number of directories scanned at the same time.
+    :return: FsckReport.
+    """
+    report = FsckReport()
+    categories = (await session.scalars(select(Category).order_by(Category.id))).all()
+    report.categories = len(categories)
+
+    # Directories without a category.
+    known = {category.system_name for category in categories}
+    for name in sorted(set(await asyncio.to_thread(list_storage_dirs, storage_path)) - known):
+        report.orphan_dirs.append(os.path.join(storage_path, name))
+        if repair:
+            report.repaired.append(await asyncio.to_thread(_move_orphan, storage_path, name))
+
+    by_path = {os.path.join(storage_path, category.system_name): category for category in categories}
+    async for path, files in scan_categories(by_path, workers):
+        category = by_path[path]
+        if category.path != path:
+            report.path_drift.append((category.name, category.path, path))
+            if repair:
+                category.path = path
+                report.repaired.append(f"set path of category {category.name} to {path}")
+
+        if files is None:
+            report.missing_dirs.append(category.name)
+            files = {}
+            if repair:
+                await asyncio.to_thread(os.makedirs, path, exist_ok=True)
+                report.repaired.append(f"created directory {path} of category {category.name}")
+        report.files += len(files)
+
+        await _check_catalog(session, category, files, report, repair)
+
+        disk_counters = (len(files), sum(files.values()))
+        if disk_counters != (category.files_count, category.files_size):
+            report.counter_drift.append((category.name, (category.files_count, category.files_size), disk_counters))
+            if repair:
+                await CategoryCRUD.set_counters(session, category.id, *disk_counters, commit=False)
+                report.repaired.append(f"set counters of category {category.name} to {disk_counters}")
+
+    if repair:
+        await session.commit()
+    return report
+
+
+async def _check_catalog(session: AsyncSession, category: Category, files: dict[str, int], report: FsckReport,
+                         repair: bool) -> None:
+    """Compares the catalog records of the category with its files on disk."""
+    untracked = dict(files)
+    missing_ids: list[int] = []
+    missing_names: list[str] = []
+    usage_delta: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+
+    rows = await session.execute(select(File.id, File.name, File.size, File.owner)
+                                 .where(File.category_id == category.id))
+    for row in rows.all():
+        size = untracked.pop(row.name, None)
+        if size is None:
+            report.missing_files.append((category.name, row.name))
+            missing_ids.append(row.id)
+            missing_names.append(row.name)
+            usage_delta[row.owner][0] -= 1
+            usage_delta[row.owner][1] -= row.size
+        elif size != row.size:
+            report.size_drift.append((category.name, row.name, row.size, size))
+            if repair:
+                await FileCRUD.set_size(session, row.id, size, commit=False)
+                report.repaired.append(f"set size of {category.name}/{row.name} to {size}")
+            usage_delta[row.owner][1] += size - row.size
+    if untracked:
+        report.untracked_files[category.name] = len(untracked)
+
+    if repair:
+        await FileCRUD.delete_files(session, missing_ids, commit=False)
+        for name in missing_names:
+            await search_manager.delete_file(category.id, name)
+        if missing_ids:
+            report.repaired.append(f"deleted {len(missing_ids)} records of missing files of category {category.name}")
+        for owner, (count_delta, size_delta) in usage_delta.items():
+            await QuotaCRUD.change_usage(session, owner, count_delta, size_delta, commit=False)
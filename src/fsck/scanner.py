@@ -0,0 +1,57 @@
+# Parallel walk of the storage tree for the consistency check (fsck).
+# Each category directory is read in one os.scandir pass in a thread pool, at most 'workers' directories
+# at a time. Results are yielded as soon as they are ready, so the comparison with the database runs while
+# the disk is read and only the files of a few categories are held in memory.
+
+import asyncio
+import itertools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterable
+
+from NEW_FileStorage.storage.category_scanner import iter_entries
+
+
+def list_storage_dirs(storage_path: str) -> list[str]:
+    """Returns names of all directories in the storage root except hidden service directories. Blocking."""
+    with os.scandir(storage_path) as entries:
+        return [entry.name for entry in entries if not entry.name.startswith('.') and entry.is_dir()]
+
+
+def scan_category(path: str) -> dict[str, int] | None:
+    """
+    Reads the files of a category directory. Blocking, runs in a worker thread.
+    :param path: Absolute path to the category.
+    :return: Dictionary {file name: size in bytes} or None if the directory does not exist.
+    """
+    try:
+        return {entry.name: entry.stat().st_size for entry in iter_entries(path)}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+async def scan_categories(paths: Iterable[str],
+                          workers: int = 8) -> AsyncIterator[tuple[str, dict[str, int] | None]]:
+    """
+    Scans category directories concurrently and yields (path, files) in the order the scans finish,
+    see scan_category. At most 2 * workers results are pending at any time.
+    :param paths: Absolute paths to the categories.
+    :param workers: Number of worker threads.
+    :raises ValueError: If workers is less than 1.
+    """
+    if workers < 1:
+        raise ValueError("workers must be greater than 0.")
+
+    loop = asyncio.get_running_loop()
+    paths = iter(paths)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fsck') as executor:
+        def submit(path: str) -> asyncio.Future:
+            return loop.run_in_executor(executor, lambda: (path, scan_category(path)))
+
+        pending = {submit(path) for path in itertools.islice(paths, workers * 2)}
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                for path in itertools.islice(paths, 1):
+                    pending.add(submit(path))
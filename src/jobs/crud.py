@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import update, select, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from jobs.models import Job
+
+FINISHED_STATUSES = ('done', 'failed', 'cancelled')
+
+
+class JobCRUD:
+    def __init__(self):
+        pass
+
+    @staticmethod
+    async def create_job(session: AsyncSession, kind: str, params: dict[str, Any], creator: int | None) -> Job:
+        """
+        Creates a queued job.
+        :param session: AsyncSession instance.
+        :param kind: Name of the job handler.
+        :param params: Keyword arguments of the handler, must be JSON serializable.
+        :param creator: id of the user who created the job.
+        :return: Job db object.
+        """
+        job = Job(kind=kind, params=params, creator=creator, status='queued')
+        session.add(job)
+        await session.commit()
+        return job
+
+    @staticmethod
+    async def get_job(session: AsyncSession, job_id: int) -> Job | None:
+        """Returns the job by id or None."""
+        return await session.get(Job, job_id)
+
+    @staticmethod
+    async def claim_job(session: AsyncSession, kinds: list[str], stale_timeout: int) -> Job | None:
+        """
+        Takes the oldest queued job, or a running job whose worker has stopped sending heartbeats,
+        and marks it as running. Concurrent workers skip rows locked by each other.
+        :param session: AsyncSession instance.
+        :param kinds: Job kinds that the worker can run.
+        :param stale_timeout: Seconds without heartbeat after which a running job is taken again.
+        :return: Claimed job or None if there is nothing to run.
+        """
+        now = datetime.utcnow()
+        candidate = (select(Job.id)
+                     .where(Job.kind.in_(kinds),
+                            or_(Job.status == 'queued',
+                                and_(Job.status == 'running', Job.updated_at < now - timedelta(seconds=stale_timeout))))
+                     .order_by(Job.id)
+                     .limit(1)
+                     .with_for_update(skip_locked=True)
+                     .scalar_subquery())
+        stmt = (update(Job).where(Job.id == candidate)
+                .values(status='running', started_at=now, updated_at=now)
+                .returning(Job))
+        job = await session.scalar(stmt)
+        await session.commit()
+        return job
+
+    @staticmethod
+    async def update_progress(session: AsyncSession, job_id: int, done: int, total: int | None) -> bool:
+        """
+        Saves the progress of a running job and its heartbeat.
+        :return: True if cancellation of the job was requested.
+        """
+        stmt = (update(Job).where(Job.id == job_id)
+                .values(progress_done=done, progress_total=total, updated_at=datetime.utcnow())
+                .returning(Job.cancel_requested))
+        cancel_requested = await session.scalar(stmt)
+        await session.commit()
+        return bool(cancel_requested)
+
+    @staticmethod
+    async def finish_job(session: AsyncSession, job_id: int, status: str, error: str | None = None) -> None:
+        """Marks the job as finished with the status 'done', 'failed' or 'cancelled'."""
+        now = datetime.utcnow()
+        stmt = (update(Job).where(Job.id == job_id)
+                .values(status=status, error=error, finished_at=now, updated_at=now))
+        await session.execute(stmt)
+        await session.commit()
+
+    @staticmethod
+    async def request_cancel(session: AsyncSession, job_id: int) -> Job | None:
+        """
+        Cancels a queued job at once, a running job is cancelled by its worker at the next heartbeat.
+        Finished jobs are not changed.
+        :return: Job db object or None if the job is not found.
+        """
+        now = datetime.utcnow()
+        await session.execute(update(Job).where(Job.id == job_id, Job.status == 'queued')
+                              .values(status='cancelled', cancel_requested=True, finished_at=now, updated_at=now))
+        await session.execute(update(Job).where(Job.id == job_id, Job.status == 'running')
+                              .values(cancel_requested=True))
+        await session.commit()
+        job = await session.get(Job, job_id)
+        if job is not None:
+            await session.refresh(job)
+        return job
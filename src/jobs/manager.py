@@ -0,0 +1,203 @@
+# Manage background jobs.
+# Heavy storage operations are stored in the job table and run by a fixed number of worker tasks,
+# so the request that starts them returns at once. Workers of all application processes take jobs
+# from the same table, a job left by a stopped process is taken again after JOB_STALE_TIMEOUT.
+# Handlers must be safe to run again from the start: a job may be interrupted at any point.
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALE_TIMEOUT
+from database import async_session_maker
+from jobs.crud import JobCRUD
+from jobs.models import Job
+
+# Seconds between progress updates of a running job. Cancellation requests are checked at the same time.
+PROGRESS_INTERVAL = 1
+
+
+class JobContext:
+    """Passed to a job handler to report progress."""
+
+    def __init__(self, job_id: int):
+        self.job_id = job_id
+        self.done = 0
+        self.total: int | None = None
+
+    def __repr__(self):
+        return f"Job {self.job_id}: {self.done} of {self.total}"
+
+    def set_progress(self, done: int, total: int | None = None) -> None:
+        """Saves the progress in memory, the worker writes it to the job table."""
+        self.done = done
+        if total is not None:
+            self.total = total
+
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+class JobManager:
+    """Queues jobs in the database and runs them with a bounded pool of worker tasks."""
+
+    def __init__(self, workers: int, poll_interval: float, stale_timeout: int):
+        """
+        :param workers: Number of jobs run at the same time by this process.
+        :param poll_interval: Seconds between checks of the job table when the workers are idle.
+        :param stale_timeout: Seconds without heartbeat after which a running job is taken again.
+        :raises ValueError: If workers is less than 1.
+        """
+        if workers < 1:
+            raise ValueError("workers must be greater than 0.")
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.job_crud = JobCRUD()
+        self.__handlers: dict[str, Handler] = {}
+        self.__wakeup = asyncio.Event()
+        self.__tasks: list[asyncio.Task] = []
+
+    def __repr__(self):
+        return f"Object of management background jobs. Workers: {self.workers}. Handlers: {list(self.__handlers)}"
+
+    def register(self, kind: str) -> Callable[[Handler], Handler]:
+        """
+        Decorator, registers a job handler. The handler is called as
+        handler(context: JobContext, session: AsyncSession, **params).
+        :raises ValueError: If a handler of this kind is already registered.
+        """
+        def decorator(handler: Handler) -> Handler:
+            if kind in self.__handlers:
+                raise ValueError(f"Handler of the job '{kind}' is already registered.")
+            self.__handlers[kind] = handler
+            return handler
+        return decorator
+
+    async def enqueue(self, session: AsyncSession, kind: str, params: dict[str, Any],
+                      creator: int | None = None) -> dict[str, Any]:
+        """
+        Adds a job to the queue.
+        :param session: AsyncSession instance.
+        :param kind: Name of a registered handler.
+        :param params: Keyword arguments of the handler, must be JSON serializable.
+        :param creator: id of the user who created the job.
+        :return: A dictionary with job data.
+        :raises ValueError: If there is no handler of this kind.
+        """
+        if kind not in self.__handlers:
+            raise ValueError(f"Unknown job '{kind}'.")
+        job = await self.job_crud.create_job(session, kind, params, creator)
+        self.__wakeup.set()
+        return self.__to_dict(job)
+
+    async def get_job(self, session: AsyncSession, job_id: int) -> dict[str, Any]:
+        """
+        Returns information about the job.
+        :raises LookupError: If the job is not found.
+        """
+        job = await self.job_crud.get_job(session, job_id)
+        if job is None:
+            raise LookupError(f"Job {job_id} not found.")
+        return self.__to_dict(job)
+
+    async def cancel(self, session: AsyncSession, job_id: int) -> dict[str, Any]:
+        """
+        Requests cancellation of the job. A queued job is cancelled at once, a running job
+        within PROGRESS_INTERVAL seconds. Finished jobs are not changed.
+        :raises LookupError: If the job is not found.
+        """
+        job = await self.job_crud.request_cancel(session, job_id)
+        if job is None:
+            raise LookupError(f"Job {job_id} not found.")
+        return self.__to_dict(job)
+
+    def start(self) -> None:
+        """Starts the worker tasks. Called at application startup."""
+        if not self.__tasks:
+            self.__tasks = [asyncio.create_task(self.__worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Stops the worker tasks. Interrupted jobs are taken again after JOB_STALE_TIMEOUT."""
+        for task in self.__tasks:
+            task.cancel()
+        await asyncio.gather(*self.__tasks, return_exceptions=True)
+        self.__tasks = []
+
+    async def __worker(self) -> None:
+        """Takes jobs from the table one by one and waits for new jobs when the queue is empty."""
+        logger = logging.getLogger(__name__)
+        while True:
+            try:
+                async with async_session_maker() as session:
+                    job = await self.job_crud.claim_job(session, list(self.__handlers), self.stale_timeout)
+            except Exception:
+                logger.exception("Failed to take a job from the queue.")
+                job = None
+
+            if job is not None:
+                try:
+                    await self.__run(job)
+                except Exception:
+                    logger.exception("Failed to save the result of job %s.", job.id)
+                continue
+
+            self.__wakeup.clear()
+            try:
+                await asyncio.wait_for(self.__wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def __run(self, job: Job) -> None:
+        """Runs the job handler, reports its progress and saves the result."""
+        logger = logging.getLogger(__name__)
+        context = JobContext(job.id)
+        task = asyncio.create_task(self.__call_handler(job, context))
+        try:
+            while not task.done():
+                await asyncio.wait({task}, timeout=PROGRESS_INTERVAL)
+                if task.done():
+                    break
+                try:
+                    async with async_session_maker() as session:
+                        if await self.job_crud.update_progress(session, job.id, context.done, context.total):
+                            task.cancel()
+                except Exception:
+                    logger.exception("Failed to save the progress of job %s.", job.id)
+        except asyncio.CancelledError:  # the worker is stopped, the job stays 'running' and is taken again later.
+            task.cancel()
+            raise
+
+        if task.cancelled():
+            status, error = 'cancelled', None
+        elif task.exception() is not None:
+            status, error = 'failed', repr(task.exception())
+            logger.error("Job %s failed.", job.id, exc_info=task.exception())
+        else:
+            status, error = 'done', None
+        async with async_session_maker() as session:
+            await self.job_crud.update_progress(session, job.id, context.done, context.total)
+            await self.job_crud.finish_job(session, job.id, status, error)
+
+    async def __call_handler(self, job: Job, context: JobContext) -> None:
+        async with async_session_maker() as session:
+            await self.__handlers[job.kind](context, session, **job.params)
+
+    @staticmethod
+    def __to_dict(job: Job) -> dict[str, Any]:
+        """Converts a database object into a dictionary."""
+        return {'id': job.id,
+                'kind': job.kind,
+                'status': job.status,
+                'progress_done': job.progress_done,
+                'progress_total': job.progress_total,
+                'error': job.error,
+                'created_at': job.created_at,
+                'started_at': job.started_at,
+                'finished_at': job.finished_at,
+                }
+
+
+job_manager = JobManager(JOB_WORKERS, JOB_POLL_INTERVAL, JOB_STALE_TIMEOUT)
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+from sqlalchemy import String, Text, TIMESTAMP, ForeignKey, BigInteger, JSON, Boolean, Index
+from sqlalchemy.orm import mapped_column, Mapped
+
+from database import Base
+from user.models import User
+
+
+class Job(Base):
+    """A background job model. Jobs are claimed by the workers of any application process."""
+    __tablename__ = 'job'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement="auto")
+    kind: Mapped[str] = mapped_column(String(50))
+    params: Mapped[dict] = mapped_column(JSON, default=dict)
+    # queued, running, done, failed, cancelled.
+    status: Mapped[str] = mapped_column(String(20), default='queued', server_default='queued')
+    progress_done: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
+    progress_total: Mapped[int] = mapped_column(BigInteger, nullable=True)
+    error: Mapped[str] = mapped_column(Text(), nullable=True)
+    cancel_requested: Mapped[bool] = mapped_column(Boolean, default=False, server_default='false')
+    creator: Mapped[int] = mapped_column(ForeignKey(User.id, onupdate='CASCADE', ondelete='SET NULL'), nullable=True)
+    created_at = mapped_column(TIMESTAMP, default=datetime.utcnow)
+    started_at = mapped_column(TIMESTAMP, nullable=True)
+    finished_at = mapped_column(TIMESTAMP, nullable=True)
+    # Heartbeat of the worker running the job. A running job without heartbeat is taken by another worker.
+    updated_at = mapped_column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (Index('ix_job_status', 'status'),)
+
+    def __repr__(self) -> str:
+        return (f"Job {self.id} '{self.kind}'. Status: {self.status}. "
+                f"Progress: {self.progress_done}/{self.progress_total}")
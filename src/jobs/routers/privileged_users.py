@@ -0,0 +1,35 @@
+# Routes for privileged users.
+
+from fastapi import APIRouter, HTTPException, Depends, Path
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+from typing import Annotated
+
+from database import get_async_session
+from jobs.manager import job_manager
+from jobs.schema import JobReadScheme
+from user.user_dependencies import is_superuser_or_admin
+
+p_jobs_router = APIRouter(tags=['Admin and superuser', 'Jobs'], prefix='/jobs')
+
+
+@p_jobs_router.get('/{job_id}')
+async def job_info(job_id: Annotated[int, Path(ge=1)],
+                   auth_user=Depends(is_superuser_or_admin),
+                   session: AsyncSession = Depends(get_async_session)) -> JobReadScheme:
+    """Returns the status and progress of a background job."""
+    try:
+        return JobReadScheme(**await job_manager.get_job(session, job_id))
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found.")
+
+
+@p_jobs_router.post('/{job_id}/cancel', status_code=status.HTTP_202_ACCEPTED)
+async def cancel_job(job_id: Annotated[int, Path(ge=1)],
+                     auth_user=Depends(is_superuser_or_admin),
+                     session: AsyncSession = Depends(get_async_session)) -> JobReadScheme:
+    """Requests cancellation of a background job. A running job stops within a second."""
+    try:
+        return JobReadScheme(**await job_manager.cancel(session, job_id))
+    except LookupError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found.")
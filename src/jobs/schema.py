@@ -0,0 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class JobReadScheme(BaseModel):
+    """A schema for reading the background job."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    kind: str
+    status: str = Field(description='queued, running, done, failed or cancelled')
+    progress_done: int = Field(ge=0, description='Number of processed items')
+    progress_total: Optional[int] = Field(default=None, description='Total number of items, if known')
+    error: Optional[str] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
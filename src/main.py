@@ -1,13 +1,43 @@
 # python 3.11.1
 
+import asyncio
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from category.manager import reconcile_counters_periodically
 from category.routers.privileged_users import p_category_router
 from category.routers.user import category_router
+from config import COUNTERS_RECONCILE_INTERVAL
+from database import async_session_maker
+from jobs.manager import job_manager
+from jobs.routers.privileged_users import p_jobs_router
+from monitoring.routers.privileged_users import p_monitoring_router
+from search.manager import search_manager
+from search.routers.user import search_router
+from user.passwords import password_service
 from user.routers.privileged_users import admin_router
 from user.routers.user import user_router
+from user.statuses import status_catalog
+from user_text_files.routers.user import text_files_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Loads the status catalog, starts and stops the password workers and the background tasks of the application."""
+    async with async_session_maker() as session:
+        await status_catalog.load(session)
+    password_service.start()
+    reconcile_task = asyncio.create_task(reconcile_counters_periodically(COUNTERS_RECONCILE_INTERVAL))
+    job_manager.start()
+    yield
+    reconcile_task.cancel()
+    await job_manager.stop()
+    await search_manager.shutdown()
+    await password_service.shutdown()
+
 
-app = FastAPI(title="Book storage")
+app = FastAPI(title="Book storage", lifespan=lifespan)
 
 
 @app.get('/')
@@ -19,3 +49,7 @@ app.include_router(user_router)
 app.include_router(admin_router)
 app.include_router(category_router)
 app.include_router(p_category_router)
+app.include_router(text_files_router)
+app.include_router(search_router)
+app.include_router(p_jobs_router)
+app.include_router(p_monitoring_router)
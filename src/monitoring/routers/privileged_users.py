@@ -0,0 +1,20 @@
+# Routes for privileged users.
+
+from typing import Any
+
+from fastapi import APIRouter, Depends
+
+from database import pools_stats
+from user.user_dependencies import is_superuser
+
+p_monitoring_router = APIRouter(tags=['Admin and superuser', 'Monitoring'], prefix='/internal')
+
+
+@p_monitoring_router.get('/db/pools')
+async def db_pools(auth_user=Depends(is_superuser)) -> dict[str, Any]:
+    """
+    Returns the metrics of the database connection pools of the process that serves the request:
+    checkouts, checkout wait time histogram in seconds, overflow use, timeouts, opened, closed and
+    invalidated connections.
+    """
+    return pools_stats()
@@ -0,0 +1,109 @@
+from typing import Any, Sequence
+
+from sqlalchemy import select, update, or_, values, column, Integer, BigInteger
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from quota.models import UserUsage
+from user.models import Status
+
+# Rows of one UPDATE ... FROM (VALUES ...) in set_usage. 3 parameters a row: a PostgreSQL statement takes at most 32767.
+SET_USAGE_CHUNK_SIZE = 5000
+
+
+class QuotaCRUD:
+    def __init__(self):
+        pass
+
+    @staticmethod
+    async def get_usage_and_limits(session: AsyncSession, user_id: int, status_id: int) -> Any:
+        """
+        Reads the usage counters of the user together with the limits of the user status in one query.
+        :param session: AsyncSession instance.
+        :param user_id: User id.
+        :param status_id: Status id of the user.
+        :return: Row (files_count, files_size, max_size_text_file, max_count_text_file, max_size_all_text_files)
+                 or None if the status is not found. Counters of a user without uploads are 0.
+        """
+        stmt = (select(UserUsage.files_count, UserUsage.files_size, Status.max_size_text_file,
+                       Status.max_count_text_file, Status.max_size_all_text_files)
+                .select_from(Status)
+                .outerjoin(UserUsage, UserUsage.user_id == user_id)
+                .where(Status.id == status_id))
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        return (row.files_count or 0, row.files_size or 0, row.max_size_text_file, row.max_count_text_file,
+                row.max_size_all_text_files)
+
+    @staticmethod
+    async def reserve(session: AsyncSession, user_id: int, status_id: int, size: int) -> bool:
+        """
+        Adds a file to the usage counters of the user if it fits into the limits of the status.
+        The check and the update are one UPDATE of the user row, which also locks it until the end of
+        the transaction, so concurrent uploads of the same user cannot exceed the limits together.
+        Does not commit the transaction.
+        :param session: AsyncSession instance.
+        :param user_id: User id.
+        :param status_id: Status id of the user.
+        :param size: File size in bytes.
+        :return: True if the file fits into the limits, otherwise False and the counters are not changed.
+        """
+        await session.execute(insert(UserUsage).values(user_id=user_id).on_conflict_do_nothing())
+        stmt = (update(UserUsage)
+                .where(UserUsage.user_id == user_id,
+                       Status.id == status_id,
+                       or_(Status.max_size_text_file == -1, Status.max_size_text_file >= size),
+                       or_(Status.max_count_text_file == -1, UserUsage.files_count < Status.max_count_text_file),
+                       or_(Status.max_size_all_text_files == -1,
+                           UserUsage.files_size + size <= Status.max_size_all_text_files))
+                .values(files_count=UserUsage.files_count + 1, files_size=UserUsage.files_size + size)
+                .returning(UserUsage.user_id))
+        return await session.scalar(stmt) is not None
+
+    @staticmethod
+    async def change_usage(session: AsyncSession, user_id: int, count_delta: int = 0, size_delta: int = 0,
+                           commit: bool = True) -> None:
+        """Changes the usage counters of the user in place with a single UPDATE."""
+        stmt = (update(UserUsage).where(UserUsage.user_id == user_id)
+                .values(files_count=UserUsage.files_count + count_delta,
+                        files_size=UserUsage.files_size + size_delta))
+        await session.execute(stmt)
+        if commit:
+            await session.commit()
+
+    @staticmethod
+    async def lock_usage(session: AsyncSession, user_ids: Sequence[int]) -> None:
+        """
+        Locks the usage rows of the users until the end of the transaction, creating missing rows.
+        Uploads of these users wait for the lock. Does not commit the transaction.
+        :param session: AsyncSession instance.
+        :param user_ids: User ids. Rows are locked in ascending order of id.
+        """
+        if not user_ids:
+            return
+        user_ids = sorted(user_ids)
+        await session.execute(insert(UserUsage).values([{'user_id': user_id} for user_id in user_ids])
+                              .on_conflict_do_nothing())
+        await session.execute(select(UserUsage.user_id).where(UserUsage.user_id.in_(user_ids))
+                              .order_by(UserUsage.user_id).with_for_update())
+
+    @staticmethod
+    async def set_usage(session: AsyncSession, usage: dict[int, tuple[int, int]], commit: bool = True) -> None:
+        """
+        Replaces the usage counters of the users. Rows of the users must exist, see lock_usage.
+        :param session: AsyncSession instance.
+        :param usage: Dictionary {user id: (number of files, total size)}.
+        :param commit: Whether to commit the transaction. Default True.
+        """
+        rows = [(user_id, count, size) for user_id, (count, size) in usage.items()]
+        for start in range(0, len(rows), SET_USAGE_CHUNK_SIZE):
+            new_usage = (values(column('user_id', Integer), column('files_count', BigInteger),
+                                column('files_size', BigInteger), name='new_usage')
+                         .data(rows[start:start + SET_USAGE_CHUNK_SIZE]))
+            stmt = (update(UserUsage).where(UserUsage.user_id == new_usage.c.user_id)
+                    .values(files_count=new_usage.c.files_count, files_size=new_usage.c.files_size)
+                    .execution_options(synchronize_session=False))
+            await session.execute(stmt)
+        if commit:
+            await session.commit()
@@ -0,0 +1,162 @@
+# Enforce the file limits of the user status.
+# Usage of every user is kept in the user_usage counters and changed in the same transaction as the file records,
+# so a limit check is one read of the user row instead of a walk over the user files.
+# Collections and groups are not implemented yet, their limits are not checked.
+
+import asyncio
+import os
+from collections import defaultdict
+from typing import Any
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from category.models import Category
+from quota.crud import QuotaCRUD
+from search.manager import search_manager
+from user.models import User
+from user_text_files.crud import FileCRUD
+from user_text_files.models import File
+
+# Number of file records checked on disk in one worker thread call during reconcile.
+RECONCILE_BATCH_SIZE = 1000
+# Number of users reconciled in one transaction. Uploads of these users wait until it is committed.
+RECONCILE_USERS_PER_TRANSACTION = 100
+
+
+def _stat_sizes(paths: list[str]) -> list[int | None]:
+    """Returns sizes of the files, None for missing files. Blocking, runs in a worker thread."""
+    sizes = []
+    for path in paths:
+        try:
+            sizes.append(os.stat(path).st_size)
+        except (FileNotFoundError, NotADirectoryError):
+            sizes.append(None)
+    return sizes
+
+
+class QuotaManager:
+    """Checks and updates the per-user usage counters against the limits of the user status."""
+
+    def __init__(self):
+        self.quota_crud = QuotaCRUD()
+        self.file_crud = FileCRUD()
+
+    def __repr__(self):
+        return "Object of management user quotas."
+
+    async def upload_limit(self, session: AsyncSession, user: User) -> int | None:
+        """
+        Returns the maximum size in bytes of the next file the user can upload: the smaller of the
+        file size limit and the rest of the total size limit.
+        :param session: AsyncSession instance.
+        :param user: User object.
+        :return: Maximum size in bytes or None if there is no limit.
+        :raises PermissionError: If the user has reached the number of files or the total size limit.
+        """
+        row = await self.quota_crud.get_usage_and_limits(session, user.id, user.status_id)
+        if row is None:
+            return None
+        files_count, files_size, max_size, max_count, max_total = row
+
+        if max_count != -1 and files_count >= max_count:
+            raise PermissionError(f"The limit of {max_count} files is reached.")
+        limits = []
+        if max_size != -1:
+            limits.append(max_size)
+        if max_total != -1:
+            if files_size >= max_total:
+                raise PermissionError(f"The limit of {max_total} bytes for all files is reached.")
+            limits.append(max_total - files_size)
+        return min(limits) if limits else None
+
+    async def reserve(self, session: AsyncSession, user: User, size: int) -> None:
+        """
+        Adds a new file to the usage of the user. Does not commit the transaction: the caller commits it
+        together with the file record.
+        :param session: AsyncSession instance.
+        :param user: User object.
+        :param size: File size in bytes.
+        :return: None.
+        :raises PermissionError: If the file does not fit into the limits of the user status.
+        """
+        if not await self.quota_crud.reserve(session, user.id, user.status_id, size):
+            raise PermissionError("The file does not fit into the limits of your status.")
+
+    async def release_category(self, session: AsyncSession, category_id: int) -> None:
+        """
+        Removes the files of the category from the usage of their owners before the category is deleted.
+        File records are deleted with the category. Does not commit the transaction.
+        """
+        for owner, count, size in await self.file_crud.usage_by_owner(session, category_id):
+            await self.quota_crud.change_usage(session, owner, -count, -size, commit=False)
+
+    async def move_category(self, session: AsyncSession, old_category_id: int, new_category_id: int) -> None:
+        """
+        Moves the file records of a category to another category after the files have been moved on disk.
+        Files of the new category replaced by files with the same name are removed from the usage of their owners.
+        Does not commit the transaction.
+        """
+        replaced = await self.file_crud.conflicting_files(session, old_category_id, new_category_id)
+        for file in replaced:
+            await self.quota_crud.change_usage(session, file.owner, -1, -file.size, commit=False)
+        await self.file_crud.delete_files(session, [file.id for file in replaced], commit=False)
+        await self.file_crud.move_files(session, old_category_id, new_category_id, commit=False)
+
+    async def reconcile(self, session: AsyncSession) -> dict[str, Any]:
+        """
+        Rebuilds the usage counters from the files on disk. Records of files that no longer exist
+        are deleted, sizes of changed files are updated.
+        Users are reconciled in batches of RECONCILE_USERS_PER_TRANSACTION. The usage rows of a batch are locked
+        while its files are checked, so an upload committed during the scan is not overwritten by a stale total.
+        :param session: AsyncSession instance.
+        :return: A dictionary {'files': checked records, 'missing': deleted records, 'resized': updated records,
+                 'users': number of users with files}.
+        """
+        result = {'files': 0, 'missing': 0, 'resized': 0, 'users': 0}
+        user_ids = (await session.scalars(select(User.id).order_by(User.id))).all()
+        for start in range(0, len(user_ids), RECONCILE_USERS_PER_TRANSACTION):
+            batch = user_ids[start:start + RECONCILE_USERS_PER_TRANSACTION]
+            await self.quota_crud.lock_usage(session, batch)
+            for key, value in (await self.__reconcile_users(session, batch)).items():
+                result[key] += value
+            await session.commit()
+        return result
+
+    async def __reconcile_users(self, session: AsyncSession, user_ids: list[int]) -> dict[str, int]:
+        """Checks the files of the users on disk and rewrites their usage. Does not commit the transaction."""
+        usage: dict[int, list[int]] = defaultdict(lambda: [0, 0])
+        missing: list[int] = []
+        missing_files: list[tuple[int, str]] = []
+        resized: list[tuple[int, int]] = []
+        checked = 0
+
+        stmt = (select(File.id, File.owner, File.category_id, File.name, File.size, Category.path)
+                .join(Category, Category.id == File.category_id)
+                .where(File.owner.in_(user_ids))
+                .order_by(File.id))
+        result = await session.stream(stmt.execution_options(yield_per=RECONCILE_BATCH_SIZE))
+        async for rows in result.partitions():
+            sizes = await asyncio.to_thread(_stat_sizes, [os.path.join(row.path, row.name) for row in rows])
+            for row, size in zip(rows, sizes):
+                checked += 1
+                if size is None:
+                    missing.append(row.id)
+                    missing_files.append((row.category_id, row.name))
+                    continue
+                if size != row.size:
+                    resized.append((row.id, size))
+                usage[row.owner][0] += 1
+                usage[row.owner][1] += size
+
+        for start in range(0, len(missing), RECONCILE_BATCH_SIZE):
+            await self.file_crud.delete_files(session, missing[start:start + RECONCILE_BATCH_SIZE], commit=False)
+        for category_id, name in missing_files:
+            await search_manager.delete_file(category_id, name)
+        for file_id, size in resized:
+            await self.file_crud.set_size(session, file_id, size, commit=False)
+        await self.quota_crud.set_usage(session, {user_id: tuple(usage.get(user_id, (0, 0))) for user_id in user_ids},
+                                        commit=False)
+        return {'files': checked, 'missing': len(missing), 'resized': len(resized), 'users': len(usage)}
+
+quota_manager = QuotaManager()
@@ -0,0 +1,21 @@
+from sqlalchemy import ForeignKey, BigInteger
+from sqlalchemy.orm import mapped_column, Mapped
+
+from database import Base
+from user.models import User
+
+
+class UserUsage(Base):
+    """
+    Usage counters of a user, compared with the limits of the user status.
+    Updated in the same transaction as every change of the user files.
+    """
+    __tablename__ = 'user_usage'
+
+    user_id: Mapped[int] = mapped_column(ForeignKey(User.id, onupdate='CASCADE', ondelete='CASCADE'),
+                                         primary_key=True)
+    files_count: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
+    files_size: Mapped[int] = mapped_column(BigInteger, default=0, server_default='0')
+
+    def __repr__(self) -> str:
+        return f"User {self.user_id}: {self.files_count} files, {self.files_size} bytes"
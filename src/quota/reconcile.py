@@ -0,0 +1,20 @@
+# Rebuilds the user usage counters from the files on disk.
+# Usage (from the src directory): python -m quota.reconcile
+
+import argparse
+import asyncio
+
+from database import async_session_maker
+from quota.manager import quota_manager
+
+
+async def main() -> None:
+    async with async_session_maker() as session:
+        result = await quota_manager.reconcile(session)
+    print(f"Checked {result['files']} files of {result['users']} users. "
+          f"Missing on disk: {result['missing']}. Size changed: {result['resized']}.")
+
+
+if __name__ == '__main__':
+    argparse.ArgumentParser(description="Rebuild the user usage counters from the files on disk.").parse_args()
+    asyncio.run(main())
@@ -0,0 +1,160 @@
+# On-disk inverted index of the stored text files: term -> postings (file, term frequency, offsets).
+# Kept in SQLite: updates of one file are a single transaction, lookups go through the primary keys.
+# Methods are blocking and are called in a worker thread by the search manager.
+
+import math
+import sqlite3
+import threading
+from array import array
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    category_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    UNIQUE (category_id, name)
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    file_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    offsets BLOB NOT NULL,
+    PRIMARY KEY (term_id, file_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_postings_file_id ON postings (file_id);
+"""
+
+# BM25 parameters.
+K1 = 1.2
+B = 0.75
+
+
+class SearchIndex:
+    """Inverted index of text files stored in a SQLite database."""
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the index database file. Created if it does not exist.
+        """
+        self.path = path
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False)
+        self.__connection.execute('PRAGMA journal_mode=WAL')
+        self.__connection.executescript(SCHEMA)
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def add_file(self, category_id: int, name: str, length: int,
+                 terms: dict[str, tuple[int, list[int]]]) -> None:
+        """
+        Adds a file to the index or replaces its previous postings.
+        :param category_id: Category id.
+        :param name: File name.
+        :param length: Number of words in the file.
+        :param terms: Terms of the file, see search.tokenizer.tokenize_text.
+        """
+        with self.__lock, self.__connection as db:
+            self.__delete_file(db, category_id, name)
+            file_id = db.execute('INSERT INTO files (category_id, name, length) VALUES (?, ?, ?)',
+                                 (category_id, name, length)).lastrowid
+            db.executemany('INSERT OR IGNORE INTO terms (term) VALUES (?)', ((term,) for term in terms))
+            term_ids = self.__term_ids(db, list(terms))
+            db.executemany('INSERT INTO postings (term_id, file_id, tf, offsets) VALUES (?, ?, ?, ?)',
+                           ((term_ids[term], file_id, tf, array('I', offsets).tobytes())
+                            for term, (tf, offsets) in terms.items()))
+
+    def delete_file(self, category_id: int, name: str) -> None:
+        """Removes a file from the index."""
+        with self.__lock, self.__connection as db:
+            self.__delete_file(db, category_id, name)
+
+    def move_category(self, old_category_id: int, new_category_id: int) -> None:
+        """
+        Moves all files of a category to another category, as files_transfer does on disk:
+        files with the same name in the new category are replaced.
+        """
+        with self.__lock, self.__connection as db:
+            replaced = db.execute('SELECT id FROM files WHERE category_id = ? AND name IN '
+                                  '(SELECT name FROM files WHERE category_id = ?)',
+                                  (new_category_id, old_category_id)).fetchall()
+            db.executemany('DELETE FROM postings WHERE file_id = ?', replaced)
+            db.executemany('DELETE FROM files WHERE id = ?', replaced)
+            db.execute('UPDATE files SET category_id = ? WHERE category_id = ?', (new_category_id, old_category_id))
+
+    def delete_category(self, category_id: int) -> None:
+        """Removes all files of a category from the index."""
+        with self.__lock, self.__connection as db:
+            db.execute('DELETE FROM postings WHERE file_id IN (SELECT id FROM files WHERE category_id = ?)',
+                       (category_id,))
+            db.execute('DELETE FROM files WHERE category_id = ?', (category_id,))
+
+    def search(self, terms: list[str], limit: int = 20, category_id: int | None = None) -> list[dict]:
+        """
+        Finds files containing any of the terms, ranked by BM25.
+        :param terms: Normalized query terms.
+        :param limit: Maximum number of results.
+        :param category_id: Search only in this category. None - in all categories.
+        :return: List of {'category_id', 'name', 'score', 'offsets'} sorted by score, best first.
+                 'offsets' are character offsets of the first matches.
+        """
+        if not terms:
+            return []
+        with self.__lock:
+            db = self.__connection
+            count_files, avg_length = db.execute('SELECT COUNT(*), AVG(length) FROM files').fetchone()
+            if not count_files:
+                return []
+            term_ids = self.__term_ids(db, terms)
+            if not term_ids:
+                return []
+
+            scores: dict[int, float] = {}
+            offsets: dict[int, list[int]] = {}
+            category_filter = '' if category_id is None else ' AND f.category_id = ?'
+            for term_id in term_ids.values():
+                df = db.execute('SELECT COUNT(*) FROM postings WHERE term_id = ?', (term_id,)).fetchone()[0]
+                idf = math.log(1 + (count_files - df + 0.5) / (df + 0.5))
+                params = (term_id,) if category_id is None else (term_id, category_id)
+                rows = db.execute('SELECT p.file_id, p.tf, p.offsets, f.length FROM postings p '
+                                  'JOIN files f ON f.id = p.file_id WHERE p.term_id = ?' + category_filter, params)
+                for file_id, tf, term_offsets, length in rows:
+                    norm = K1 * (1 - B + B * length / (avg_length or 1))
+                    scores[file_id] = scores.get(file_id, 0) + idf * tf * (K1 + 1) / (tf + norm)
+                    offsets.setdefault(file_id, []).extend(array('I', term_offsets))
+
+            best = sorted(scores, key=scores.get, reverse=True)[:limit]
+            if not best:
+                return []
+            placeholders = ','.join('?' * len(best))
+            files = {row[0]: row[1:] for row in
+                     db.execute(f'SELECT id, category_id, name FROM files WHERE id IN ({placeholders})', best)}
+
+        return [{'category_id': files[file_id][0],
+                 'name': files[file_id][1],
+                 'score': scores[file_id],
+                 'offsets': sorted(offsets[file_id])}
+                for file_id in best]
+
+    @staticmethod
+    def __term_ids(db: sqlite3.Connection, terms: list[str]) -> dict[str, int]:
+        """Returns ids of the known terms."""
+        result = {}
+        for i in range(0, len(terms), 500):  # SQLite limits the number of parameters.
+            chunk = terms[i:i + 500]
+            placeholders = ','.join('?' * len(chunk))
+            result.update(db.execute(f'SELECT term, id FROM terms WHERE term IN ({placeholders})', chunk))
+        return result
+
+    @staticmethod
+    def __delete_file(db: sqlite3.Connection, category_id: int, name: str) -> None:
+        row = db.execute('SELECT id FROM files WHERE category_id = ? AND name = ?', (category_id, name)).fetchone()
+        if row is not None:
+            db.execute('DELETE FROM postings WHERE file_id = ?', row)
+            db.execute('DELETE FROM files WHERE id = ?', row)
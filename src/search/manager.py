@@ -0,0 +1,121 @@
+# Manage the full-text search index.
+# Files are split into terms in a process pool: tokenization is CPU bound and must not block the event loop.
+# The index is updated in the background after the storage has changed, the request does not wait for it.
+# Workers are started by a fork server, as in user.passwords. A pool broken by a dead worker is replaced
+# and the call is retried once.
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, List
+
+from config import SEARCH_INDEX_PATH, SEARCH_WORKERS
+from search.index import SearchIndex
+from search.tokenizer import tokenize_file, tokenize_query
+
+# Only plain text can be split into terms.
+INDEXED_EXTENSIONS = ('.txt', '.txt.gz')
+
+
+class SearchManager:
+    """Keeps the search index up to date with the storage and runs search queries."""
+
+    def __init__(self, index_path: str, workers: int):
+        """
+        :param index_path: Path to the index database file.
+        :param workers: Number of worker processes that tokenize files.
+        """
+        self.index = SearchIndex(index_path)
+        self.workers = workers
+        self.__executor: ProcessPoolExecutor | None = None
+        self.__tasks: set[asyncio.Task] = set()
+
+    def __repr__(self):
+        return f"Object of management search index. Index location: {self.index.path}. Workers: {self.workers}"
+
+    async def index_file(self, category_id: int, file: str, path: str) -> None:
+        """
+        Splits the file into terms in a worker process and adds it to the index.
+        Files that are not plain text are skipped.
+        :param category_id: Category id.
+        :param file: File name in the category.
+        :param path: Full path to the file.
+        :return: None.
+        """
+        if not file.endswith(INDEXED_EXTENSIONS):
+            return
+        length, terms = await self.__run(tokenize_file, path)
+        await asyncio.to_thread(self.index.add_file, category_id, file, length, terms)
+
+    def schedule_index_file(self, category_id: int, file: str, path: str) -> None:
+        """Indexes the file in a background task, see index_file."""
+        self.__schedule(self.index_file(category_id, file, path))
+
+    async def delete_file(self, category_id: int, file: str) -> None:
+        """Removes the file from the index."""
+        await asyncio.to_thread(self.index.delete_file, category_id, file)
+
+    async def move_category(self, old_category_id: int, new_category_id: int) -> None:
+        """Moves the index entries of all files of a category to another category."""
+        await asyncio.to_thread(self.index.move_category, old_category_id, new_category_id)
+
+    async def delete_category(self, category_id: int) -> None:
+        """Removes the index entries of all files of a category."""
+        await asyncio.to_thread(self.index.delete_category, category_id)
+
+    async def search(self, query: str, limit: int = 20, category_id: int | None = None) -> List[dict[str, Any]]:
+        """
+        Finds files matching the query.
+        :param query: Search query.
+        :param limit: Maximum number of results.
+        :param category_id: Search only in this category. None - in all categories.
+        :return: List of {'category_id', 'name', 'score', 'offsets'}, best matches first.
+        """
+        terms = tokenize_query(query)
+        return await asyncio.to_thread(self.index.search, terms, limit, category_id)
+
+    async def shutdown(self) -> None:
+        """Waits for the scheduled indexing tasks and stops the worker processes without waiting for them."""
+        if self.__tasks:
+            await asyncio.gather(*self.__tasks, return_exceptions=True)
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    async def __run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs the function in the process pool, replacing the pool once if it is broken."""
+        loop = asyncio.get_running_loop()
+        executor = self.__get_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            if self.__executor is executor:  # not replaced yet by another call that failed with it.
+                logging.getLogger(__name__).warning("A search worker process died, restarting the pool.")
+                executor.shutdown(wait=False)
+                self.__executor = None
+            return await loop.run_in_executor(self.__get_executor(), func, *args)
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        """Creates the process pool on first use."""
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                  mp_context=multiprocessing.get_context('forkserver'))
+        return self.__executor
+
+    def __schedule(self, coro) -> None:
+        """Runs the coroutine in a background task and keeps a reference to it until it is done."""
+        task = asyncio.create_task(self.__log_errors(coro))
+        self.__tasks.add(task)
+        task.add_done_callback(self.__tasks.discard)
+
+    @staticmethod
+    async def __log_errors(coro) -> None:
+        try:
+            await coro
+        except Exception:
+            logging.getLogger(__name__).exception("Update of the search index failed.")
+
+
+search_manager = SearchManager(SEARCH_INDEX_PATH, SEARCH_WORKERS)
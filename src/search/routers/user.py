@@ -0,0 +1,45 @@
+# Routes for registered users.
+
+from typing import Annotated, List
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette import status
+
+from category.crud import CategoryCRUD
+from database import get_async_session
+from search.manager import search_manager
+from search.schema import SearchResultScheme
+from user.auth_config import current_user
+
+search_router = APIRouter(tags=['User', 'Search'], prefix='/search')
+
+
+@search_router.get('')
+async def search_files(
+        q: Annotated[str, Query(min_length=1, max_length=200)],
+        limit: Annotated[int, Query(ge=1, le=100)] = 20,
+        category: Annotated[str | None, Query(min_length=1)] = None,
+        auth_user=Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)) -> List[SearchResultScheme]:
+    """Full-text search in the stored text files. Results are ranked by relevance, best first."""
+    category_id = None
+    if category is not None:
+        category_obj = await CategoryCRUD.get_category(session, category)
+        if not category_obj:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Category {category} not found.")
+        category_id = category_obj.id
+
+    found = await search_manager.search(q, limit, category_id)
+
+    names = {}
+    result: List[SearchResultScheme] = []
+    for item in found:
+        if item['category_id'] not in names:
+            category_obj = await CategoryCRUD.get_category(session, item['category_id'])
+            names[item['category_id']] = category_obj.name if category_obj else None
+        if names[item['category_id']] is None:  # the category was deleted after indexing.
+            continue
+        result.append(SearchResultScheme(file=item['name'], category=names[item['category_id']],
+                                         score=item['score'], offsets=item['offsets']))
+    return result
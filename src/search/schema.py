@@ -0,0 +1,12 @@
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class SearchResultScheme(BaseModel):
+    """A schema for a file found by the search."""
+
+    file: str
+    category: str
+    score: float = Field(description='BM25 relevance of the file, higher is better')
+    offsets: List[int] = Field(description='Character offsets of the first matches in the file')
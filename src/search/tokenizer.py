@@ -0,0 +1,65 @@
+# Splitting of text files into search terms. Runs in worker processes of the search manager.
+
+import gzip
+import re
+
+from utils.text_formatter import normalize_term
+
+WORD_RE = re.compile(r'\w+')
+MAX_OFFSETS = 32  # Positions of a term kept per file, enough to highlight the first matches.
+CHUNK_SIZE = 1024 * 1024  # Characters read from a file at a time.
+
+
+def tokenize_text(text: str) -> tuple[int, dict[str, tuple[int, list[int]]]]:
+    """
+    Splits text into normalized terms.
+    :param text: Source text.
+    :return: Number of words and a dictionary {term: (term frequency, character offsets of the first occurrences)}.
+    """
+    terms: dict[str, tuple[int, list[int]]] = {}
+    length = 0
+    for match in WORD_RE.finditer(text):
+        length += 1
+        _add_term(terms, match.group(), match.start())
+    return length, terms
+
+
+def tokenize_file(path: str) -> tuple[int, dict[str, tuple[int, list[int]]]]:
+    """
+    Reads a text file (plain or gzip-compressed) by chunks of CHUNK_SIZE characters and splits it into terms,
+    see tokenize_text. A word at the end of a chunk may continue in the next one, it is carried over.
+    """
+    terms: dict[str, tuple[int, list[int]]] = {}
+    length = 0
+    offset = 0  # offset of the text in the file.
+    tail = ''
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8', errors='replace') as file:
+        while chunk := file.read(CHUNK_SIZE):
+            text = tail + chunk
+            tail = ''
+            for match in WORD_RE.finditer(text):
+                if match.end() == len(text):
+                    tail = match.group()
+                    break
+                length += 1
+                _add_term(terms, match.group(), offset + match.start())
+            offset += len(text) - len(tail)
+    if tail:
+        length += 1
+        _add_term(terms, tail, offset)
+    return length, terms
+
+
+def tokenize_query(query: str) -> list[str]:
+    """Returns the distinct normalized terms of a search query in their order."""
+    return list(dict.fromkeys(normalize_term(word) for word in WORD_RE.findall(query)))
+
+
+def _add_term(terms: dict[str, tuple[int, list[int]]], word: str, offset: int) -> None:
+    """Counts an occurrence of the word at the character offset."""
+    term = normalize_term(word)
+    tf, offsets = terms.get(term, (0, []))
+    if len(offsets) < MAX_OFFSETS:
+        offsets.append(offset)
+    terms[term] = (tf + 1, offsets)
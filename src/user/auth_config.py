@@ -1,16 +1,52 @@
-from fastapi_users import FastAPIUsers
+from typing import Optional
+
+import jwt
+from fastapi_users import FastAPIUsers, BaseUserManager, exceptions
 from fastapi_users.authentication import BearerTransport, AuthenticationBackend
 from fastapi_users.authentication import JWTStrategy
+from fastapi_users.jwt import decode_jwt
 
 from user.manager import get_user_manager
 from user.models import User
+from user.passwords import password_service
+from user.user_cache import user_cache
 from config import SECRET_AUTH, LIFETIME_TOKEN
 
 bearer_transport = BearerTransport(tokenUrl="auth/jwt/login")
 
 
+class CachedJWTStrategy(JWTStrategy[User, int]):
+    """JWT strategy that resolves the token subject through the cache of authenticated users."""
+
+    async def read_token(self, token: Optional[str], user_manager: BaseUserManager[User, int]) -> Optional[User]:
+        if token is None:
+            return None
+
+        try:
+            data = decode_jwt(token, self.decode_key, self.token_audience, algorithms=[self.algorithm])
+            user_id = data.get("sub")
+            if user_id is None:
+                return None
+        except jwt.PyJWTError:
+            return None
+
+        user = user_cache.get(user_manager.user_db.session, user_id)
+        if user is not None:
+            return user
+
+        version = user_cache.version
+        try:
+            user = await user_manager.get(user_manager.parse_id(user_id))
+        except (exceptions.UserNotExists, exceptions.InvalidID):
+            return None
+        user_cache.set(user, version)
+        return user
+
+
 def get_jwt_strategy() -> JWTStrategy:
-    """Strategy for obtaining the token"""
+    """Strategy for obtaining the token. With USER_CACHE_TTL > 0 users are resolved through the user cache."""
+    if user_cache.enabled:
+        return CachedJWTStrategy(secret=SECRET_AUTH, lifetime_seconds=LIFETIME_TOKEN)
     return JWTStrategy(secret=SECRET_AUTH, lifetime_seconds=LIFETIME_TOKEN)
 
 
@@ -35,7 +71,6 @@ async def validate_password(row_password: str, hashed_password: str) -> bool:
     :param hashed_password: Password hash.
     :return: True if the password matches the hash, otherwise False.
     """
-    manager = await anext(get_user_manager())
-    flag, _ = manager.password_helper.verify_and_update(row_password, hashed_password)
+    flag, _ = await password_service.verify_and_update(row_password, hashed_password)
     return flag
 
@@ -1,11 +1,13 @@
-from typing import Literal, Type, Any, Coroutine
+from typing import Literal, Type
 
 from sqlalchemy import update, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from user.manager import get_user_manager
 from user.models import User, Status
+from user.passwords import password_service
 from user.schema import UserUpdateFullScheme
+from user.statuses import status_catalog
+from user.user_cache import user_cache
 
 
 async def get_user(session: AsyncSession, user: int | str) -> User | None:
@@ -25,39 +27,34 @@ async def get_user(session: AsyncSession, user: int | str) -> User | None:
     return result
 
 
-async def update_user(session: AsyncSession, model_data: UserUpdateFullScheme, user_id: int) \
-        -> Coroutine[Any, Any, User | None] | None:
-    """Update user."""
+async def update_user(session: AsyncSession, model_data: UserUpdateFullScheme, user_id: int) -> User:
+    """
+    Update user in one UPDATE ... RETURNING query. The status name is resolved by the status catalog.
+    :param session: instance AsyncSession
+    :param model_data: New user data.
+    :param user_id: User id.
+    :return: The updated user.
+    :raises ValueError: If the data is empty or the user is not found.
+    :raises LookupError: If the status is not found.
+    """
     data_dict = model_data.model_dump(exclude_none=True)
     if len(data_dict) == 0:
         raise ValueError("Empty data.")
-    updated_user: User | None = None
 
     if 'status' in data_dict:
-        user = await get_user(session, user_id)
-        if not user:
-            raise ValueError(f"User id {user_id} not found")
-        statuses: dict[str, Status] = await collection_statuses(session, view='dict')
-        if data_dict['status'] in statuses:
-            status: Status = statuses[data_dict['status']]
-            user.status = status
-            session.add(user)
-            updated_user = user
-            data_dict.pop('status')
-        else:
-            raise ValueError(f"Status '{data_dict['status']}' not found")
+        data_dict['status_id'] = await status_catalog.get_id(session, data_dict.pop('status'))
 
     if 'password' in data_dict:
-        manager = await anext(get_user_manager())
-        hashed_password = manager.password_helper.hash(data_dict['password'])
-        data_dict['hashed_password'] = hashed_password
-        data_dict.pop('password')
+        data_dict['hashed_password'] = await password_service.hash(data_dict.pop('password'))
 
-    if len(data_dict) > 0:
-        stmt = update(User).where(User.id == user_id).values(**data_dict).returning(User)
-        updated_user = await session.scalar(stmt)
+    stmt = update(User).where(User.id == user_id).values(**data_dict).returning(User)
+    updated_user: User | None = await session.scalar(stmt)
+    if updated_user is None:
+        await session.rollback()
+        raise ValueError(f"User id {user_id} not found")
 
     await session.commit()
+    user_cache.invalidate(user_id)
 
     return updated_user
 
@@ -80,8 +77,10 @@ async def delete_user(session: AsyncSession, user: int | str | User) -> bool:
         result = user
 
     if result is not None:
+        user_id = result.id
         await session.delete(result)
         await session.commit()
+        user_cache.invalidate(user_id)
         return True
     else:
         return False
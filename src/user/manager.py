@@ -1,15 +1,18 @@
-from typing import Optional, Union
+from typing import Optional, Union, Any, Dict
 
 from fastapi import Depends, Request
+from fastapi.security import OAuth2PasswordRequestForm
 from fastapi_users import BaseUserManager, IntegerIDMixin, models, schemas, exceptions, InvalidPasswordException
 
 from user.models import User
+from user.passwords import password_service
+from user.user_cache import user_cache
 from user.utils.user import get_user_db
 from config import SECRET_AUTH
 
 
 class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
-    """User manager."""
+    """User manager. Passwords are hashed and verified in the worker processes of the password service."""
     reset_password_token_secret = SECRET_AUTH
     verification_token_secret = SECRET_AUTH
 
@@ -31,7 +34,7 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             else user_create.create_update_dict_superuser()
         )
         password = user_dict.pop("password")
-        user_dict["hashed_password"] = self.password_helper.hash(password)
+        user_dict["hashed_password"] = await password_service.hash(password)
         user_dict['is_verified'] = True
         user_dict['is_superuser'] = False
 
@@ -40,6 +43,41 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
 
         return created_user
 
+    async def authenticate(self, credentials: OAuth2PasswordRequestForm) -> Optional[User]:
+        """Returns the user with the email and password of the credentials or None."""
+        try:
+            user = await self.get_by_email(credentials.username)
+        except exceptions.UserNotExists:
+            # Hash anyway, so the response time does not tell whether the email is registered.
+            await password_service.hash(credentials.password)
+            return None
+
+        verified, updated_password_hash = await password_service.verify_and_update(credentials.password,
+                                                                                   user.hashed_password)
+        if not verified:
+            return None
+        if updated_password_hash is not None:
+            await self.user_db.update(user, {"hashed_password": updated_password_hash})
+
+        return user
+
+    async def _update(self, user: User, update_dict: Dict[str, Any]) -> User:
+        """Hashes a new password in the password service before the update."""
+        password = update_dict.get("password")
+        if password is not None:
+            await self.validate_password(password, user)
+            update_dict = {key: value for key, value in update_dict.items() if key != "password"}
+            update_dict["hashed_password"] = await password_service.hash(password)
+        return await super()._update(user, update_dict)
+
+    async def on_after_update(self, user: User, update_dict: Dict[str, Any], request: Optional[Request] = None):
+        """Removes the changed user from the cache of authenticated users."""
+        user_cache.invalidate(user.id)
+
+    async def on_after_delete(self, user: User, request: Optional[Request] = None):
+        """Removes the deleted user from the cache of authenticated users."""
+        user_cache.invalidate(user.id)
+
 
 async def get_user_manager(user_db=Depends(get_user_db)):
     yield UserManager(user_db)
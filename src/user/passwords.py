@@ -0,0 +1,95 @@
+# Hashing and verification of passwords.
+# bcrypt is CPU bound and slow by design: one call blocks the event loop for tens of milliseconds.
+# The calls run in a fixed number of worker processes, so the event loop keeps serving requests and
+# at most PASSWORD_WORKERS cores are used for hashing whatever the number of concurrent logins.
+# Workers are started by a fork server, not forked from the server process, which runs threads.
+# A pool broken by a dead worker is replaced and the call is retried once.
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from fastapi_users.password import PasswordHelper
+
+from config import PASSWORD_WORKERS
+
+# Created in every worker process on first use.
+_password_helper: PasswordHelper | None = None
+
+
+def _get_helper() -> PasswordHelper:
+    global _password_helper
+    if _password_helper is None:
+        _password_helper = PasswordHelper()
+    return _password_helper
+
+
+def _hash(password: str) -> str:
+    return _get_helper().hash(password)
+
+
+def _verify_and_update(password: str, hashed_password: str) -> tuple[bool, str | None]:
+    return _get_helper().verify_and_update(password, hashed_password)
+
+
+class PasswordService:
+    """Hashes and verifies passwords in a process pool."""
+
+    def __init__(self, workers: int):
+        """
+        :param workers: Number of worker processes.
+        :raises ValueError: If workers is less than 1.
+        """
+        if workers < 1:
+            raise ValueError("workers must be greater than 0.")
+        self.workers = workers
+        self.__executor: ProcessPoolExecutor | None = None
+
+    def __repr__(self):
+        return f"Object of password hashing. Workers: {self.workers}"
+
+    def start(self) -> None:
+        """Starts the process pool. Called at application startup, otherwise the pool is started on first use."""
+        self.__get_executor()
+
+    async def hash(self, password: str) -> str:
+        """Returns the hash of the password."""
+        return await self.__run(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, str | None]:
+        """
+        Checks the password against its hash.
+        :return: (True if the password matches, a new hash if the old one uses deprecated settings or None).
+        """
+        return await self.__run(_verify_and_update, password, hashed_password)
+
+    async def shutdown(self) -> None:
+        """Stops the worker processes without waiting for them."""
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=False, cancel_futures=True)
+            self.__executor = None
+
+    async def __run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Runs the function in the process pool, replacing the pool once if it is broken."""
+        loop = asyncio.get_running_loop()
+        executor = self.__get_executor()
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        except BrokenProcessPool:
+            if self.__executor is executor:  # not replaced yet by another call that failed with it.
+                logging.getLogger(__name__).warning("A password worker process died, restarting the pool.")
+                executor.shutdown(wait=False)
+                self.__executor = None
+            return await loop.run_in_executor(self.__get_executor(), func, *args)
+
+    def __get_executor(self) -> ProcessPoolExecutor:
+        """Returns the process pool, creating it if needed."""
+        if self.__executor is None:
+            self.__executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                  mp_context=multiprocessing.get_context('forkserver'))
+        return self.__executor
+
+password_service = PasswordService(PASSWORD_WORKERS)
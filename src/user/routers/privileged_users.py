@@ -9,10 +9,22 @@ from database import get_async_session
 from user import crud
 from user.auth_config import current_user
 from user.schema import UserUpdateFullScheme, UserReadFullScheme
+from user.statuses import status_catalog
 
 admin_router = APIRouter(tags=['Admin and superuser'])
 
 
+def status_not_available(name: str) -> HTTPException:
+    """Returns the error for an unknown status name with the list of available statuses."""
+    statuses = status_catalog.names()
+    return HTTPException(status_code=status.HTTP_409_CONFLICT,
+                         detail={
+                             "message": f"The status of {name} is not available. "
+                                        f"Available statuses: {', '.join(statuses)}.",
+                             'statuses': statuses,
+                         })
+
+
 @admin_router.patch("/user/update/{user_id}")
 async def user_update(user_id: Annotated[int, Path(qe=1)],
                       data: UserUpdateFullScheme,
@@ -23,17 +35,10 @@ async def user_update(user_id: Annotated[int, Path(qe=1)],
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail={"message": "Not enough rights to perform the operation."})
 
-    if data.status is not None:
-        user_statuses: list[str] = await crud.collection_statuses(session, view='list')
-        if data.status not in user_statuses:
-            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                                detail={
-                                    "message": f"The status of {data.status} is not available. "
-                                               f"Available statuses: {', '.join(user_statuses)}.",
-                                    'statuses': user_statuses,
-                                })
     try:
         user_db = await crud.update_user(session, data, user_id)
+    except LookupError:
+        raise status_not_available(data.status)
     except ValueError as ex:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail={"message": f"{ex}"})
@@ -69,18 +74,11 @@ async def edit_status_user(user_id: Annotated[int, Path(ge=1)],
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
                             detail={"message": "Not enough rights to perform the operation."})
 
-    statuses: list = await crud.collection_statuses(session, view='list')
-    if new_status not in statuses:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
-                            detail={
-                                "message": f"The status of {new_status} is not available. "
-                                           f"Available statuses: {', '.join(statuses)}.",
-                                'statuses': statuses,
-                            })
-
     update_scheme = UserUpdateFullScheme(status=new_status)
     try:
         user_db = await crud.update_user(session, update_scheme, user_id)
+    except LookupError:
+        raise status_not_available(new_status)
     except ValueError as ex:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail={"message": f"{ex}"})
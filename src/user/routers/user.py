@@ -5,7 +5,7 @@ from fastapi_users import FastAPIUsers
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
-from database import get_async_session
+from database import get_async_session, get_async_read_session
 from user import crud
 from user.auth_config import auth_backend, current_user, validate_password
 from user.manager import get_user_manager
@@ -59,7 +59,7 @@ async def user_self_delete(
 @user_router.get('/user/info/{id_or_username}', tags=['User'])
 async def user_info(id_or_username: int | str,
                     auth_user=Depends(current_user),
-                    session: AsyncSession = Depends(get_async_session)) -> UserReadScheme | UserReadFullScheme:
+                    session: AsyncSession = Depends(get_async_read_session)) -> UserReadScheme | UserReadFullScheme:
     """Returns information about the user based on the user's permissions."""
     try:
         user = abs(int(id_or_username))
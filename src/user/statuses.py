@@ -0,0 +1,59 @@
+# Catalog of user statuses.
+# The status table is small and changes rarely, so names and ids of all statuses are kept in the process:
+# it is loaded at startup and reloaded after a change of statuses or when an unknown name is requested
+# (a status added by another process), at most once per MISS_REFRESH_INTERVAL seconds.
+
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user.models import Status
+from utils.single_flight import SingleFlight
+
+# Minimum number of seconds between reloads caused by unknown status names.
+MISS_REFRESH_INTERVAL = 10
+
+
+class StatusCatalog:
+    """Names and ids of the user statuses."""
+
+    def __init__(self):
+        self.__ids: dict[str, int] = {}
+        self.__loaded_at: float | None = None
+        self.__flight = SingleFlight()
+
+    def __repr__(self):
+        return f"Catalog of user statuses: {self.names()}"
+
+    async def load(self, session: AsyncSession) -> None:
+        """Reads all statuses from the database. Concurrent calls share one query."""
+        await self.__flight.do('load', lambda: self.__load(session))
+
+    def names(self) -> list[str]:
+        """Returns names of all statuses."""
+        return list(self.__ids)
+
+    async def get_id(self, session: AsyncSession, name: str) -> int:
+        """
+        Returns the id of the status.
+        :param session: AsyncSession instance, used only if the catalog has to be reloaded.
+        :param name: Status name.
+        :return: Status id.
+        :raises LookupError: If there is no status with this name.
+        """
+        if self.__loaded_at is None or (name not in self.__ids
+                                        and time.monotonic() - self.__loaded_at >= MISS_REFRESH_INTERVAL):
+            await self.load(session)
+        try:
+            return self.__ids[name]
+        except KeyError:
+            raise LookupError(f"Status '{name}' not found.")
+
+    async def __load(self, session: AsyncSession) -> None:
+        rows = await session.execute(select(Status.id, Status.name))
+        self.__ids = {str(row.name): row.id for row in rows.all()}
+        self.__loaded_at = time.monotonic()
+
+
+status_catalog = StatusCatalog()
@@ -0,0 +1,71 @@
+# Cache of authenticated users.
+# Every authenticated request resolves the token subject to a User row. With USER_CACHE_TTL > 0 the columns
+# of the row are kept in the process for USER_CACHE_TTL seconds, and a request gets a new User instance
+# attached to its own session without a query. Changes of the user made by this process remove the entry,
+# other processes see them after at most USER_CACHE_TTL seconds.
+
+from typing import Any
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from config import USER_CACHE_SIZE, USER_CACHE_TTL
+from user.models import User
+from utils.cache import TTLCache
+
+
+class UserCache:
+    """Column values of users by the token subject (user id)."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        :param maxsize: Maximum number of users.
+        :param ttl: Time to live of a user in seconds. 0 - the cache is disabled.
+        """
+        self.enabled = maxsize > 0 and ttl > 0
+        self.cache = TTLCache(maxsize if self.enabled else 0, ttl)
+
+    def __repr__(self):
+        return f"Cache of authenticated users. {self.cache!r}"
+
+    @property
+    def version(self) -> int:
+        """The cache version, taken before a user is loaded and passed to set."""
+        return self.cache.version
+
+    def get(self, session: AsyncSession, subject: str) -> User | None:
+        """
+        Returns the cached user as a new instance attached to the session, without a query.
+        :param session: AsyncSession of the request.
+        :param subject: Token subject, the user id as a string.
+        :return: User or None if the user is not cached.
+        """
+        values: dict[str, Any] | None = self.cache.get(subject)
+        if values is None:
+            return None
+        user = session.identity_map.get(identity_key(User, values['id']))
+        if user is None:
+            user = User(**values)
+            make_transient_to_detached(user)
+            session.add(user)
+        return user
+
+    def set(self, user: User, version: int) -> None:
+        """
+        Saves the column values of the user.
+        :param user: The loaded user.
+        :param version: The cache version taken before the user was loaded.
+        """
+        if not self.enabled:
+            return
+        values = {column.key: getattr(user, column.key) for column in inspect(User).column_attrs}
+        self.cache.set(str(user.id), values, tags=[('user', user.id)], version=version)
+
+    def invalidate(self, user_id: int) -> None:
+        """Removes the user from the cache. Called after the user is changed or deleted."""
+        self.cache.invalidate(('user', user_id))
+
+
+user_cache = UserCache(USER_CACHE_SIZE, USER_CACHE_TTL)
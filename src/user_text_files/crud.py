@@ -0,0 +1,111 @@
+from typing import Sequence, Literal, Any
+
+from sqlalchemy import select, update, delete, func, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from user_text_files.models import File
+
+
+class FileCRUD:
+    def __init__(self):
+        pass
+
+    @staticmethod
+    async def create_file(session: AsyncSession, owner: int, category_id: int, name: str, size: int,
+                          extension: str = '', checksum: str | None = None, commit: bool = True) -> File:
+        """
+        Creates a file record.
+        :param session: AsyncSession instance.
+        :param owner: id of the user who uploaded the file.
+        :param category_id: Category id.
+        :param name: File name in the category.
+        :param size: File size in bytes.
+        :param extension: File extension with the dot.
+        :param checksum: SHA-256 of the file content.
+        :param commit: Whether to commit the transaction. Default True.
+        :return: File db object.
+        """
+        file = File(owner=owner, category_id=category_id, name=name, size=size, extension=extension,
+                    checksum=checksum)
+        session.add(file)
+        if commit:
+            await session.commit()
+        else:
+            await session.flush()
+        return file
+
+    @staticmethod
+    async def get_file(session: AsyncSession, category_id: int, name: str) -> File | None:
+        """Returns the file record by category and name or None."""
+        return await session.scalar(select(File).where(File.category_id == category_id, File.name == name))
+
+    @staticmethod
+    async def list_files(session: AsyncSession, category_id: int, sort: Literal['name', 'size', 'date', 'ext'],
+                         descending: bool = False, limit: int = 50, after: tuple[Any, int] | None = None,
+                         extension: str | None = None) -> Sequence[File]:
+        """
+        Returns a page of the files of the category with keyset pagination: the page starts after
+        the (sort value, id) of the last file of the previous page, so every page is one index range scan.
+        :param session: AsyncSession instance.
+        :param category_id: Category id.
+        :param sort: Sort key: 'name', 'size', 'date' (date added) or 'ext' (extension, then name).
+        :param descending: Sort in descending order.
+        :param limit: Maximum number of files.
+        :param after: Sort value and id of the last file of the previous page. None - the first page.
+        :param extension: Return only files with this extension.
+        :return: List of file db objects.
+        """
+        columns = {'name': (File.name, File.id),
+                   'size': (File.size, File.id),
+                   'date': (File.date_joined, File.id),
+                   'ext': (File.extension, File.name)}[sort]
+        stmt = select(File).where(File.category_id == category_id)
+        if extension is not None:
+            stmt = stmt.where(File.extension == extension)
+        if after is not None:
+            key = tuple_(*columns)
+            stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+        stmt = stmt.order_by(*(column.desc() if descending else column.asc() for column in columns)).limit(limit)
+        return (await session.scalars(stmt)).all()
+
+    @staticmethod
+    async def usage_by_owner(session: AsyncSession, category_id: int) -> Sequence[tuple[int, int, int]]:
+        """Returns (owner, number of files, total size) of the files of the category grouped by owner."""
+        stmt = (select(File.owner, func.count(), func.coalesce(func.sum(File.size), 0))
+                .where(File.category_id == category_id)
+                .group_by(File.owner))
+        return (await session.execute(stmt)).tuples().all()
+
+    @staticmethod
+    async def conflicting_files(session: AsyncSession, old_category_id: int, new_category_id: int) -> Sequence[File]:
+        """Returns files of the new category that have the same name as a file of the old category."""
+        stmt = (select(File).where(File.category_id == new_category_id,
+                                   File.name.in_(select(File.name).where(File.category_id == old_category_id))))
+        return (await session.scalars(stmt)).all()
+
+    @staticmethod
+    async def move_files(session: AsyncSession, old_category_id: int, new_category_id: int,
+                         commit: bool = True) -> None:
+        """
+        Moves the records of all files of the old category to the new category.
+        Records of the new category with the same names must be deleted before, see conflicting_files.
+        """
+        await session.execute(update(File).where(File.category_id == old_category_id)
+                              .values(category_id=new_category_id))
+        if commit:
+            await session.commit()
+
+    @staticmethod
+    async def delete_files(session: AsyncSession, file_ids: Sequence[int], commit: bool = True) -> None:
+        """Deletes file records by id."""
+        if file_ids:
+            await session.execute(delete(File).where(File.id.in_(file_ids)))
+        if commit:
+            await session.commit()
+
+    @staticmethod
+    async def set_size(session: AsyncSession, file_id: int, size: int, commit: bool = True) -> None:
+        """Sets the size of the file record."""
+        await session.execute(update(File).where(File.id == file_id).values(size=size))
+        if commit:
+            await session.commit()
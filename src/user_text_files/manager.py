@@ -0,0 +1,170 @@
+# Manage user text files in the file system and database.
+
+from datetime import datetime
+from typing import Any, AsyncIterator, Literal
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from FileStorage import StorageManager
+from category.crud import CategoryCRUD
+from category.manager import category_manager
+from config import STORAGE
+from search.manager import search_manager
+from quota.manager import quota_manager
+from user.models import User
+from user_text_files.crud import FileCRUD
+from utils.cursor import encode_cursor, decode_cursor
+
+# Types of the key values in the cursor of each sort of the file list, see list_files.
+CURSOR_KEY_TYPES = {'name': (str, int), 'size': (int, int), 'date': (datetime, int), 'ext': (str, str)}
+
+
+class BaseTextFileManager:
+    """The base class of the text file manager."""
+
+    def __init__(self, storage: StorageManager):
+        """Initialization of storage object, CRUD operations object."""
+        if not isinstance(storage, StorageManager):
+            raise TypeError
+
+        self.storage = storage
+        self.category_crud = CategoryCRUD()
+        self.file_crud = FileCRUD()
+
+    def __repr__(self):
+        return (f"Object of management text files."
+                f"Storage name: {self.storage.storage.name}. Storage location: {self.storage.storage.path}")
+
+
+class TextFileManager(BaseTextFileManager):
+    """
+    Manages user text files at the database and file system level.
+    Keeps the category counters, the user quotas and the search index up to date with the files in the storage.
+    """
+
+    async def upload(self, session: AsyncSession, user: User, category_name_or_id: str | int, filename: str,
+                     chunks: AsyncIterator[bytes]) -> dict[str, Any]:
+        """
+        Streams a file into the category. The upload is stopped as soon as the file exceeds
+        the maximum file size of the user status or the rest of the user quota.
+        The file record, the user usage and the category counters are updated in one transaction.
+        :param session: Instance AsyncSession.
+        :param user: The user who uploads the file.
+        :param category_name_or_id: Category name or id.
+        :param filename: Original file name.
+        :param chunks: Asynchronous iterator over the file content.
+        :return: A dictionary with file data.
+        :raises NotADirectoryError: If the category does not exist.
+        :raises TypeError: If files of this type are not allowed.
+        :raises ValueError: If the file is larger than the user is allowed to upload.
+        :raises PermissionError: If the user has reached the limits of the status.
+        """
+        category_obj = await self.category_crud.get_category(session, category_name_or_id)
+        if not category_obj:
+            raise NotADirectoryError
+
+        category_id, category, system_name = category_obj.id, category_obj.name, category_obj.system_name
+        max_size = await quota_manager.upload_limit(session, user)
+        file_info = await self.storage.add_stream(chunks, filename, system_name, max_size)
+        try:
+            await quota_manager.reserve(session, user, file_info['size'])
+            await self.file_crud.create_file(session, user.id, category_id, file_info['file'], file_info['size'],
+                                             file_info['ext'], file_info.get('checksum'), commit=False)
+            await category_manager.register_file_added(session, category_id, file_info['size'])
+        except BaseException:
+            await session.rollback()  # expires category_obj, its attributes are read before.
+            await self.storage.delete_file(system_name, file_info['file'])
+            raise
+        search_manager.schedule_index_file(category_id, file_info['file'], file_info['full_path'])
+        file_info['category'] = category
+        return file_info
+
+    async def get_file(self, session: AsyncSession, category_name_or_id: str | int, file: str) -> dict[str, Any]:
+        """
+        Returns information about a file of the category.
+        :param session: Instance AsyncSession.
+        :param category_name_or_id: Category name or id.
+        :param file: File name with extension.
+        :return: A dictionary with file data and its stat data under the 'stat' key.
+        :raises NotADirectoryError: If the category does not exist.
+        :raises FileNotFoundError: If the file does not exist.
+        """
+        category_obj = await self.category_crud.get_category(session, category_name_or_id)
+        if not category_obj:
+            raise NotADirectoryError
+
+        file_info = await self.storage.get_file(category_obj.system_name, file)
+        file_info['category'] = category_obj.name
+        return file_info
+
+    async def list_files(self, session: AsyncSession, category_name_or_id: str | int,
+                         sort: Literal['name', 'size', 'date', 'ext'] = 'name', descending: bool = False,
+                         limit: int = 50, cursor: str | None = None, extension: str | None = None) -> dict[str, Any]:
+        """
+        Returns a page of the files of the category from the file catalog, the storage directory is not read.
+        :param session: Instance AsyncSession.
+        :param category_name_or_id: Category name or id.
+        :param sort: Sort key: 'name', 'size', 'date' (date added) or 'ext' (extension, then name).
+        :param descending: Sort in descending order.
+        :param limit: Maximum number of files on the page.
+        :param cursor: Cursor of the next page returned with the previous page. None - the first page.
+        :param extension: Return only files with this extension, for example 'txt' or '.txt'.
+        :return: A dictionary {'files': list of file dictionaries, 'next': cursor of the next page or None}.
+        :raises NotADirectoryError: If the category does not exist.
+        :raises ValueError: If the cursor is invalid or was made for another sort key.
+        """
+        category_obj = await self.category_crud.get_category(session, category_name_or_id)
+        if not category_obj:
+            raise NotADirectoryError
+
+        after = decode_cursor(cursor, sort, CURSOR_KEY_TYPES[sort]) if cursor is not None else None
+        if extension is not None and not extension.startswith('.'):
+            extension = '.' + extension
+        files = await self.file_crud.list_files(session, category_obj.id, sort, descending, limit, after, extension)
+
+        next_cursor = None
+        if len(files) == limit:
+            last = files[-1]
+            key = {'name': (last.name, last.id),
+                   'size': (last.size, last.id),
+                   'date': (last.date_joined, last.id),
+                   'ext': (last.extension, last.name)}[sort]
+            next_cursor = encode_cursor(sort, *key)
+
+        return {'files': [{'file': file.name,
+                           'category': category_obj.name,
+                           'ext': file.extension,
+                           'size': file.size,
+                           'checksum': file.checksum,
+                           'date_joined': file.date_joined,
+                           'date_modified': file.date_modified} for file in files],
+                'next': next_cursor}
+
+    async def read_page(self, session: AsyncSession, category_name_or_id: str | int, file: str, page: int,
+                        lines_per_page: int) -> dict[str, Any]:
+        """
+        Reads one page of a text file of the category.
+        :param session: Instance AsyncSession.
+        :param category_name_or_id: Category name or id.
+        :param file: File name with extension.
+        :param page: Page number, starting from 1.
+        :param lines_per_page: Number of lines on a page.
+        :return: A dictionary {'file', 'category', 'page', 'pages', 'text'}.
+        :raises NotADirectoryError: If the category does not exist.
+        :raises FileNotFoundError: If the file does not exist.
+        :raises TypeError: If the file is not a text file.
+        :raises IndexError: If the page does not exist.
+        """
+        category_obj = await self.category_crud.get_category(session, category_name_or_id)
+        if not category_obj:
+            raise NotADirectoryError
+
+        content, pages = await self.storage.read_page(category_obj.system_name, file, page, lines_per_page)
+        return {'file': file,
+                'category': category_obj.name,
+                'page': page,
+                'pages': pages,
+                'text': content.decode('utf-8', errors='replace')}
+
+
+text_file_manager = TextFileManager(STORAGE)
@@ -0,0 +1,38 @@
+from datetime import datetime
+
+from sqlalchemy import String, TIMESTAMP, ForeignKey, BigInteger, UniqueConstraint, Index
+from sqlalchemy.orm import mapped_column, Mapped
+
+from category.models import Category
+from database import Base
+from user.models import User
+
+
+class File(Base):
+    """
+    A model of a user text file stored in a category.
+    File listings are read from this table, the storage directory is not scanned.
+    """
+    __tablename__ = 'file'
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement="auto")
+    name: Mapped[str] = mapped_column(String(255))
+    extension: Mapped[str] = mapped_column(String(20), default='', server_default='')
+    category_id: Mapped[int] = mapped_column(ForeignKey(Category.id, onupdate='CASCADE', ondelete='CASCADE'))
+    owner: Mapped[int] = mapped_column(ForeignKey(User.id, onupdate='CASCADE', ondelete='CASCADE'), index=True)
+    size: Mapped[int] = mapped_column(BigInteger)
+    # SHA-256 of the content. None for files added before checksums were recorded.
+    checksum: Mapped[str] = mapped_column(String(64), nullable=True)
+    date_joined = mapped_column(TIMESTAMP, default=datetime.utcnow)
+    date_modified = mapped_column(TIMESTAMP, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Indexes of the keyset-paginated listings of a category, see FileCRUD.list_files.
+    # Sorting by name uses the unique constraint.
+    __table_args__ = (UniqueConstraint('category_id', 'name'),
+                      Index('ix_file_category_size', 'category_id', 'size', 'id'),
+                      Index('ix_file_category_date_joined', 'category_id', 'date_joined', 'id'),
+                      Index('ix_file_category_extension_name', 'category_id', 'extension', 'name'),
+                      )
+
+    def __repr__(self) -> str:
+        return f"File '{self.name}'. Category: {self.category_id}. Owner: {self.owner}. Size: {self.size}"
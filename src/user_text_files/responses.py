@@ -0,0 +1,154 @@
+# File responses with support for partial (Range) and conditional requests.
+
+import asyncio
+import hashlib
+import os
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+import aiofiles
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """Builds the ETag of a file from its modification time and size."""
+    etag = hashlib.md5(f"{stat_result.st_mtime_ns}-{stat_result.st_size}".encode(), usedforsecurity=False)
+    return f'"{etag.hexdigest()}"'
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    """
+    Parses a single byte range of the Range header.
+    :param range_header: Header value, e.g. 'bytes=0-499', 'bytes=500-', 'bytes=-500'.
+    :param size: File size in bytes.
+    :return: First and last byte positions (inclusive). None if the header is invalid or contains several ranges,
+             in this case the whole file is sent.
+    :raises ValueError: If the range cannot be satisfied.
+    """
+    unit, _, ranges = range_header.partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in ranges:
+        return None
+    first, sep, last = ranges.strip().partition('-')
+    first, last = first.strip(), last.strip()
+    if not sep or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Range not satisfiable.")
+        return max(size - suffix, 0), size - 1
+
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError("Range not satisfiable.")
+    return start, end
+
+
+class RangeFileResponse(Response):
+    """
+    Sends a file or one byte range of it without reading the file into memory.
+    If the server supports the ASGI zero-copy send extension, the file descriptor is passed to the server,
+    otherwise the file is read in fixed-size chunks.
+    """
+    chunk_size = 64 * 1024
+
+    def __init__(self, path: str, stat_result: os.stat_result, request_headers: Headers,
+                 media_type: str | None = None, filename: str | None = None):
+        """
+        :param path: Path to the file.
+        :param stat_result: File stat data, used for ETag, Last-Modified and Content-Length.
+        :param request_headers: Request headers: Range, If-Range, If-None-Match, If-Modified-Since.
+        :param media_type: Content type. By default, 'application/octet-stream'.
+        :param filename: File name for the Content-Disposition header.
+        """
+        super().__init__(media_type=media_type or 'application/octet-stream')
+        self.path = path
+        size = stat_result.st_size
+        etag = file_etag(stat_result)
+        last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+        self.headers['accept-ranges'] = 'bytes'
+        self.headers['etag'] = etag
+        self.headers['last-modified'] = last_modified
+        if filename is not None:
+            self.headers['content-disposition'] = f"attachment; filename*=utf-8''{quote(filename)}"
+
+        self.offset, self.count = 0, size
+        if self.__not_modified(request_headers, etag, stat_result.st_mtime):
+            self.status_code, self.count = 304, 0
+            del self.headers['content-type']
+            del self.headers['content-length']
+            return
+
+        range_header = request_headers.get('range')
+        if range_header and self.__if_range_matches(request_headers.get('if-range'), etag, last_modified):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                self.status_code, self.count = 416, 0
+                self.headers['content-range'] = f"bytes */{size}"
+                self.headers['content-length'] = '0'
+                return
+            if byte_range is not None:
+                start, end = byte_range
+                self.status_code = 206
+                self.offset, self.count = start, end - start + 1
+                self.headers['content-range'] = f"bytes {start}-{end}/{size}"
+
+        self.headers['content-length'] = str(self.count)
+
+    @staticmethod
+    def __not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+        """Checks If-None-Match and If-Modified-Since."""
+        if_none_match = request_headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            return '*' in tags or etag in tags
+        if_modified_since = request_headers.get('if-modified-since')
+        if if_modified_since is not None:
+            try:
+                return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    @staticmethod
+    def __if_range_matches(if_range: str | None, etag: str, last_modified: str) -> bool:
+        """A range is served only if If-Range is absent or matches the current version of the file."""
+        if if_range is None:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            return if_range == etag
+        return if_range == last_modified
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({'type': 'http.response.start', 'status': self.status_code, 'headers': self.raw_headers})
+        if self.count == 0 or scope['method'] == 'HEAD':
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+            return
+
+        if 'http.response.zerocopysend' in scope.get('extensions', {}):
+            file = await asyncio.to_thread(open, self.path, 'rb')
+            try:
+                await send({'type': 'http.response.zerocopysend', 'file': file,
+                            'offset': self.offset, 'count': self.count, 'more_body': False})
+            finally:
+                file.close()
+            return
+
+        async with aiofiles.open(self.path, 'rb') as file:
+            await file.seek(self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0:
+                await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
@@ -1,14 +1,140 @@
 # A router to handle user files.
 
-from typing import Annotated, Type, List
+import mimetypes
+from typing import Annotated, Type, List, Literal, Optional
 
 from asyncstdlib import any_iter
-from fastapi import APIRouter, HTTPException, Path, Depends
+from fastapi import APIRouter, HTTPException, Path, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from category.manager import category_manager
 from database import get_async_session
+from quota.manager import quota_manager
 from user.auth_config import current_user
+from user_text_files.manager import text_file_manager
+from user_text_files.responses import RangeFileResponse
+from user_text_files.scheme import TextFileReadScheme, TextFilePageScheme, TextFileListScheme
 
-text_files_router = APIRouter(tags=['User', 'Files'], prefix='/file')
\ No newline at end of file
+text_files_router = APIRouter(tags=['User', 'Files'], prefix='/file')
+
+
+@text_files_router.post('/upload/{category_name_or_id}', status_code=status.HTTP_201_CREATED)
+async def upload_file(
+        category_name_or_id: Annotated[str, Path(min_length=1)],
+        filename: Annotated[str, Query(min_length=1, max_length=200)],
+        request: Request,
+        auth_user=Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)) -> TextFileReadScheme:
+    """
+    Uploads a file to the category. The request body is the raw file content, it is written to disk
+    chunk by chunk as it arrives.
+    """
+    too_large = HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                              detail="The file is larger than your status or quota allows.")
+
+    content_length = request.headers.get('content-length')
+    try:
+        max_size = await quota_manager.upload_limit(session, auth_user)
+    except PermissionError as error:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(error))
+    if max_size is not None and content_length and content_length.isdigit() and int(content_length) > max_size:
+        raise too_large
+
+    try:
+        file_dict = await text_file_manager.upload(session, auth_user, category_name_or_id, filename,
+                                                   request.stream())
+    except NotADirectoryError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Category {category_name_or_id} not found.")
+    except TypeError:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail=f"Files of this type are not allowed.")
+    except ValueError:
+        raise too_large
+    except PermissionError as error:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=str(error))
+
+    return TextFileReadScheme(file=file_dict.get('file'),
+                              category=file_dict.get('category'),
+                              ext=file_dict.get('ext'),
+                              size=file_dict.get('size'))
+
+
+@text_files_router.get('/download/{category_name_or_id}/{file}')
+async def download_file(
+        category_name_or_id: Annotated[str, Path(min_length=1)],
+        file: Annotated[str, Path(min_length=1)],
+        request: Request,
+        auth_user=Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)) -> RangeFileResponse:
+    """
+    Downloads a file of the category. Supports Range and If-Range for partial and resumed downloads,
+    ETag and Last-Modified for conditional requests.
+    """
+    try:
+        file_dict = await text_file_manager.get_file(session, category_name_or_id, file)
+    except NotADirectoryError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Category {category_name_or_id} not found.")
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"File {file} not found.")
+
+    media_type, _ = mimetypes.guess_type(file_dict.get('file'))
+    return RangeFileResponse(file_dict.get('full_path'), file_dict.get('stat'), request.headers,
+                             media_type=media_type, filename=file_dict.get('file'))
+
+
+@text_files_router.get('/read/{category_name_or_id}/{file}')
+async def read_page(
+        category_name_or_id: Annotated[str, Path(min_length=1)],
+        file: Annotated[str, Path(min_length=1)],
+        page: Annotated[int, Query(ge=1)] = 1,
+        lines: Annotated[int, Query(ge=1, le=1000)] = 40,
+        auth_user=Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)) -> TextFilePageScheme:
+    """Reads one page of a text file. A page is 'lines' lines of the file."""
+    try:
+        page_dict = await text_file_manager.read_page(session, category_name_or_id, file, page, lines)
+    except NotADirectoryError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Category {category_name_or_id} not found.")
+    except FileNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"File {file} not found.")
+    except TypeError:
+        raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                            detail=f"Only text files can be read by pages.")
+    except IndexError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Page {page} not found.")
+
+    return TextFilePageScheme(**page_dict)
+
+
+@text_files_router.get('/list/{category_name_or_id}')
+async def list_files(
+        category_name_or_id: Annotated[str, Path(min_length=1)],
+        sort: Literal['name', 'size', 'date', 'ext'] = 'name',
+        order: Literal['asc', 'desc'] = 'asc',
+        limit: Annotated[int, Query(ge=1, le=500)] = 50,
+        cursor: Annotated[Optional[str], Query(min_length=1, max_length=1000)] = None,
+        ext: Annotated[Optional[str], Query(min_length=1, max_length=20)] = None,
+        auth_user=Depends(current_user),
+        session: AsyncSession = Depends(get_async_session)) -> TextFileListScheme:
+    """
+    Lists files of the category page by page. Pass the 'next' cursor of a page to get the next one
+    with the same sort and order.
+    """
+    try:
+        page_dict = await text_file_manager.list_files(session, category_name_or_id, sort, order == 'desc', limit,
+                                                       cursor, ext)
+    except NotADirectoryError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=f"Category {category_name_or_id} not found.")
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Invalid cursor.")
+
+    return TextFileListScheme(**page_dict)
@@ -0,0 +1,39 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class TextFileReadScheme(BaseModel):
+    """A schema for reading the text file."""
+    model_config = ConfigDict(from_attributes=True)
+
+    file: str
+    category: str
+    ext: str
+    size: int = Field(ge=0, description='File size in bytes')
+
+
+class TextFilePageScheme(BaseModel):
+    """A schema for reading one page of the text file."""
+
+    file: str
+    category: str
+    page: int = Field(ge=1, description='Page number')
+    pages: int = Field(ge=1, description='Total number of pages')
+    text: str
+
+
+class TextFileInfoScheme(TextFileReadScheme):
+    """A schema for reading the text file from the file catalog."""
+
+    checksum: Optional[str] = Field(default=None, description='SHA-256 of the file content')
+    date_joined: datetime
+    date_modified: Optional[datetime] = None
+
+
+class TextFileListScheme(BaseModel):
+    """A schema for a page of the file list."""
+
+    files: List[TextFileInfoScheme]
+    next: Optional[str] = Field(default=None, description='Cursor of the next page, None on the last page')
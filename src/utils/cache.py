@@ -0,0 +1,127 @@
+# In-process cache with a bounded size (least recently used entries are evicted) and a time to live.
+# Entries can be tagged, invalidate(tag) removes every entry with the tag: a write removes exactly
+# the reads it has changed. A read that started before an invalidation of one of its tags does not save
+# its result, see 'version'. Not thread-safe, it is used from the event loop only.
+
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterable
+
+_MISSING = object()
+
+
+class TTLCache:
+    """LRU cache with time to live, tags and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 5.0, timer: Callable[[], float] = time.monotonic):
+        """
+        :param maxsize: Maximum number of entries. 0 disables the cache.
+        :param ttl: Time to live of an entry in seconds.
+        :param timer: Clock, time.monotonic by default.
+        :raises ValueError: If maxsize or ttl is negative.
+        """
+        if maxsize < 0 or ttl < 0:
+            raise ValueError("maxsize and ttl must not be negative.")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.__timer = timer
+        self.__entries: OrderedDict[Hashable, tuple[float, Any, tuple[Hashable, ...]]] = OrderedDict()
+        self.__tags: dict[Hashable, set[Hashable]] = {}
+        # Incremented by every invalidation. A reader takes it before loading a value and passes it to set,
+        # so a value loaded before a concurrent write of one of its tags is not saved.
+        self.version = 0
+        # Version of the last invalidation of every tag and of the last clear.
+        self.__invalidated: dict[Hashable, int] = {}
+        self.__cleared = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __repr__(self):
+        return f"TTLCache: {len(self.__entries)}/{self.maxsize} entries, ttl {self.ttl} s. Stats: {self.stats()}"
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Returns the value of the key or default if there is no value or it has expired."""
+        entry = self.__entries.get(key, _MISSING)
+        if entry is _MISSING or entry[0] <= self.__timer():
+            if entry is not _MISSING:
+                self.__remove(key)
+            self.misses += 1
+            return default
+        self.__entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any, tags: Iterable[Hashable] = (), version: int | None = None) -> None:
+        """
+        Saves the value. The least recently used entry is evicted if the cache is full.
+        :param key: Key.
+        :param value: Value.
+        :param tags: Tags of the entry, see invalidate.
+        :param version: The cache version taken before the value was loaded. If one of the tags has been
+                        invalidated since, the value may be stale and is not saved.
+        """
+        tags = tuple(tags)
+        if self.maxsize == 0 or (version is not None and self.__is_stale(tags, version)):
+            return
+        if key in self.__entries:
+            self.__remove(key)
+        elif len(self.__entries) >= self.maxsize:
+            self.__remove(next(iter(self.__entries)))
+            self.evictions += 1
+        self.__entries[key] = (self.__timer() + self.ttl, value, tags)
+        for tag in tags:
+            self.__tags.setdefault(tag, set()).add(key)
+
+    def delete(self, key: Hashable) -> None:
+        """Removes the key if it exists."""
+        if key in self.__entries:
+            self.__remove(key)
+
+    def invalidate(self, *tags: Hashable) -> None:
+        """Removes all entries with any of the tags."""
+        self.version += 1
+        for tag in tags:
+            self.__invalidated[tag] = self.version
+            for key in list(self.__tags.get(tag, ())):
+                self.__remove(key)
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """Removes all entries. The counters are kept."""
+        self.version += 1
+        self.__cleared = self.version
+        self.__invalidated.clear()
+        self.__entries.clear()
+        self.__tags.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns the cache counters."""
+        requests = self.hits + self.misses
+        return {'size': len(self.__entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                }
+
+    def __is_stale(self, tags: tuple[Hashable, ...], version: int) -> bool:
+        """Checks whether the cache was cleared or one of the tags was invalidated after the version."""
+        if self.__cleared > version:
+            return True
+        return any(self.__invalidated.get(tag, 0) > version for tag in tags)
+
+    def __remove(self, key: Hashable) -> None:
+        _, _, tags = self.__entries.pop(key)
+        for tag in tags:
+            keys = self.__tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.__tags[tag]
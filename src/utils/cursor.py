@@ -0,0 +1,55 @@
+# Cursors of keyset-paginated listings.
+# A cursor holds the sort key and the key values of the last row of a page, packed into an opaque URL-safe string.
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Sequence
+
+# Range of the integer key columns.
+BIGINT_MIN = -2 ** 63
+BIGINT_MAX = 2 ** 63 - 1
+
+
+def encode_cursor(sort: str, *key: Any) -> str:
+    """
+    Packs the sort key and the key values of the last row of a page.
+    :param sort: Sort key of the listing, the cursor is valid only for the same sort.
+    :param key: Values of the sort columns of the last row. Datetime values are supported.
+    :return: Cursor string.
+    """
+    values = [{'dt': value.isoformat()} if isinstance(value, datetime) else value for value in key]
+    return base64.urlsafe_b64encode(json.dumps([sort, *values]).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: str, key_types: Sequence[type]) -> tuple[Any, ...]:
+    """
+    Unpacks a cursor made by encode_cursor.
+    :param cursor: Cursor string.
+    :param sort: Sort key of the current request.
+    :param key_types: Types of the key values for this sort key, e.g. (datetime, int).
+    :return: Key values of the last row of the previous page.
+    :raises ValueError: If the cursor is invalid, was made for another sort key or its values do not match key_types.
+    """
+    try:
+        cursor_sort, *values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if cursor_sort != sort or len(values) != len(key_types):
+            raise ValueError
+        key = tuple(datetime.fromisoformat(value['dt']) if isinstance(value, dict) else value for value in values)
+        if not all(_is_valid(value, key_type) for value, key_type in zip(key, key_types)):
+            raise ValueError
+        return key
+    except (binascii.Error, json.JSONDecodeError, UnicodeDecodeError, TypeError, KeyError, ValueError):
+        raise ValueError(f"Invalid cursor {cursor}.")
+
+
+def _is_valid(value: Any, key_type: type) -> bool:
+    """Checks a key value: exact type (a bool is not an int), int within BIGINT, datetime without a time zone."""
+    if type(value) is not key_type:
+        return False
+    if key_type is int:
+        return BIGINT_MIN <= value <= BIGINT_MAX
+    if key_type is datetime:
+        return value.tzinfo is None
+    return True
@@ -0,0 +1,136 @@
+# Metrics of a database connection pool.
+# Counters are collected from the pool events (connect, checkout, checkin, invalidate, close). The time a request
+# waits for a connection is not reported by any event, so the pool class measures it around getting a connection
+# from the queue: it includes opening a new connection when the pool grows into the overflow.
+# The pool class also records the largest overflow in use.
+
+import time
+from bisect import bisect_left
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Upper bounds of the wait time histogram buckets in seconds.
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+
+
+class PoolMetrics:
+    """Counters and the checkout wait time histogram of one pool."""
+
+    def __init__(self):
+        self.checkouts = 0
+        self.checkins = 0
+        self.timeouts = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.invalidations = 0
+        self.soft_invalidations = 0
+        self.peak_overflow = 0
+        self.wait_count = 0
+        self.wait_sum = 0.0
+        self.wait_max = 0.0
+        self.wait_buckets = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def __repr__(self):
+        return (f"PoolMetrics: {self.checkouts} checkouts, {self.timeouts} timeouts, "
+                f"{self.connections_created} connections opened, {self.invalidations} invalidated")
+
+    def attach(self, engine: AsyncEngine) -> None:
+        """
+        Starts collecting the metrics of the engine pool.
+        :param engine: Engine created with poolclass=InstrumentedPool.
+        :raises TypeError: If the engine pool is not an InstrumentedPool.
+        """
+        pool = engine.sync_engine.pool
+        if not isinstance(pool, InstrumentedPool):
+            raise TypeError("The engine must be created with poolclass=InstrumentedPool.")
+        pool.metrics = self
+        event.listen(pool, 'connect', self.__on_connect)
+        event.listen(pool, 'checkout', self.__on_checkout)
+        event.listen(pool, 'checkin', self.__on_checkin)
+        event.listen(pool, 'invalidate', self.__on_invalidate)
+        event.listen(pool, 'soft_invalidate', self.__on_soft_invalidate)
+        event.listen(pool, 'close', self.__on_close)
+        event.listen(pool, 'close_detached', self.__on_close_detached)
+
+    def observe_wait(self, seconds: float) -> None:
+        """Adds a checkout wait time to the histogram."""
+        self.wait_count += 1
+        self.wait_sum += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self.wait_buckets[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+    def stats(self, engine: AsyncEngine) -> dict[str, Any]:
+        """Returns the counters and the current state of the engine pool."""
+        pool = engine.sync_engine.pool
+        buckets = {str(bound): count for bound, count in zip(WAIT_BUCKETS, self.wait_buckets)}
+        buckets['+Inf'] = self.wait_buckets[-1]
+        return {'size': pool.size(),
+                'checked_out': pool.checkedout(),
+                'overflow': max(pool.overflow(), 0),
+                'max_overflow': pool._max_overflow,
+                'peak_overflow': self.peak_overflow,
+                'checkouts': self.checkouts,
+                'checkins': self.checkins,
+                'timeouts': self.timeouts,
+                'connections_created': self.connections_created,
+                'connections_closed': self.connections_closed,
+                'invalidations': self.invalidations,
+                'soft_invalidations': self.soft_invalidations,
+                'wait': {'count': self.wait_count,
+                         'sum': self.wait_sum,
+                         'max': self.wait_max,
+                         'buckets': buckets,
+                         },
+                }
+
+    def __on_connect(self, dbapi_connection, connection_record) -> None:
+        self.connections_created += 1
+
+    def __on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        self.checkouts += 1
+
+    def __on_checkin(self, dbapi_connection, connection_record) -> None:
+        self.checkins += 1
+
+    def __on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.invalidations += 1
+
+    def __on_soft_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.soft_invalidations += 1
+
+    def __on_close(self, dbapi_connection, connection_record) -> None:
+        self.connections_closed += 1
+
+    def __on_close_detached(self, dbapi_connection) -> None:
+        self.connections_closed += 1
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool of the asyncio engines that measures how long a checkout waits for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics: PoolMetrics | None = None
+
+    def recreate(self) -> 'InstrumentedPool':
+        # Called by engine.dispose(). Event listeners are copied by SQLAlchemy, the metrics are kept here.
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+    def _do_get(self):
+        if self.metrics is None:
+            return super()._do_get()
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+            self.metrics.peak_overflow = max(self.metrics.peak_overflow, self.overflow())
+            return connection
+        except exc.TimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        finally:
+            self.metrics.observe_wait(time.perf_counter() - start)
@@ -0,0 +1,66 @@
+# Coalescing of concurrent identical calls.
+# The first caller of a key runs the call, callers of the same key that arrive while it is running wait for
+# it and get the same result or exception, so N concurrent identical lookups make one database round-trip.
+# Results are shared objects: callers must not change them or must copy them.
+# If the first caller is cancelled (e.g. the client disconnected), a waiting caller runs the call again.
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class _Abandoned(Exception):
+    """Set on the shared call when the caller that ran it was cancelled."""
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time and shares its result with concurrent callers of the key."""
+
+    def __init__(self):
+        self.__calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __repr__(self):
+        return f"SingleFlight: {len(self.__calls)} calls in flight. Stats: {self.stats()}"
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Returns the result of func(). If a call with the same key is running, waits for its result instead.
+        :param key: Key of the call. Calls with equal keys must return equal results.
+        :param func: Coroutine function without arguments.
+        :return: The result of the call.
+        :raises: The exception of the call.
+        """
+        while (future := self.__calls.get(key)) is not None:
+            self.shared += 1
+            try:
+                # shield: cancelling a waiting caller must not cancel the call of another caller.
+                return await asyncio.shield(future)
+            except _Abandoned:
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self.__calls[key] = future
+        self.calls += 1
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            self.__set_exception(future, _Abandoned())
+            raise
+        except Exception as error:
+            self.__set_exception(future, error)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.__calls[key]
+
+    def stats(self) -> dict[str, int]:
+        """Returns the number of calls run and the number of calls that waited for the result of another call."""
+        return {'calls': self.calls, 'shared': self.shared}
+
+    @staticmethod
+    def __set_exception(future: asyncio.Future, error: BaseException) -> None:
+        future.set_exception(error)
+        future.exception()  # marks the exception as retrieved, there may be no waiting callers.
@@ -1,11 +1,21 @@
 # Some asynchronous functions for text formatting.
 import string
+from functools import lru_cache
 from typing import Literal
 
 from asyncstdlib import any_iter
 from transliterate import translit
 
 
+@lru_cache(maxsize=100_000)
+def normalize_term(term: str) -> str:
+    """
+    Normalizes a word for search: lower case, Cyrillic replaced with Latin characters,
+    so that 'Книга' and 'kniga' give the same term. Synchronous, used in worker processes.
+    """
+    return translit(term.lower(), language_code='ru', reversed=True)
+
+
 class TextFormatter:
     def __init__(self):
         pass